@@ -9,8 +9,21 @@ sys.path.insert(1, importPath)
 """
 Package system
 """
-# Folders
-from . import software
+import importlib
+
+# Folders, imported on first access (PEP 562) so that importing one module of the package does not load every subsystem
+_lazySubpackages = ('software',)
+
+
+def __getattr__(name):
+    if name in _lazySubpackages:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_lazySubpackages))
+
 
 # Files
 # from . import config
@@ -6,10 +6,10 @@
 from __future__ import absolute_import, division, print_function, \
     unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
 import sys, os, datetime, traceback, optparse, pprint, faulthandler
-import tensorflow
 import pathlib, time
 from src.software.utilsCommon import findAll, tryFolderDetect
 from src.software.debug import whoami
+import src.software.discoveryIndex as discoveryIndex
 
 # Setup base twidl directory
 twidl_dir_name = 'twidl'
@@ -23,9 +23,68 @@ supportedDevices = {pTokenADP: 'ADP_UV',
                     pTokenCDR: 'CDR_DA'}
 
 
+# Relative folders searched for the auto parsers, in order
+autoParseTrySets = [['Auto-Parse', 'decode'],
+                    ['src', 'software', 'decode'],
+                    ['software', 'decode'],
+                    ['decode']]
+
+
+def _autoParserDevicePath(deviceType: str = None):
+    """
+    Auto parser folder name of a product class, ADP for unknown classes.
+    """
+    if deviceType is None:
+        devicePath = supportedDevices[pTokenADP]
+    elif str(deviceType) == str(pTokenADP):
+        devicePath = supportedDevices[pTokenADP]
+    elif str(deviceType) == str(pTokenCDR):
+        devicePath = supportedDevices[pTokenCDR]
+    else:
+        devicePath = supportedDevices[pTokenADP]
+    return devicePath
+
+
+def _autoParserCandidates(autoParsePath: str = None, deviceType: str = None):
+    """
+    Folders whose existence decides the result of findAutoParser: every relative auto parser folder below the working
+    directory and its parents, the source directory and the home directory.
+
+    Args:
+        autoParsePath: path of the ctype auto parsers
+        deviceType: product class supported
+
+    Returns:
+        List of folders
+    """
+    if autoParsePath is not None:
+        return [autoParsePath]
+    devicePath = _autoParserDevicePath(deviceType=deviceType)
+    baseFolders = discoveryIndex.ancestorDirectories(os.getcwd()) + [os.path.dirname(os.path.abspath(__file__)), str(pathlib.Path.home())]
+    return [os.path.join(baseFolder, *tlist, devicePath) for tlist in autoParseTrySets for baseFolder in baseFolders]
+
+
+def _twidlCandidates(twidlPath=twidl_active_path):
+    """
+    Folders whose existence decides the result of findTWIDL.
+
+    Args:
+        twidlPath: path of the tool helper parsers
+
+    Returns:
+        List of folders
+    """
+    candidates = [os.path.abspath(os.path.join(os.path.dirname(__file__), twidl_dir_name)),
+                  os.path.abspath(os.path.join(pathlib.Path.home(), twidl_dir_name))]
+    if twidlPath is not None:
+        candidates.insert(0, os.path.abspath(twidlPath))
+    return candidates
+
+
 def findAutoParser(autoParsePath: str = None, deviceType: str = None):
     """
     Using the parser path parameter, will use scan utility to get the devices model and firmware. Based on the devices it will return a path.
+    The path is reused from the discovery index while none of the searched folders appeared, disappeared or changed.
 
     Args:
         autoParsePath: path of the ctype auto parsers
@@ -34,19 +93,24 @@ def findAutoParser(autoParsePath: str = None, deviceType: str = None):
     Returns:
         Returns the found path or None
     """
-    trySets = [['Auto-Parse', 'decode'],
-               ['src', 'software', 'decode'],
-               ['software', 'decode'],
-               ['decode']]
+    return discoveryIndex.defaultIndex().cached(kind='findAutoParser',
+                                                key=[autoParsePath, deviceType, os.getcwd()],
+                                                compute=lambda: _scanAutoParser(autoParsePath=autoParsePath, deviceType=deviceType),
+                                                directories=lambda foundPath: _autoParserCandidates(autoParsePath=autoParsePath, deviceType=deviceType))
 
-    if deviceType is None:
-        devicePath = supportedDevices[pTokenADP]
-    elif str(deviceType) == str(pTokenADP):
-        devicePath = supportedDevices[pTokenADP]
-    elif str(deviceType) == str(pTokenCDR):
-        devicePath = supportedDevices[pTokenCDR]
-    else:
-        devicePath = supportedDevices[pTokenADP]
+
+def _scanAutoParser(autoParsePath: str = None, deviceType: str = None):
+    """
+    Searches the candidate folders of the auto parsers, see findAutoParser.
+
+    Args:
+        autoParsePath: path of the ctype auto parsers
+        deviceType: product class supported
+
+    Returns:
+        Returns the found path or None
+    """
+    devicePath = _autoParserDevicePath(deviceType=deviceType)
 
     ## Potential Paths
     # Relative Path(s)
@@ -60,7 +124,7 @@ def findAutoParser(autoParsePath: str = None, deviceType: str = None):
     # Mount U Drive    - /mnt/udrive/jdtarang/Telemetry/Auto-Parse/decode
     foundPath = autoParsePath if ((autoParsePath is not None) and os.path.isdir(autoParsePath)) else None
     if autoParsePath is None:
-        for tlist in trySets:
+        for tlist in autoParseTrySets:
             autoParsePath = os.path.join(*tlist)
             cPath = os.path.join(autoParsePath, devicePath)
             if not os.path.exists(cPath):
@@ -106,6 +170,33 @@ def raad_importAutoParser(autoParsePath=None, deviceType=pTokenADP):
 def findTWIDL(debug=False, twidlPath=twidl_active_path):
     """
     Using the parser path parameter, will use scan utility to get the devices model and firmware. Based on the devices it will return a path.
+    The path is reused from the discovery index while none of the searched folders changed, so a missing TWIDL
+    only walks the home directory for candidates on the first launch or after --rescan.
+
+    Args:
+        twidlPath: path of the tool helper parsers
+        debug: flag used for development
+
+    Returns:
+        Returns the found path or None
+    """
+    index = discoveryIndex.defaultIndex()
+    indexKey = [twidlPath, os.getcwd()]
+    (indexHit, foundPath) = index.lookup(kind='findTWIDL', key=indexKey)
+    if indexHit:
+        if os.path.exists(foundPath) is False:
+            print(f"Developer note:: {twidl_dir_name} not found at {foundPath}, run with --rescan to list the candidates.")
+        if debug is True:
+            pprint.pprint(foundPath)
+        return foundPath
+    foundPath = _scanTWIDL(debug=debug, twidlPath=twidlPath)
+    index.update(kind='findTWIDL', key=indexKey, value=foundPath, directories=_twidlCandidates(twidlPath=twidlPath))
+    return foundPath
+
+
+def _scanTWIDL(debug=False, twidlPath=twidl_active_path):
+    """
+    Searches the candidate folders of TWIDL, see findTWIDL.
 
     Args:
         twidlPath: path of the tool helper parsers
@@ -180,6 +271,82 @@ def raad_importTWIDL(debug=False, twidlPath=None):
     return twidlPath
 
 
+def raad_findAll(directoryTreeRootNode=None, debug=False, verbose=False):
+    """
+    Adds every folder of a tree to the system path. The folder list is reused from the discovery index while none of
+    the folders changed.
+
+    Args:
+        directoryTreeRootNode: root folder of the tree, None for the software folder
+        debug: flag used for development
+        verbose: flag to print every node
+
+    Returns:
+        fileTypeTree, directoryTree
+    """
+    if directoryTreeRootNode is None or os.path.exists(directoryTreeRootNode) is False:
+        directoryTreeRootNode = None
+    index = discoveryIndex.defaultIndex()
+    indexKey = [directoryTreeRootNode]
+    (indexHit, trees) = index.lookup(kind='findAll', key=indexKey)
+    if indexHit:
+        (fileTypeTree, directoryTree) = trees
+        for loc in directoryTree:
+            sys.path.append(loc)
+    else:
+        (fileTypeTree, directoryTree) = findAll(fileType=".py", directoryTreeRootNode=directoryTreeRootNode, debug=debug, doIt=True, verbose=verbose)
+        if directoryTreeRootNode is None:
+            rootNode = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'software')
+        else:
+            rootNode = directoryTreeRootNode
+        # A folder added anywhere in the tree changes the modification time of its parent
+        treeDirectories = set([rootNode] + directoryTree + [os.path.dirname(loc) for loc in directoryTree])
+        index.update(kind='findAll', key=indexKey, value=[fileTypeTree, directoryTree], directories=sorted(treeDirectories))
+    return (fileTypeTree, directoryTree)
+
+
+def detectComputeDevices():
+    """
+    Loads tensorflow to print the CPU, GPU and attached compute devices, and enables memory growth on the first device of
+    the compute type used.
+    """
+    print("------------------------------------------------------------------------------------------")
+    print("CPU, GPU, and attached compute device detection...")
+    print("------------------------------------------------------------------------------------------")
+    try:
+        # Imported here so the modes not detecting devices do not pay for loading tensorflow
+        import tensorflow
+        tensorflowVersion = tensorflow.version.VERSION
+        vList = tensorflowVersion.split('.')
+        bMajorVersion = int(vList[0]) == 2
+        bMinorVersion = int(vList[1]) >= 4
+        bMinorSubVersion = int(vList[2]) >= 0
+        tensorFlowVersionValid = bMajorVersion and bMinorVersion and bMinorSubVersion
+        if tensorFlowVersionValid:
+            from tensorflow.python.client.device_lib import list_local_devices
+            allDevices = list_local_devices()
+            pprint.pprint(f"All devices are {allDevices}")
+            from tensorflow._api.v2.config.experimental import list_physical_devices
+            foundCPUs = len(list_physical_devices('CPU'))
+            foundGPUs = len(list_physical_devices('GPU'))
+            from tensorflow._api.v2.test import is_gpu_available
+            isGPUReady = is_gpu_available(cuda_only=True)
+            print(f"* Num CPUs Available: {foundCPUs}")
+            print(f"# Num GPUs Available: {foundGPUs} and GPU CUDA driver ready status is {isGPUReady}")
+            if foundGPUs > 0:
+                computeType = 'GPU'
+            else:
+                computeType = 'CPU'
+            physical_devices = list_physical_devices(computeType)
+            tensorflow.config.experimental.set_memory_growth(physical_devices[0], enable=True)
+            print(f"Loaded {computeType} config")
+    except BaseException as ErrorContext:
+        pprint.pprint(ErrorContext)
+        pprint.pprint(whoami())
+    print("------------------------------------------------------------------------------------------")
+    return
+
+
 def main(options):
     ##############################################
     # Main
@@ -198,10 +365,12 @@ def main(options):
     export PYTHONPATH=${PYTHONPATH}:${RAADPATH}
     """
     raadImportBase = os.path.dirname(os.path.abspath(__file__))
+    if options.rescan:
+        discoveryIndex.defaultIndex().rescan()
     if options.debug:
         print("\nAdding basepath...")
         pprint.pprint(raadImportBase)
-    findAll(fileType=".py", directoryTreeRootNode=None, debug=options.debug, doIt=True, verbose=options.more)
+    raad_findAll(directoryTreeRootNode=None, debug=options.debug, verbose=options.more)
 
     # Add TWIDL
     if options.debug:
@@ -210,7 +379,7 @@ def main(options):
         options.twidlPath = twidl_active_path
     importTWIDLPath = tryFolderDetect(cPath=options.twidlPath)
     osPath = raad_importTWIDL(debug=options.debug, twidlPath=importTWIDLPath)
-    findAll(fileType=".py", directoryTreeRootNode=osPath, debug=options.debug, doIt=True, verbose=options.more)
+    raad_findAll(directoryTreeRootNode=osPath, debug=options.debug, verbose=options.more)
     if options.debug:
         print("OSPATH:{}".format(osPath))
 
@@ -219,42 +388,15 @@ def main(options):
         print("\nAdding AutoParser...")
     importAutoParsePath = tryFolderDetect(cPath=options.autoParsePath)
     osPath = raad_importAutoParser(autoParsePath=importAutoParsePath, deviceType=options.deviceType)
-    findAll(fileType=".py", directoryTreeRootNode=osPath, debug=options.debug, doIt=True, verbose=options.more)
+    raad_findAll(directoryTreeRootNode=osPath, debug=options.debug, verbose=options.more)
     if options.debug:
         print("OSPATH:{}".format(osPath))
 
-    print("------------------------------------------------------------------------------------------")
-    print("CPU, GPU, and attached compute device detection...")
-    print("------------------------------------------------------------------------------------------")
-    try:
-        tensorflowVersion = tensorflow.version.VERSION
-        vList = tensorflowVersion.split('.')
-        bMajorVersion = int(vList[0]) == 2
-        bMinorVersion = int(vList[1]) >= 4
-        bMinorSubVersion = int(vList[2]) >= 0
-        tensorFlowVersionValid = bMajorVersion and bMinorVersion and bMinorSubVersion
-        if tensorFlowVersionValid:
-            from tensorflow.python.client.device_lib import list_local_devices
-            allDevices = list_local_devices()
-            pprint.pprint(f"All devices are {allDevices}")
-            from tensorflow._api.v2.config.experimental import list_physical_devices
-            foundCPUs = len(list_physical_devices('CPU'))
-            foundGPUs = len(list_physical_devices('GPU'))
-            from tensorflow._api.v2.test import is_gpu_available
-            isGPUReady = is_gpu_available(cuda_only=True)
-            print(f"* Num CPUs Available: {foundCPUs}")
-            print(f"# Num GPUs Available: {foundGPUs} and GPU CUDA driver ready status is {isGPUReady}")
-            if foundGPUs > 0:
-                computeType = 'GPU'
-            else:
-                computeType = 'CPU'
-            physical_devices = list_physical_devices(computeType)
-            tensorflow.config.experimental.set_memory_growth(physical_devices[0], enable=True)
-            print(f"Loaded {computeType} config")
-    except BaseException as ErrorContext:
-        pprint.pprint(ErrorContext)
-        pprint.pprint(whoami())
-    print("------------------------------------------------------------------------------------------")
+    if options.detectDevices or options.mode not in ('autoModuleAPI', 'JIRACluster'):
+        detectComputeDevices()
+    else:
+        # Batch modes skip loading tensorflow here, the ML phases still get GPU memory growth when they load it
+        os.environ.setdefault('TF_FORCE_GPU_ALLOW_GROWTH', 'true')
 
     if options.mode == 'autoModuleAPI':
         import src.software.autoModuleAPI
@@ -291,6 +433,10 @@ def mainFaultContext():
     parser.add_option("--device", dest='deviceType', default=pTokenADP, help=f"Device types are [{pTokenADP}, {pTokenCDR}].")
     parser.add_option("--autoParsePath", dest='autoParsePath', default=os.path.join('Auto-Parse', 'decode'), help="Auto Parser Path.")
     parser.add_option("--faultSave", dest='faultSave', default=False, help="Enable fault context save for debug.")
+    parser.add_option("--detectDevices", action='store_true', dest='detectDevices', default=False,
+                      help="Load tensorflow to detect the compute devices in the autoModuleAPI and JIRACluster modes, the GUI always does.")
+    parser.add_option("--rescan", action='store_true', dest='rescan', default=False,
+                      help="Clear the discovery index and search the auto parser, TWIDL and system path folders again.")
     (options, args) = parser.parse_args()
 
     if options.faultSave:
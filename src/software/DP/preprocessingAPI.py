@@ -5,9 +5,11 @@
 # *****************************************************************************/
 import json, os, sys, re, datetime, pprint, csv, ast
 import numpy as np
-import scipy.signal as sp
 import pandas as pd
-import src.software.mp.matrixProfile as mp
+import src.software.mp.batchProfile as batchProfile
+import src.software.mp.cache as profileCache
+import src.software.mp.multidimensional as multidimensional
+import src.software.DP.timeSeriesStore as timeSeriesStore
 from src.software.utilsCommon import getDateTimeFileFormatString
 
 if sys.version_info.major > 2:
@@ -163,7 +165,6 @@ class preprocessingAPI(object):
             Dictionary with the object values from the ConfigParser
 
         """
-        digits = re.compile("\d+")
         sections = config.sections()
         resultDict = {}
         if debug is True:
@@ -176,16 +177,7 @@ class preprocessingAPI(object):
                 if option == 'name' or option == 'ref' or option == 'uid':
                     subdict[option] = value
                 else:
-                    elemList = digits.findall(value)
-                    finalList = list(map(int, elemList))
-                    tempList = value.split(",")
-                    if not finalList or len(finalList) != len(tempList):
-                        newLine = value.replace("[", "")
-                        newLine = newLine.replace("]", "")
-                        newLine = newLine.replace("\'", "")
-                        finalList = newLine.split(",")
-                        finalList = list(map(lambda x: x.strip(), finalList))
-                    subdict[option] = finalList
+                    subdict[option] = timeSeriesStore.parseConfigValue(value)
             resultDict[section] = subdict
         return resultDict
 
@@ -360,71 +352,180 @@ class preprocessingAPI(object):
                     pass
         return
 
-    def loadDataDict(self, configFilePath, debugStatus=False):
+    def loadDataDict(self, configFilePath, debugStatus=False, asArrays=False):
         """
-        function for loading all datas from a the configuration file into a dictionary
+        function for loading all datas from a the configuration file into a dictionary. The values come from the binary
+        time series store kept next to the .ini file, which is built on the first load and whenever the .ini changes.
 
         Args:
-            configFilePath: String for the file path containing the .ini file to be processed
+            configFilePath: String for the file path containing the .ini file, or the .tss store, to be processed
             debugStatus: Boolean flag to activate debug statements
+            asArrays: Boolean flag, True for read only memory mapped arrays of the numeric fields instead of lists
 
         Returns:
             intermediateDict: Dictionary containing all the timeseries data
 
         """
-        config = self.readFileIntoConfig(configFilePath)
-        intermediateDict = self.loadConfigIntoDict(config, debugStatus)
+        intermediateDict = timeSeriesStore.loadTimeSeries(configFilePath, asLists=not asArrays, debug=debugStatus)
 
         return intermediateDict
 
-    def populateMPStruct(self, MP, subdict, object_t, subSeqLen):
+    @staticmethod
+    def _isTextField(values):
+        """
+        function for determining whether a field holds text labels rather than numbers
+
+        Args:
+            values: List of the field values
+
+        Returns:
+            Boolean flag, True when the first value is a string containing letters
+
+        """
+        return isinstance(values[0], str) and values[0].lower().islower()
+
+    def populateMPStruct(self, MP, subdict, object_t, subSeqLen, n_threads=None):
         """
         function for generating the dictionary with the matrix profile values for the time-series
 
         Args:
-            MP: Dictionary where all the data lists will be stored
+            MP: Dictionary where all the data arrays will be stored
             subdict: Dictionary where the unprocessed data lists are contained
             object_t: String for the name of the object for which we are extracting the matrix profiles (ex. uid-6)
             subSeqLen: Integer for the window size to be used in the matrix profile generation
+            n_threads: Number of processes for the matrix profiles, None for single process and -1 for all cores
 
         Returns:
 
         """
-        MP[object_t] = {}
+        self.generateMP({object_t: subdict}, subSeqLen=subSeqLen, n_threads=n_threads, MP=MP)
 
-        for column in subdict.keys():
-            if type(subdict[column][0]) is int:
-                arr = sp.resample(subdict[column], len(subdict[column]))
-                arr = np.random.normal(arr, np.finfo(float).eps)
-                MP[object_t][column] = mp.stomp(arr, subSeqLen)[0].tolist()
-                continue
+    def generateMP(self, dataDict, subSeqLen=20, debugStatus=False, n_threads=None, MP=None, cache=True):
+        """
+        function for generating a matrix profile for multiple time series contained in dataDict. Numeric fields of equal
+        length, across all objects, are computed together by the batched STOMP engine; text fields are copied as is.
+        Constant fields are skipped and get a profile of zeros. Profiles of fields seen before come from the on disk
+        matrix profile cache.
+
+        Args:
+            debugStatus:
+            dataDict: Dictionary containing all the time-series data
+            subSeqLen: Integer value for the length of the sliding window to be used to generate the matrix profile
+            n_threads: Number of processes for the matrix profiles, None for single process and -1 for all cores
+            MP: Optional dictionary to populate, a new one is created by default
+            cache: True for the default matrix profile cache, a mp.cache.ProfileCache, or False to always compute
+
+        Returns:
+            MP: Dictionary containing all the data for the matrix profiles, as numpy arrays, associated with the given
+                fields of the specified objects
+
+        """
+        if MP is None:
+            MP = {}
+        if cache is True:
+            cache = profileCache.defaultCache()
+        if debugStatus is True:
+            print("Generating MP...")
 
-            elif subdict[column][0].lower().islower():
-                MP[object_t][column] = subdict[column]
+        # Group the numeric fields by length so each group is one batch.
+        batches = {}
+        for object_t in dataDict.keys():
+            subdict = dataDict[object_t]
+            MP[object_t] = {}
+            for column in subdict.keys():
+                if self._isTextField(subdict[column]):
+                    MP[object_t][column] = subdict[column]
+                    continue
+                MP[object_t][column] = None  # Keeps the field order, filled in by the batch.
+                batches.setdefault(len(subdict[column]), []).append((object_t, column))
+
+        for length, keys in batches.items():
+            fields = np.array([dataDict[object_t][column] for object_t, column in keys], dtype=float)
+            missing = list(range(len(keys)))
+            if cache:
+                cacheKeys = [cache.key(field, subSeqLen, 'stompBatch') for field in fields]
+                missing = []
+                for row, (object_t, column) in enumerate(keys):
+                    cached = cache.load(cacheKeys[row])
+                    if cached is None:
+                        missing.append(row)
+                    else:
+                        MP[object_t][column] = cached[0]
+            if debugStatus is True:
+                print("Generating MP of {0} fields with {1} points, {2} cached...".format(len(keys), length,
+                                                                                       len(keys) - len(missing)))
+            if len(missing) == 0:
                 continue
-            else:
-                arr = sp.resample(subdict[column], len(subdict[column]))
-                arr = np.random.normal(arr, np.finfo(float).eps)
-                MP[object_t][column] = mp.stomp(arr, subSeqLen)[0].tolist()
 
-    def generateMP(self, dataDict, subSeqLen=20, debugStatus=False):
+            profiles, indices = batchProfile.stompBatch(fields[missing], subSeqLen, n_threads=n_threads)
+            for row, profile, index in zip(missing, profiles, indices):
+                object_t, column = keys[row]
+                MP[object_t][column] = profile
+                if cache:
+                    cache.store(cacheKeys[row], profile, index, evict=False)
+            if cache:
+                cache.evict()
+        return MP
+
+    @staticmethod
+    def _nameDimensions(sets, columns):
         """
-        function for generating a matrix profile for multiple time series contained in dataDict
+        function for replacing the dimension numbers of motif or discord sets by the field names
+
+        Args:
+            sets: List per dimensionality of (index, neighbor, distance, dimensions) tuples
+            columns: List of the field names, in dimension order
+
+        Returns:
+            List per dimensionality of (index, neighbor, distance, fields) tuples
+
+        """
+        return [[(index, neighbor, distance, [columns[dimension] for dimension in dimensions])
+                 for index, neighbor, distance, dimensions in found] for found in sets]
+
+    def generateMultidimensionalMP(self, dataDict, subSeqLen=20, fields=None, maxSets=3, debugStatus=False):
+        """
+        function for generating the multidimensional (mSTAMP) matrix profile of every object, analysing its numeric
+        fields jointly. Constant fields are left out since they match everywhere, and when the fields differ in length
+        the most common length is used.
 
         Args:
-            debugStatus:
             dataDict: Dictionary containing all the time-series data
             subSeqLen: Integer value for the length of the sliding window to be used to generate the matrix profile
+            fields: Optional list of the fields to analyse, all numeric fields by default
+            maxSets: Integer for the number of motifs and discords reported per dimensionality
+            debugStatus: Boolean flag to activate debug statements
 
         Returns:
-            MP: Dictionary containing all the data for the matrix profiles associated with the given fields of the
-                specified objects
+            MP: Dictionary with, for each object with at least one usable field, the 'fields' analysed, the 'profile'
+                and 'index' arrays (row k - 1 uses the best k fields) and the 'motifs' and 'discords' per dimensionality
+                as lists of (index, neighbor, distance, fields)
 
         """
         MP = {}
-        if debugStatus is True:
-            print("Generating MP...")
         for object_t in dataDict.keys():
             subdict = dataDict[object_t]
-            self.populateMPStruct(MP, subdict, object_t, subSeqLen)
+            columns = [column for column in (subdict.keys() if fields is None else fields)
+                       if column in subdict and len(subdict[column]) > subSeqLen
+                       and not self._isTextField(subdict[column])]
+            if len(columns) == 0:
+                continue
+            lengths = [len(subdict[column]) for column in columns]
+            length = max(set(lengths), key=lengths.count)
+            columns = [column for column in columns if len(subdict[column]) == length]
+            data = np.array([subdict[column] for column in columns], dtype=float)
+            usable = np.flatnonzero(np.ptp(data, axis=1) > 0)
+            if len(usable) == 0:
+                continue
+            columns = [columns[row] for row in usable]
+            data = data[usable]
+            if debugStatus is True:
+                print("Generating mSTAMP of {0} with {1} fields...".format(object_t, len(columns)))
+
+            profile, index = multidimensional.mstomp(data, subSeqLen)
+            motifs = multidimensional.motifSets(data, subSeqLen, profile, index, max_motifs=maxSets)
+            discords = multidimensional.discordSets(data, subSeqLen, profile, index, max_discords=maxSets)
+            MP[object_t] = {'fields': columns, 'profile': profile, 'index': index,
+                            'motifs': self._nameDimensions(motifs, columns),
+                            'discords': self._nameDimensions(discords, columns)}
         return MP
@@ -0,0 +1,367 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Daniel Garces, Joseph Tarango
+# *****************************************************************************/
+"""
+Binary columnar store of the per object, per field time series otherwise kept in the time-series.ini file.
+
+A store is a single file: a fixed header, one int64 block holding every numeric column back to back, the UTF-8 bytes
+of the text values with their offsets, and a JSON schema at the end describing each object's fields. The numeric block
+is loaded as a memory map, so loading a store costs a JSON parse instead of the regex parsing of the INI values.
+
+The store written next to an INI file (time-series.ini -> time-series.tss) records the size and modification time of
+the INI it was built from and is only used while they match.
+"""
+import json, os, re, struct, sys
+import numpy as np
+
+if sys.version_info.major > 2:
+    import configparser as cF
+else:
+    import ConfigParser as cF  # @todo python 2 variant
+
+STORE_EXTENSION = '.tss'
+STORE_VERSION = 1
+STORE_MAGIC = b'TSSTORE1'
+STORE_HEADER = struct.Struct('<8sQ')  # Magic, schema offset
+STORE_DATA_OFFSET = 64
+
+# Options kept as plain strings by preprocessingAPI.loadConfigIntoDict
+SCALAR_OPTIONS = ('name', 'ref', 'uid')
+
+_digitsPattern = re.compile(r"\d+")
+_int64Range = (-(1 << 63), (1 << 63) - 1)
+
+
+def storePath(configFilePath):
+    """
+    function for getting the path of the store kept next to a time series INI file
+
+    Args:
+        configFilePath: String of the path name for the INI file
+
+    Returns:
+        String of the path name for the store
+    """
+    return os.path.splitext(configFilePath)[0] + STORE_EXTENSION
+
+
+def isStorePath(path):
+    """
+    function for determining whether a path names a store rather than an INI file
+
+    Args:
+        path: String of the path name
+
+    Returns:
+        Boolean flag, True when the file starts with the store magic
+    """
+    try:
+        with open(path, 'rb') as storeFile:
+            return storeFile.read(len(STORE_MAGIC)) == STORE_MAGIC
+    except (OSError, IOError):
+        return False
+
+
+def _sourceStamp(sourcePath):
+    """
+    function for getting the size and modification time recorded for the source INI file of a store
+    """
+    sourceStat = os.stat(sourcePath)
+    return {'size': sourceStat.st_size, 'mtime_ns': sourceStat.st_mtime_ns}
+
+
+def parseConfigValue(value):
+    """
+    function for converting the string of a field in the INI file into its list of values: integers when every comma
+    separated element holds exactly one number, the stripped text of the elements otherwise
+
+    Args:
+        value: String of the field as written in the INI file
+
+    Returns:
+        List of the field values
+    """
+    finalList = list(map(int, _digitsPattern.findall(value)))
+    tempList = value.split(",")
+    if not finalList or len(finalList) != len(tempList):
+        newLine = value.replace("[", "")
+        newLine = newLine.replace("]", "")
+        newLine = newLine.replace("\'", "")
+        finalList = newLine.split(",")
+        finalList = list(map(lambda x: x.strip(), finalList))
+    return finalList
+
+
+def _column(values):
+    """
+    function for typing the values of a field the way they are read back from the INI file. Integers beyond the int64
+    range are kept as text and converted back on load.
+
+    Args:
+        values: Field value, usually a list
+
+    Returns:
+        Tuple of the kind ('int', 'bigint' or 'text') and the list of typed values
+    """
+    values = parseConfigValue(str(values).strip())
+    if len(values) > 0 and isinstance(values[0], int):
+        if min(values) < _int64Range[0] or max(values) > _int64Range[1]:
+            return 'bigint', [str(value) for value in values]
+        return 'int', values
+    return 'text', values
+
+
+def writeStore(resultDict, path, sourcePath=None, ordered=False):
+    """
+    function for writing the time series dictionary into a store, the file is written to a temporary name and renamed.
+    The values are stored as preprocessingAPI.loadConfigIntoDict reads them back from the INI file of the dictionary. A
+    dictionary not read from an INI file goes through a ConfigParser first, so the values that
+    preprocessingAPI.loadDictIntoConfig drops (e.g. a '%' rejected by the interpolation) are left out and the escaped
+    ones ('%%') are unescaped, as in the INI file.
+
+    Args:
+        resultDict: Dictionary of objects (uid-#) to dictionaries of fields, as built by formatTSFiles or returned by
+                    preprocessingAPI.loadConfigIntoDict
+        path: String of the path name for the store
+        sourcePath: String of the path name for the INI file the store stands for, or None
+        ordered: Boolean flag, True to keep the order of resultDict (already read from an INI file) instead of the
+                 sorted order preprocessingAPI.loadDictIntoConfig writes
+
+    Returns:
+        Dictionary of the schema written
+    """
+    objects = {}
+    intColumns = []
+    intCount = 0
+    textValues = []
+    validator = None if ordered else cF.ConfigParser()
+    for section in (list(resultDict.keys()) if ordered else sorted(resultDict.keys())):
+        subdict = resultDict[section]
+        fields = {}
+        if validator is not None:
+            validator.add_section(section)
+        # Option names are case insensitive in the INI file, the last one in sorted order wins
+        for option in (list(subdict.keys()) if ordered else sorted(subdict.keys())):
+            optionName = str(option).lower()
+            value = subdict[option]
+            if validator is not None:
+                try:
+                    validator.set(section, option, str(value))
+                    value = validator.get(section, option)
+                except Exception:
+                    continue
+            if optionName in SCALAR_OPTIONS:
+                fields[optionName] = {'kind': 'scalar', 'value': str(value).strip()}
+                continue
+            kind, values = _column(value)
+            if kind == 'int':
+                fields[optionName] = {'kind': kind, 'start': intCount, 'length': len(values)}
+                intColumns.append(values)
+                intCount += len(values)
+            else:
+                fields[optionName] = {'kind': kind, 'start': len(textValues), 'length': len(values)}
+                textValues.extend(values)
+        objects[str(section)] = fields
+        if validator is not None:
+            validator.remove_section(section)
+
+    intBlock = np.fromiter((value for values in intColumns for value in values), dtype='<i8', count=intCount)
+    textBytes = [value.encode('utf-8') for value in textValues]
+    textOffsets = np.zeros(len(textBytes) + 1, dtype='<i8')
+    np.cumsum([len(value) for value in textBytes], out=textOffsets[1:])
+
+    schema = {'version': STORE_VERSION,
+              'source': None if sourcePath is None else _sourceStamp(sourcePath),
+              'intOffset': STORE_DATA_OFFSET,
+              'intCount': intCount,
+              'textOffsetsOffset': STORE_DATA_OFFSET + intBlock.nbytes,
+              'textCount': len(textBytes),
+              'textOffset': STORE_DATA_OFFSET + intBlock.nbytes + textOffsets.nbytes,
+              'textBytes': int(textOffsets[-1]),
+              'objects': objects}
+    schemaOffset = schema['textOffset'] + schema['textBytes']
+
+    temporary = '{0}.{1}.tmp'.format(path, os.getpid())
+    try:
+        with open(temporary, 'wb') as storeFile:
+            storeFile.write(STORE_HEADER.pack(STORE_MAGIC, schemaOffset).ljust(STORE_DATA_OFFSET, b'\0'))
+            storeFile.write(intBlock.tobytes())
+            storeFile.write(textOffsets.tobytes())
+            storeFile.write(b''.join(textBytes))
+            storeFile.write(json.dumps(schema).encode('utf-8'))
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return schema
+
+
+class TimeSeriesStore(object):
+    """
+    Reader of a store file
+    """
+
+    def __init__(self, path):
+        """
+        function for opening a store and reading its schema
+
+        Args:
+            path: String of the path name for the store
+        """
+        self.path = path
+        with open(path, 'rb') as storeFile:
+            header = storeFile.read(STORE_HEADER.size)
+            if len(header) < STORE_HEADER.size:
+                raise ValueError("Truncated time series store: " + path)
+            magic, schemaOffset = STORE_HEADER.unpack(header)
+            if magic != STORE_MAGIC:
+                raise ValueError("Not a time series store: " + path)
+            storeFile.seek(schemaOffset)
+            self.schema = json.loads(storeFile.read().decode('utf-8'))
+        if self.schema.get('version') != STORE_VERSION:
+            raise ValueError("Unsupported time series store version: " + str(self.schema.get('version')))
+
+    def isFresh(self, sourcePath):
+        """
+        function for determining whether the store still stands for its source INI file
+
+        Args:
+            sourcePath: String of the path name for the INI file
+
+        Returns:
+            Boolean flag, True when the INI file size and modification time match the ones recorded in the store
+        """
+        try:
+            return self.schema['source'] is not None and self.schema['source'] == _sourceStamp(sourcePath)
+        except OSError:
+            return False
+
+    def _intBlock(self):
+        if self.schema['intCount'] == 0:
+            return np.zeros(0, dtype='<i8')
+        return np.memmap(self.path, dtype='<i8', mode='r', offset=self.schema['intOffset'],
+                         shape=(self.schema['intCount'],))
+
+    def _textValues(self):
+        if self.schema['textCount'] == 0:
+            return []
+        with open(self.path, 'rb') as storeFile:
+            storeFile.seek(self.schema['textOffsetsOffset'])
+            textOffsets = np.frombuffer(storeFile.read(8 * (self.schema['textCount'] + 1)), dtype='<i8').tolist()
+            storeFile.seek(self.schema['textOffset'])
+            textData = storeFile.read(self.schema['textBytes'])
+        return [textData[start:stop].decode('utf-8') for start, stop in zip(textOffsets[:-1], textOffsets[1:])]
+
+    def load(self, asLists=True, objects=None):
+        """
+        function for loading the store into the dictionary layout of preprocessingAPI.loadConfigIntoDict
+
+        Args:
+            asLists: Boolean flag, True for lists of values like the INI parsing, False for read only memory mapped int64
+                     arrays for the numeric fields
+            objects: Optional list of the objects (uid-#) to load, all by default
+
+        Returns:
+            Dictionary of objects to dictionaries of fields
+        """
+        intBlock = self._intBlock()
+        textValues = self._textValues()
+        resultDict = {}
+        for section, fields in self.schema['objects'].items():
+            if objects is not None and section not in objects:
+                continue
+            subdict = {}
+            for option, field in fields.items():
+                if field['kind'] == 'scalar':
+                    subdict[option] = field['value']
+                elif field['kind'] == 'int':
+                    column = intBlock[field['start']:field['start'] + field['length']]
+                    subdict[option] = column.tolist() if asLists else column
+                elif field['kind'] == 'bigint':
+                    subdict[option] = [int(value) for value in textValues[field['start']:field['start'] + field['length']]]
+                else:
+                    subdict[option] = textValues[field['start']:field['start'] + field['length']]
+            resultDict[section] = subdict
+        return resultDict
+
+
+def importINI(configFilePath, path=None, debug=False):
+    """
+    function for converting a time series INI file into a store
+
+    Args:
+        configFilePath: String of the path name for the INI file
+        path: String of the path name for the store, next to the INI file by default
+        debug: Boolean flag to activate debug statements
+
+    Returns:
+        Dictionary with the object values of the INI file
+    """
+    from src.software.DP.preprocessingAPI import preprocessingAPI
+    config = preprocessingAPI.readFileIntoConfig(configFilePath)
+    resultDict = preprocessingAPI.loadConfigIntoDict(config, debug)
+    writeStore(resultDict, storePath(configFilePath) if path is None else path, sourcePath=configFilePath, ordered=True)
+    return resultDict
+
+
+def exportINI(path, configFilePath):
+    """
+    function for writing a store back into the time series INI format. Loading the INI file gives the same dictionary as
+    the store, but the file is not a byte for byte copy of the INI the store was built from: the sections and options
+    are written in sorted order, option names in lower case and every field in the list format of
+    preprocessingAPI.loadDictIntoConfig, e.g. ['a', 'b'] for text values that were written as a, b.
+
+    Args:
+        path: String of the path name for the store
+        configFilePath: String of the path name for the INI file to write
+
+    Returns:
+        Dictionary with the object values of the store
+    """
+    from src.software.DP.preprocessingAPI import preprocessingAPI
+    resultDict = TimeSeriesStore(path).load(asLists=True)
+    config = cF.ConfigParser()
+    preprocessingAPI.loadDictIntoConfig(config, resultDict)
+    with open(configFilePath, 'w') as configFile:
+        config.write(configFile)
+    return resultDict
+
+
+def loadTimeSeries(path, asLists=True, debug=False):
+    """
+    function for loading a time series from a store, or from an INI file through the store kept next to it. The store
+    is built on the first load of an INI file, or rebuilt when the INI file changed.
+
+    Args:
+        path: String of the path name for the store or the INI file
+        asLists: Boolean flag, False for memory mapped arrays of the numeric fields (see TimeSeriesStore.load)
+        debug: Boolean flag to activate debug statements
+
+    Returns:
+        Dictionary of objects to dictionaries of fields
+    """
+    if isStorePath(path):
+        return TimeSeriesStore(path).load(asLists=asLists)
+
+    siblingPath = storePath(path)
+    if os.path.exists(siblingPath):
+        try:
+            store = TimeSeriesStore(siblingPath)
+            if store.isFresh(path):
+                if debug is True:
+                    print("Loading time series store " + siblingPath)
+                return store.load(asLists=asLists)
+        except (OSError, ValueError):
+            pass
+
+    try:
+        resultDict = importINI(path, siblingPath, debug)
+    except OSError:
+        # Read only location, parse the INI file every time.
+        from src.software.DP.preprocessingAPI import preprocessingAPI
+        return preprocessingAPI.loadConfigIntoDict(preprocessingAPI.readFileIntoConfig(path), debug)
+    if asLists:
+        return resultDict
+    return TimeSeriesStore(siblingPath).load(asLists=False)
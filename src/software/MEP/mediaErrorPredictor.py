@@ -109,7 +109,7 @@ class MediaErrorPredictor(object):
         self.dataDict = DP.preprocessingAPI().loadDataDict(inputFile, debug)
         self.matrixProfileFlag = matrixProfile
         if isinstance(matrixProfile, bool) and matrixProfile is True:
-            self.MPDict = DP.preprocessingAPI.generateMP(self.dataDict, subSeqLen)
+            self.MPDict = DP.preprocessingAPI().generateMP(self.dataDict, subSeqLen=subSeqLen)
         else:
             self.MPDict = None
         self.isStationary = False
@@ -117,7 +117,7 @@ class MediaErrorPredictor(object):
     def setMatrixProfileFlag(self, value, subSeqLen=20):
         if value:
             if self.MPDict is None:
-                self.MPDict = DP.preprocessingAPI.generateMP(self.dataDict, subSeqLen)
+                self.MPDict = DP.preprocessingAPI().generateMP(self.dataDict, subSeqLen=subSeqLen)
         self.matrixProfileFlag = value
 
     def check_stationarity(self, timeseriesCandidate):
@@ -1312,8 +1312,7 @@ class DefragHistoryGrapher(object):
             Dictionary containing all the time-series data with the appropriate nesting according to the fields
 
         """
-        config = DP.preprocessingAPI.readFileIntoConfig(input_t)
-        intermediateDict = DP.preprocessingAPI.loadConfigIntoDict(config, self.debug)
+        intermediateDict = DP.preprocessingAPI().loadDataDict(input_t, self.debug)
         resultDict = DP.preprocessingAPI.transformDict(intermediateDict, self.debug)
         return resultDict
 
@@ -34,6 +34,7 @@ sys.path.append('raad/src/software/parse')
 import src.software.parse.pacmanIC
 import src.software.TSV.utilityTSV
 import src.software.DP.preprocessingAPI as DP
+import src.software.DP.timeSeriesStore as timeSeriesStore
 
 if sys.version_info.major > 2:
     import configparser as cF
@@ -50,6 +51,10 @@ class formatTSFiles(object):
 
         """
         debug = False
+        # Line shapes of the plain text files, compiled once for every file processed
+        textPattern = re.compile("[A-Z,a-z]")
+        objectPattern = re.compile("([A-Z,a-z]*):")
+        stopMarker = "#########"
 
         def __init__(self, debug=False):
             """
@@ -165,10 +170,9 @@ class formatTSFiles(object):
                 Tuple of a boolean flag to indicate if the next object is valid the next object's sub-directory of fields
 
             """
-            objectPattern = re.compile("([A-Z,a-z]*):")
             flag = objectFound
 
-            match = objectPattern.search(line)
+            match = self.objectPattern.search(line)
             if match is not None:
                 find = match.group(1)
                 currentObj = find.replace(":", "")
@@ -190,7 +194,7 @@ class formatTSFiles(object):
 
             return flag, subdict
 
-        def _processObjectContentAutoParsers(self, line, subdict, currentHeaders):
+        def _processObjectContentAutoParsers(self, line, subdict, currentHeaders, headerPrefix=None):
             """
             function for parsing an object's content into the general dictionary
 
@@ -198,20 +202,23 @@ class formatTSFiles(object):
                 line: Raw String representation for the line to be processed
                 subdict: Dictionary for the fields contained in the current object to be processed)
                 currentHeaders: Dictionary containing the corresponding level headers
+                headerPrefix: String of the joined headers returned by the previous call, None when the headers changed
 
             Returns:
+                String of the joined headers for the next call
 
             """
-
-            indentNum = int((len(line) - len(line.lstrip())) / 4)
-            processedLine = line.strip()
-            processedLine = processedLine.split(":")
+            processedLine = line.strip().split(":")
             if len(processedLine) == 1:
-                return
-            elif processedLine[1] == "":
+                return headerPrefix
+            indentNum = int((len(line) - len(line.lstrip())) / 4)
+            if processedLine[1] == "":
                 headerValue = processedLine[0].strip()
                 currentHeaders[indentNum] = headerValue
+                return None
             else:
+                if indentNum < len(currentHeaders):
+                    headerPrefix = None
                 for i in range(indentNum, len(currentHeaders)):
                     if indentNum in currentHeaders:
                         try:
@@ -222,20 +229,20 @@ class formatTSFiles(object):
                     elif self.debug:
                         print(f"Error in {__file__} @{sys._getframe().f_lineno}")
                         print("Error objects: ", pprint.pformat(indentNum), pprint.pformat(currentHeaders))
-                fieldName = ""
-                for key in sorted(currentHeaders.keys()):
-                    fieldName = fieldName + currentHeaders[key] + "."
-                fieldName = fieldName + processedLine[0].strip()
+                if headerPrefix is None:
+                    headerPrefix = "".join([currentHeaders[key] + "." for key in sorted(currentHeaders.keys())])
+                fieldName = headerPrefix + processedLine[0].strip()
                 value = processedLine[1].strip()
                 if fieldName in subdict:
                     subdict[fieldName].append(value)
                 else:
                     subdict[fieldName] = [value]
-            return
+            return headerPrefix
 
         def _processObjects(self, openFile, resultDict, obj=None, mode=1, processAll=False):
             """
-            function that extracts the telemetry objects into a dictionary to be transferred to the ConfigParser
+            function that extracts the telemetry objects into a dictionary to be transferred to the ConfigParser. The file is
+            read line by line in a single pass instead of being loaded whole.
 
             Args:
                 openFile: File descriptor for the open file
@@ -247,43 +254,45 @@ class formatTSFiles(object):
             Returns:
 
             """
-            textPattern = re.compile("[A-Z,a-z]")
-            stopPattern = re.compile("#########")
+            textPattern = self.textPattern
+            stopMarker = self.stopMarker
             subdict = {}
             currentHeaders = {}
+            headerPrefix = None
             objectFound = False
             currentName = ""
             currentObject = ""
-            lines = openFile.readlines()
 
             if obj is None:
                 obj = []
+            objectSelected = currentObject in obj or processAll
 
-            for line in lines:
-                if not textPattern.findall(line) or stopPattern.findall(line):
+            for line in openFile:
+                if textPattern.search(line) is None or stopMarker in line:
                     if objectFound:
                         objectFound = False
                     continue
 
                 l = line.strip()
-                match = re.search(",", line)
 
-                if match is None:
-                    l = l.split()
-                else:
+                if "," in line:
                     l = l.split(",")
+                else:
+                    l = l.split()
 
                 if len(l) == 8:
                     currentName, subdict, currentObject = self._processObjectSignature(l, resultDict, obj, processAll)
                     currentHeaders = {}
+                    headerPrefix = None
+                    objectSelected = currentObject in obj or processAll
                     continue
 
                 if mode == 1:
                     objectFound, subdict = self._processObjectContentBuffDict(line, l, resultDict, subdict, currentName,
                                                                               objectFound, obj, processAll)
                 elif mode == 2:
-                    if currentObject in obj or processAll:
-                        self._processObjectContentAutoParsers(line, subdict, currentHeaders)
+                    if objectSelected:
+                        headerPrefix = self._processObjectContentAutoParsers(line, subdict, currentHeaders, headerPrefix)
             return
 
         def processTextFile(self, openFile, resultDict, obj=None, mode=1):
@@ -501,6 +510,9 @@ class formatTSFiles(object):
             config.write(configfile)
             configfile.close()
 
+        # Binary columnar copy of the time series, loaded instead of parsing the ini file
+        timeSeriesStore.writeStore(resultDict, timeSeriesStore.storePath(outfile), sourcePath=outfile)
+
         csvFileName = outfile.replace('.ini', '.csv')
         with open(csvFileName, 'w', newline='') as csvfile:
             telemetryWriter = csv.writer(csvfile, delimiter='\t', quotechar='|', quoting=csv.QUOTE_MINIMAL)
@@ -39,6 +39,7 @@ import numpy as np
 import matplotlib.backends.backend_pdf as be
 import matplotlib.pyplot as plt
 import src.software.mp.matrixProfile as mp
+import src.software.mp.cache as profileCache
 import src.software.DP.preprocessingAPI as DP
 from src.software.debug import whoami
 from src.software.threadModuleAPI import MassiveParallelismSingleFunctionManyParameters
@@ -109,6 +110,22 @@ class visualizeTS(object):
         """
         self.debug = debug
 
+    @staticmethod
+    def cachedStomp(arr, subSeqLen):
+        """
+        function for computing the matrix profile of a resampled series through the on disk matrix profile cache
+
+        Args:
+            arr: Resampled time series, the cache key is computed before the noise is added
+            subSeqLen: Integer for the window size to be used in the matrix profile generation
+
+        Returns:
+            Tuple (mp, mpIndex)
+
+        """
+        return profileCache.defaultCache().profile(
+            arr, subSeqLen, 'stomp', lambda: mp.stomp(np.random.normal(arr, np.finfo(float).eps), subSeqLen))
+
     def populateMPStruct(self, MP, subdict, object_t, subSeqLen, fields, visualizeAllFields):
         """
         function for generating the dictionary with the matrix profile values for the time-series
@@ -131,19 +148,42 @@ class visualizeTS(object):
                     MP[object_t][column] = subdict[column]
                     continue
                 arr = sp.resample(subdict[column], len(subdict[column]))
-                arr = np.random.normal(arr, np.finfo(float).eps)
                 if self.debug is True:
                     print("Normalized array: " + str(arr))
-                MP[object_t][column] = mp.stomp(arr, subSeqLen)[0].tolist()
+                MP[object_t][column] = self.cachedStomp(arr, subSeqLen)[0].tolist()
         else:
             for column in fields:
                 arr = sp.resample(subdict[column], len(subdict[column]))
-                arr = np.random.normal(arr, np.finfo(float).eps)
                 if self.debug is True:
                     print("Normalized array: " + str(arr))
-                MP[object_t][column] = mp.stomp(arr, subSeqLen)[0].tolist()
+                MP[object_t][column] = self.cachedStomp(arr, subSeqLen)[0].tolist()
+
+    def populateMultidimensionalMP(self, MP, subdict, object_t, subSeqLen, fields, visualizeAllFields):
+        """
+        function for adding the multidimensional (mSTAMP) matrix profiles of an object to the dictionary, as the fields
+        'mSTAMP-kD' holding the profile over the best k fields
+
+        Args:
+            MP: Dictionary where all the data lists will be stored
+            subdict: Dictionary where the unprocessed data lists are contained
+            object_t: String for the name of the object for which we are extracting the matrix profiles (ex. uid-6)
+            subSeqLen: Integer for the window size to be used in the matrix profile generation
+            fields: List of strings for the fields to be processed
+            visualizeAllFields: Boolean flags to process all fields
+
+        Returns:
+
+        """
+        profiles = DP.preprocessingAPI().generateMultidimensionalMP({object_t: subdict}, subSeqLen=subSeqLen,
+                                                                    fields=None if visualizeAllFields else fields,
+                                                                    debugStatus=self.debug)
+        if object_t not in profiles:
+            return
+        for row, profile in enumerate(profiles[object_t]['profile']):
+            MP[object_t]["mSTAMP-{0}D".format(row + 1)] = profile.tolist()
 
-    def generateMP(self, dataDict, obj=None, fields=None, subSeqLen=20, visualizeAllObj=True, visualizeAllFields=True):
+    def generateMP(self, dataDict, obj=None, fields=None, subSeqLen=20, visualizeAllObj=True, visualizeAllFields=True,
+                   multidimensional=False):
         """
         function for generating a matrix profile for multiple time series contained in dataDict
 
@@ -154,6 +194,7 @@ class visualizeTS(object):
             subSeqLen: Integer value for the length of the sliding window to be used to generate the matrix profile
             visualizeAllObj: Boolean flag indicating that all objects in the configuration file should be considered
             visualizeAllFields: Boolean flag indicating that all fields for an object should be plotted
+            multidimensional: Boolean flag to also generate the multidimensional profiles of the fields, as 'mSTAMP-kD'
 
         Returns:
             A dictionary containing all the data for the matrix profiles associated with the given fields of the specified
@@ -169,6 +210,8 @@ class visualizeTS(object):
             for object_t in dataDict.keys():
                 subdict = dataDict[object_t]
                 self.populateMPStruct(MP, subdict, object_t, subSeqLen, fields, visualizeAllFields)
+                if multidimensional:
+                    self.populateMultidimensionalMP(MP, subdict, object_t, subSeqLen, fields, visualizeAllFields)
                 MP[object_t]["name"] = dataDict[object_t]["name"]
 
         else:
@@ -176,6 +219,8 @@ class visualizeTS(object):
                 objectID = "uid-" + uid
                 subdict = dataDict[objectID]
                 self.populateMPStruct(MP, subdict, objectID, subSeqLen, fields, visualizeAllFields)
+                if multidimensional:
+                    self.populateMultidimensionalMP(MP, subdict, objectID, subSeqLen, fields, visualizeAllFields)
                 MP[objectID]["name"] = dataDict[objectID]["name"]
 
         return MP
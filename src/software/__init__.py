@@ -6,20 +6,33 @@
 """
 Package system
 """
-# Folders
-from . import access
-from . import autoAI
-from . import axon
-from . import container
-from . import cpt
-from . import dAMP
-# from . import JIRA
-from . import mp
-from . import parse
-# from . import probeTrace
-# from . import pycallgraph
-from . import TSV
-from . import utility
+import importlib
+
+# Folders, imported on first access (PEP 562) so that heavy subsystems (autoAI, dAMP, MEP, GUI) only load when used
+_lazySubpackages = ('access',
+                    'autoAI',
+                    'axon',
+                    'container',
+                    'cpt',
+                    'dAMP',
+                    # 'JIRA',
+                    'mp',
+                    'parse',
+                    # 'probeTrace',
+                    # 'pycallgraph',
+                    'TSV',
+                    'utility')
+
+
+def __getattr__(name):
+    if name in _lazySubpackages:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_lazySubpackages))
+
 
 # Files
 # from . import debug
@@ -15,7 +15,7 @@ Description:
 from __future__ import absolute_import, division, print_function, \
     unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
 
-import os, subprocess, tempfile
+import mmap, os, subprocess, tempfile
 import src.software.parse.parseTelemetryBin
 
 
@@ -27,6 +27,8 @@ class binProcesses(object):
         uidToUidObjectInfoDict(dic): uid Object is a Telemetry Object whose structure is defined by a unique Uid
         telemetryBinary(str): Path to the telemetry binary
         serialNumber(str): Solid State Drive drive identification serial number.
+        uidIndex(dict): uid -> (dataOffset, dataSize, (major, minor), dataArea) of every object in the binary
+        telemetryView(memoryview): Zero-copy view of the whole telemetry binary
         telemetryHeader(array): Header identification information.
         telemetryBinSplitter(obj): Information from the split binary.
         sataDriveFlag(boolean): Flag to determine if the device is on SATA or NVMe.
@@ -50,6 +52,8 @@ class binProcesses(object):
             #>>> binProcesses("myTempBin2")
         """
         self.uidToUidObjectInfoDict = dict()  # uid Object is a Telemetry Object whose structure is defined by a unique Uid
+        self.uidIndex = dict()  # uid -> (dataOffset, dataSize, (major, minor), dataArea), built once per binary
+        self.telemetryView = None  # memoryview of the whole telemetry binary, payloads are sliced out of it
         self.telemetryBinary = telemetryBinary
         self.serialNumber = None
         self.telemetryHeader = None
@@ -63,10 +67,10 @@ class binProcesses(object):
 
         Args:
             uid:                Telemetry object unique identifier, as String
-            outputFileName:      What to name the output file where binary will print
+            outputFileName:     If set, the payload is also written out to this file
 
         Returns:
-            object: ObjectListEntry object with binData set
+            object: ObjectListEntry object with binData set to a memoryview of the payload
 
         Raises:
             None
@@ -75,28 +79,28 @@ class binProcesses(object):
             #>>> object = binProcesses.getObject("5")
             #>>> payload = object.getBinData()
         """
+        uid = str(uid)
         if (outputFileName):
             outputData = self.__getPayloadFromUid(uid, outputFileName=outputFileName)
         else:
-            outputData = self.__getPayloadFromUid(uid)
-        structObject = self.uidToUidObjectInfoDict[uid]
-        outputStr = str(structObject)
-        outputStr += "rawData: %s\n" % (outputData)
+            outputData = self.getPayload(uid)
+        structObject = self.uidToUidObjectInfoDict.get(uid)
+        if structObject is None:
+            return None
         if self.debug:
-            print(outputStr)
-        structObject.setBinData(outputStr)
+            print(str(structObject))
+        structObject.setBinData(outputData)
 
         return structObject
 
-    @staticmethod
-    def getPayload(uid):
+    def getPayload(self, uid):
         """
         Main Access Point. Get and return a binary payload
         Args:
             uid: Telemetry object unique identifier, as String
 
         Returns:
-            payload: uids-specific binary payload
+            payload: uid-specific binary payload as a zero-copy memoryview, None if the uid is not in the binary
 
         Raises:
             None
@@ -104,22 +108,19 @@ class binProcesses(object):
         Examples:
             #>>> payload = binProcesses.getPayload("5")
         """
-        uidObject = binProcesses().getObject(uid)  # @todo self.getObject(uid)
-        try:
-            payload = uidObject.ObjectListEntry().getBinData()  # @todo uidObject.getBinData()
-        except Exception as seenError:
-            print("getPayload Failed for uid {0}\nError is {1}\n".format(uid, seenError))
-            payload = None
-        return payload
+        uid = str(uid)
+        return self.getPayloads([uid])[uid]
 
     def getPayloads(self, uidList):
         """
-        Main access point. Print payloads retrieved, returns dictionary with desired payloads
+        Main access point. Returns dictionary with desired payloads, sliced out of the mapped binary without copying
+        or reopening it.
+
         Args:
-            uidList     Comma-separated string of unique identifiers to get payloads for
+            uidList     Iterable of unique identifiers, or comma-separated string of them, to get payloads for
 
         Returns:
-            uidPayloads:     uid->payload dictionary
+            uidPayloads:     uid->payload dictionary, payloads are memoryviews and None for uids not in the binary
 
         Raises:
             None
@@ -128,16 +129,40 @@ class binProcesses(object):
             #>>> payloads = binProcesses.getPayloads("5,6,7")
             #>>> payload5 = payloads["5"]
         """
+        if isinstance(uidList, str):
+            uidList = uidList.split(",")
+        view = self.getTelemetryView()
         uidPayloads = dict()
-        for uid in uidList.split(","):
-            payload = self.getPayload(uid)
-            uidPayloads[uid] = payload
+        for uid in uidList:
+            uid = str(uid).strip()
+            location = self.uidIndex.get(uid)
+            if (location is None) or (view is None):
+                print("Uid {0} not in uidIndex, and not in this Telemetry Binary\n".format(uid))
+                uidPayloads[uid] = None
+                continue
+            dataOffset, dataSize, _, _ = location
+            uidPayloads[uid] = view[dataOffset:dataOffset + dataSize]
 
         return uidPayloads
 
+    def getObjectIndex(self, uid):
+        """
+        Lookup in the persistent object index
+
+        Args:
+        uid     uidNum, specified as String
+
+        Returns:
+            (dataOffset, dataSize, (major, minor), dataArea) of the object, None if the uid is not in the binary
+
+        Examples:
+            #>>> dataOffset, dataSize, version, dataArea = binProcesses().getObjectIndex("5")
+        """
+        return self.uidIndex.get(str(uid))
+
     def getLocationForUid(self, uid):
         """
-        a wrapper for uidToUidObjectInfoDict
+        a wrapper for uidIndex
 
         Args:
         uid     uidNum, specified as String
@@ -154,10 +179,10 @@ class binProcesses(object):
 
         """
         try:
-            dataOffset, dataSize = self.uidToUidObjectInfoDict[uid].getBinLocation()
+            dataOffset, dataSize, _, _ = self.uidIndex[str(uid)]
             return dataOffset, dataSize
         except KeyError:
-            print("Uid {0} not in uidToUidObjectInfoDict, and not in this Telemetry Binary\n".format(uid))
+            print("Uid {0} not in uidIndex, and not in this Telemetry Binary\n".format(uid))
             return None, None
 
     def readDrive(self, driveNum, sataDriveFlag=False):
@@ -192,12 +217,13 @@ class binProcesses(object):
                                                                                    debug=1, prepend=False)
         return status
 
-    def parseTelemetryBinaryFile(self, outpath):
+    def parseTelemetryBinaryFile(self, outpath, writeFiles=True):
         """
         Wrapper for parseTelemetryBinAPI to get telemetry object with telemetry binary info
 
         Args:
             outpath: output path
+            writeFiles: When False the binary is split in memory only, no object bin file is written to outpath
 
         Dependencies:
             self.telemetryBinary    file needs to contain telemetry binary
@@ -208,6 +234,8 @@ class binProcesses(object):
         Changes:
             self.uidToUidObjectInfoDict is now filled with ObjectListEntry
                 objects containing binary info
+            self.uidIndex holds the location, version and data area of every object
+            self.telemetryView maps the telemetry binary
 
         Examples:
             #>>> binIn = binProcesses()
@@ -220,7 +248,8 @@ class binProcesses(object):
             "DEBUG: If this fails, try checking that the telemetry file you input is from the correct drive and type (NVMe vs SATA)\n\n")
         parseStatus, telemetryParser = src.software.parse.parseTelemetryBin.parseTelemetryBinAPI(self.telemetryBinary,
                                                                                                  checkOnly=False,
-                                                                                                 outpath=outpath)
+                                                                                                 outpath=outpath,
+                                                                                                 writeFiles=writeFiles)
         self.serialNumber = telemetryParser.getSerialNumber()
         # @ TODO: validity checks fail (see printouts), but this might not be bad in this context. Check this
 
@@ -228,22 +257,57 @@ class binProcesses(object):
             print("WARNING: Telemetry Binary Validity Check Failed. ")
 
         if self.debug:
-            print("Printing Split Binary Objects..." % (telemetryParser.telemetrySplit.splitObjectList))
+            print("Printing Split Binary Objects...\n%s" % (telemetryParser.telemetrySplit.splitObjectList))
             for startByte, size, dataArea in telemetryParser.telemetrySplit.dataAreaList:
                 print("Read Data Area %s at byte %s of size %s\n" % (dataArea, startByte, size))
 
-        # Save as dictionary
-        for obj in telemetryParser.telemetrySplit.splitObjectList:
-            uid = obj.getObjectId()
-            self.uidToUidObjectInfoDict[str(uid)] = obj
+        self.telemetryBinSplitter = telemetryParser.telemetrySplit
+        self.telemetryView = None
+        self.buildObjectIndex(self.telemetryBinSplitter.splitObjectList)
 
         if self.debug:
             print("uidInfoDict contains the following uids:\n {0}\n".format(
                 str(sorted(self.uidToUidObjectInfoDict.keys()))))
+        return
 
-        self.telemetryBinSplitter = telemetryParser.telemetrySplit
+    def buildObjectIndex(self, splitObjectList):
+        """
+        Builds the persistent uid index of the binary once, so later lookups never parse or reopen the binary.
+
+        Args:
+            splitObjectList: ObjectListEntry objects found by the telemetry splitter
+
+        Changes:
+            self.uidToUidObjectInfoDict and self.uidIndex are replaced with the objects of splitObjectList
+        """
+        self.uidToUidObjectInfoDict = dict()
+        self.uidIndex = dict()
+        for obj in splitObjectList:
+            uid = str(obj.getObjectId())
+            dataOffset, dataSize = obj.getBinLocation()
+            self.uidToUidObjectInfoDict[uid] = obj
+            self.uidIndex[uid] = (dataOffset, dataSize, (obj.getMajor(), obj.getMinor()), obj.getDataArea())
         return
 
+    def getTelemetryView(self):
+        """
+        Zero-copy view of the whole telemetry binary, mapped once and shared by every payload.
+
+        Returns:
+            memoryview of the binary, None if the binary could not be opened
+        """
+        if self.telemetryView is None:
+            # Reuse the mapping of the splitter when the parse could map the binary
+            if self.telemetryBinSplitter is not None:
+                self.telemetryView = getattr(self.telemetryBinSplitter, 'telemetryView', None)
+            if self.telemetryView is None and self.telemetryBinary:
+                try:
+                    with open(self.telemetryBinary, 'rb') as telemetryBinary:
+                        self.telemetryView = memoryview(mmap.mmap(telemetryBinary.fileno(), 0, access=mmap.ACCESS_READ))
+                except (OSError, ValueError) as seenError:
+                    print("Could not map telemetry Binary {0}: {1}\n".format(self.telemetryBinary, seenError))
+        return self.telemetryView
+
     def __getPayloadFromUid(self, uid, outputFileName=None):
         """
         Put it all together.
@@ -254,10 +318,10 @@ class binProcesses(object):
 
         Dependencies:
             self.telemetryBinary            file needs to contain telemetry binary
-            self.uidToUidObjectInfoDict     should be filled with ObjectListEntry objects containing binary info
+            self.uidIndex                   should be filled by parseTelemetryBinaryFile()
 
         Returns:
-            outputData
+            outputData          memoryview of the payload
 
         Changes:
             Results in payload written out to outputFile
@@ -274,7 +338,8 @@ class binProcesses(object):
             print("Uid Telemetry Data Not Accessible\n")
             return None
 
-        if (not self.telemetryBinary):
+        outputData = self.getPayload(uid)
+        if (outputData is None):
             print("Could not find telemetry Binary...\n")
             return None
 
@@ -283,13 +348,11 @@ class binProcesses(object):
         else:
             prefix = "log"
 
-        telemetryBinary = open(self.telemetryBinary)
         if (outputFileName is None):
             outputFileName = self.telemetryBinSplitter.constructFileName(prefix, self.uidToUidObjectInfoDict[uid])
 
-        # @todo: a method to get dynamically but not print out
-
-        outputData = self.telemetryBinSplitter.writeOutputData(telemetryBinary, dataOffset, dataSize, outputFileName)
+        with open(outputFileName, 'wb') as outputFile:
+            outputFile.write(outputData)
 
         print("Storing Payload in : {0} ...\n".format(outputFileName))
         return outputData
@@ -93,6 +93,7 @@ from sklearn.linear_model import LinearRegression, RidgeCV, LassoCV, ElasticNetC
 from src.software.utilsCommon import getDateTimeFileFormatString
 from src.software.utilsCommon import tryFolder
 from src.software.debug import whoami
+from src.software.parse.nlogParser.telemetry_parsers.nlogFormatCatalog import loadFormatCatalog
 
 
 # PCA is used as the choice of dimensionality reduction algorithm because we are assuming that the sentence embeddings
@@ -364,7 +365,7 @@ class NlogTokenizer(object):
     @staticmethod
     def _getNLogFormats(formatsFile):
         """
-        Function for importing (read and execute) the NLog formats file into this script.
+        Function for loading the NLog formats file into this script through its pre-built format catalog.
         Stolen from nlogpost2.py getNLogFormats() and modified to work in the class
 
         Args:
@@ -376,16 +377,8 @@ class NlogTokenizer(object):
 
         # Get Format Strings
         try:
-            # Use exec rather than import here.
-            # Python maintains cached version of the imported files
-            # that don't always get updated when the underlying file changes,
-            # even if re-imported.
-            myLocals = {}
-            formatsFileObj = open(formatsFile)
-            exec(formatsFileObj.read(), {}, myLocals)
-            formats = myLocals["formats"]
-            formatsFileObj.close()
-            return formats
+            # Use the memory mapped catalog of the formats file, rebuilt when the file changes.
+            return loadFormatCatalog(formatsFile)
 
         except BaseException as ErrorContext:
             pprint.pprint(f"{ErrorContext}{os.linesep}{pprint.pformat(whoami())}")
@@ -4,35 +4,14 @@
 # * Authors: Joseph Tarango, Daniel Garces
 # *****************************************************************************/
 # @package autoModuleAPI
-import optparse, datetime, traceback, pprint, os, sys, pandas,  shutil
+import optparse, datetime, traceback, pprint, os, sys, shutil
 # import concurrent.futures, pylatex, numpy, random, difflib, tensorflow, re
-import src.software.TSV.visualizeTS
-import src.software.TSV.generateTSBinaries
-import src.software.TSV.formatTSFiles
-import src.software.TSV.DefragHistoryGrapher
-import src.software.MEP.mediaErrorPredictor
-import src.software.axon.packageInterface
-import src.software.axon.axonInterface
-import src.software.axon.axonMeta
-import src.software.axon.axonProfile
-import src.software.access.DriveInfo
-import src.software.container.basicTypes
-import src.software.guiLayouts
-import src.software.guiCommon
-import src.software.guiOneShot
-import src.software.guiDeveloper
-import src.software.guiTests
-import src.software.JIRA.analysisGuide
-import src.software.MEP.loadAndProbeDrive
-import src.software.TSV.loadAndProbeSystem
-import src.software.autoAI.nlogPrediction
-import src.software.DP.preprocessingAPI as DP
-from src.software.JIRA.executeJiraMining import executeJiraMining, cleanSearchString
+# The analysis subsystems (TSV, MEP, axon, JIRA, autoAI, dAMP, GUI) are imported by the functions using them, so a
+# parse only or --help invocation does not load tensorflow, pandas and the GUI.
+import src.software.phaseCache
 from src.software.utilsCommon import DictionaryFlatten, tryFile, tryFolder, getFileNameUTCTime, cleanFileName, flattenList, getTimeStamp, strip_start
 from src.software.debug import whoami
-from src.software.dAMP.reportGenerator import ReportGenerator
-from src.software.dAMP.gatherMeta import GatherMeta
-from src.software.threadModuleAPI import MassiveParallelismSingleFunctionManyParameters
+from src.software.threadModuleAPI import MassiveParallelismSingleFunctionManyParameters, PhaseScheduler
 # from collections import OrderedDict
 import warnings
 
@@ -128,6 +107,8 @@ def generateBinaryDataSet(driveNumber=0,
         performanceTest: Perform standard performance test or media profile test.
     Returns: Success of API 0 is good status.
     """
+    import src.software.TSV.loadAndProbeSystem
+    import src.software.MEP.loadAndProbeDrive
     if performanceTest:
         if inputFile is None:
             inputFile = os.path.abspath(r'software/TSV/workloads/windows/Thermal-4KSW1QD1W.csv')
@@ -167,6 +148,11 @@ def generateParseDataSet(containingFolder=".", autoParseFolder=".", outFolder=".
         skipZip: Parameter to skip zipping content
     Returns: Generated information and objects from data processsing.
     """
+    import src.software.TSV.generateTSBinaries
+    import src.software.TSV.formatTSFiles
+    import src.software.axon.packageInterface
+    import src.software.access.DriveInfo
+    import src.software.DP.preprocessingAPI as DP
     # Nil constants
     driveName = "/dev/nvme0n1"  # Linux and Windows device handle
     driveNumber = None  # Value 0-K
@@ -244,6 +230,8 @@ def generateHandbook(username="PresidentSkroob@spaceballs.one", password="12345"
         debug: developer debug flag.
     Returns: Password object, hash of password
     """
+    import src.software.axon.packageInterface
+    import src.software.JIRA.analysisGuide
 
     debugHandbookTranslate = {1: "Unknown", 2: "Live", 3: "Cache", 4: "Nil"}
     debugHandbookFile = outCacheFile
@@ -387,6 +375,8 @@ def generateDataTables(inputINI=None, saveCVS=True, outputLocation='.', debug=Fa
     Returns: uid list, tables, size, and files
 
     """
+    import pandas
+    import src.software.DP.preprocessingAPI as DP
     # Pull data file and store in a dictionary
     telemetryDataDictionary = DP.preprocessingAPI().loadDataDict(inputINI)
     # Traverse dictionary and populate the table
@@ -459,6 +449,7 @@ def generateTimeSeriesGraphs(inputINI=None, outputFile="telemetryDefault", subSe
         timeOut: Execution timeout.
     Returns: List of file names for the PDFs containing the graphs (one PDF for each object, and one graph per field)
     """
+    import src.software.TSV.visualizeTS
     validMetaFile = os.path.exists(os.path.abspath(inputINI))
     if validMetaFile is False:
         print("Configuration file does not exist. Unable to graph generic objects")
@@ -485,6 +476,7 @@ def generateDefragHistory(inputINI=None, outputFile="telemetryDefault", mode=1,
         debug: [True, False] developer debug statements.
     Returns: Name of the PDF file where all the graphs are stored
     """
+    import src.software.TSV.DefragHistoryGrapher
     validMetaFile = os.path.exists(os.path.abspath(inputINI))
     if validMetaFile:
         viz = src.software.TSV.DefragHistoryGrapher.DefragHistoryGrapher(mode=mode, debug=debug)
@@ -513,6 +505,7 @@ def generateARMA(inputINI=None, subSequenceLength=1, matrixProfileFlag=None, deb
         max_workers: total number of threads.
     Returns: list of PDFs of ARMA models
     """
+    import src.software.MEP.mediaErrorPredictor
     pdfNameList = list()
     runSequential = not inParallel
     inOrder = True
@@ -604,6 +597,7 @@ def generateRNNLSTM(inputINI=None,
         inOrder: out-of-order or in-order execution. Dependencies on data should set flag to in-order.
     Returns: list of PDFs of ARMA models.
     """
+    import src.software.guiCommon
     objectFile = src.software.guiCommon.ObjectConfigRNN(configFilePath=inputINI)
     objectFile.readConfigContent(debug=debug)
     objectList = list(objectFile.objectIDs)
@@ -706,6 +700,9 @@ def generateAXONUpload(contentFile=None, uploadMode="test", userName='lab', debu
         debug: Developer debug statement.
     Returns: status information and meta data from upload.
     """
+    import src.software.axon.axonInterface
+    import src.software.axon.axonProfile
+    import src.software.access.DriveInfo
     # User wants to upload the last content data file gathered to the AXON database.
     axonURL = None
     if contentFile is None:
@@ -761,6 +758,8 @@ def generateAXONDownload(axonID=None, downloadDirectory=None, downloadMode='test
         debug: developer debug logs.
     Returns: status information and meta data from download.
     """
+    import src.software.axon.axonInterface
+    import src.software.axon.axonProfile
     if axonID is None:
         return (None, None, None, None, None, None, None)
 
@@ -821,7 +820,9 @@ def generateAllContent(debug=True,
                        inParallelLocal=False,
                        inOrder=True,
                        requiredList=None,
-                       skipPhases=None):
+                       skipPhases=None,
+                       usePhaseCache=True,
+                       phaseCacheFolder=None):
     """ Generation of content in one simple API.
     Args:
         nlogFolder: Nlog meta folder
@@ -847,10 +848,12 @@ def generateAllContent(debug=True,
         embeddedEncodingFlag: AI embedded encoding for meta data.
         categoricalEncodingFlag: AI catagorical encoding flag for meta data.
         inParallel: Parallel sub-functions.
-        inParallelLocal: Local parallel functions.
+        inParallelLocal: Local parallel functions, phases 4 to 7 run concurrently on one shared process pool.
         inOrder: Flag to process out of order or in order. Be careful with data dependency.
         requiredList: List of strings fort he names of objects to be processed indicating whether the objects to be processed should be limited to the ones. Contained in the requiredList. If None, the default list will be used.
         skipPhases: Phases in the auto API to skip
+        usePhaseCache: Flag to reuse the results of phases 2 and 4 to 7 from a previous run with the same input binaries and parameters.
+        phaseCacheFolder: Folder of the phase result cache, None for the per user folder of phaseCache.defaultDirectory().
     Returns: Display report dictionary.
     """
     runSequential = not inParallelLocal
@@ -910,6 +913,12 @@ def generateAllContent(debug=True,
     fileTokenNamePostfix = 'TokenData.ini'  # Token postfix
     fileZipNamePostfix = 'MetaData.zip'  # Zip file postfix
 
+    # Results of the expensive phases keyed by their input contents and parameters, restored into the output folder on a rerun
+    if usePhaseCache:
+        phaseCache = src.software.phaseCache.PhaseCache(directory=phaseCacheFolder)
+    else:
+        phaseCache = None
+
     fileAnalysisLogName = os.path.join(outputFolder, "autoModule.log")
     fileAnalysisLog = open(fileAnalysisLogName, 'w')
 
@@ -923,19 +932,30 @@ def generateAllContent(debug=True,
     # @todo autoParseMode is ADP or CDR flag, this should be pulled from the telemetry header
     # Phase 2
     if 2 not in skipPhases:
+        kwargs_Parse = {'containingFolder': inputFolder,
+                        'autoParseFolder' : autoParseFolder,
+                        'outFolder'       : outputFolder,
+                        'nlogFolder'      : nlogFolder,
+                        'operationMode'   : 3,
+                        'autoParseMode'   : 2,
+                        'debug'           : debug,
+                        'fileIdentifier'  : filePrefix,
+                        'timeName'        : None,
+                        'fileTokenName'   : fileTokenNamePostfix,
+                        'fileMetaName'    : fileZipNamePostfix,
+                        'skipZip'         : True}
+        if phaseCache is not None:
+            parsePayload = phaseCache.phase(phase=generateParseDataSet.__name__, outputFolder=outputFolder,
+                                            compute=lambda: generateParseDataSet(**kwargs_Parse),
+                                            inputPaths=[inputFolder], toolPaths=[autoParseFolder, nlogFolder],
+                                            **kwargs_Parse)
+        else:
+            parsePayload = generateParseDataSet(**kwargs_Parse)
         (dataFileName, dataZipFileName,
          telemetryBinaryObj, parseBinList, binOutputFolder,
          telemetryFormatObj, validExtraction,
          packageObj, telemetryDataDictionary, telemetryDataDictionaryFlat, telemetryDataDictionaryFlatSize,
-         driveInformation) = generateParseDataSet(containingFolder=inputFolder, autoParseFolder=autoParseFolder,
-                                                  outFolder=outputFolder,
-                                                  nlogFolder=nlogFolder,
-                                                  operationMode=3, autoParseMode=2, debug=debug,
-                                                  fileIdentifier=filePrefix,
-                                                  timeName=None,
-                                                  fileTokenName=fileTokenNamePostfix,
-                                                  fileMetaName=fileZipNamePostfix,
-                                                  skipZip=True)
+         driveInformation) = parsePayload
         telemetryDataDictionaryUIDList = list((telemetryDataDictionary.keys()))
         telemetryDataDictionaryUIDList = sorted(telemetryDataDictionaryUIDList, key=lambda x: int(strip_start(stringInput=x, prefix='uid-')))
         pprint.pprint(object="generateParseDataSet()", stream=fileAnalysisLog)
@@ -966,6 +986,7 @@ def generateAllContent(debug=True,
     # @todo note searchString should be pulled from the telemetry header
     # Phase 3
     if 3 not in skipPhases:
+        from src.software.JIRA.executeJiraMining import cleanSearchString
         # fix incorrectness of searchString if any
         BADASSERTTAGS = {'ASSERT_DF0049': 'ASSERT_DF049'}
         final = cleanSearchString(searchString=driveInformation["DeviceStatus"])
@@ -987,31 +1008,25 @@ def generateAllContent(debug=True,
     else:
         dataMatch = None
 
-    # Prepare list of args to execute in open core threads.
-    # Setup pool, run, and check pool results.
+    # Phases 4 to 7 only read the time series INI written by phase 2, declare their data so the scheduler runs them
+    # concurrently on one shared process pool when local parallelism is enabled.
+    readDataFilePath = os.path.join(outputFolder, dataFileName)
+    phaseScheduler = PhaseScheduler(debug=debug,
+                                    workers=max_workers,
+                                    timeOut=timeOut,
+                                    runSequential=runSequential)
+    phaseList = list()
     # Phase 4
     if 4 not in skipPhases:
-        kwargsList_TS = [{'inputINI'         : os.path.join(outputFolder, dataFileName),
-                          'outputFile'       : timeSeriesFile,
-                          'subSequenceLength': subSequenceLength,
-                          'matrixProfileFlag': matrixProfileFlag,
-                          'debug'            : debug,
-                          'inParallel'       : inParallel,
-                          'requiredList'     : requiredList,
-                          'timeOut'          : timeOut}]
-        functionContext = MassiveParallelismSingleFunctionManyParameters(debug=debug,
-                                                                         functionName=generateTimeSeriesGraphs,
-                                                                         fParameters=kwargsList_TS,
-                                                                         workers=max_workers,
-                                                                         timeOut=timeOut,
-                                                                         inOrder=inOrder,
-                                                                         runSequential=runSequential)
-        iResults = functionContext.execute()
-        pdfFilesTimeSeries = iResults
-        pdfFilesTimeSeries = flattenList(inList=pdfFilesTimeSeries)
-        pprint.pprint(object="generateTimeSeriesGraphs()", stream=fileAnalysisLog)
-        pprint.pprint(object=pdfFilesTimeSeries, stream=fileAnalysisLog)
-        pprint.pprint(object=pdfFilesTimeSeries)
+        kwargs_TS = {'inputINI'         : readDataFilePath,
+                     'outputFile'       : timeSeriesFile,
+                     'subSequenceLength': subSequenceLength,
+                     'matrixProfileFlag': matrixProfileFlag,
+                     'debug'            : debug,
+                     'inParallel'       : inParallel,
+                     'requiredList'     : requiredList,
+                     'timeOut'          : timeOut}
+        phaseList.append((4, generateTimeSeriesGraphs, kwargs_TS, ['timeSeriesGraphs']))
 
     # Phase 5
     if 5 not in skipPhases:
@@ -1028,76 +1043,79 @@ def generateAllContent(debug=True,
             mode = 1
             numCores = 2  # Actually 4 cores, we use two media banks.
             print(f"Error in product map match {productFamily}")
-        kwargsList_DH = [{'inputINI'     : os.path.join(outputFolder, dataFileName),
-                          'outputFile'   : defragHistoryFile,
-                          'mode'         : mode,
-                          'numCores'     : numCores,
-                          'bandwidthFlag': True,
-                          'debug'        : debug}]
-        functionContext = MassiveParallelismSingleFunctionManyParameters(debug=debug,
-                                                                         functionName=generateDefragHistory,
-                                                                         fParameters=kwargsList_DH,
-                                                                         workers=max_workers,
-                                                                         timeOut=timeOut,
-                                                                         inOrder=inOrder,
-                                                                         runSequential=runSequential)
-        iResults = functionContext.execute()
-        pdfFilesDH = iResults
-        pdfFilesDH = flattenList(inList=pdfFilesDH)
-        pprint.pprint(object="generateDefragHistory()", stream=fileAnalysisLog)
-        pprint.pprint(object=pdfFilesDH, stream=fileAnalysisLog)
+        kwargs_DH = {'inputINI'     : readDataFilePath,
+                     'outputFile'   : defragHistoryFile,
+                     'mode'         : mode,
+                     'numCores'     : numCores,
+                     'bandwidthFlag': True,
+                     'debug'        : debug}
+        phaseList.append((5, generateDefragHistory, kwargs_DH, ['defragHistoryGraphs']))
 
     # Phase 6
     if 6 not in skipPhases:
-        kwargsList_ARMA = [{'inputINI'         : os.path.join(outputFolder, dataFileName),
-                            'subSequenceLength': subSequenceLength,
-                            'matrixProfileFlag': matrixProfileFlag,
-                            'debug'            : debug,
-                            'inParallel'       : inParallel,
-                            'requiredList'     : requiredList,
-                            'outFolder'        : outputFolder}]
-        functionContext = MassiveParallelismSingleFunctionManyParameters(debug=debug,
-                                                                         functionName=generateARMA,
-                                                                         fParameters=kwargsList_ARMA,
-                                                                         workers=max_workers,
-                                                                         timeOut=timeOut,
-                                                                         inOrder=inOrder,
-                                                                         runSequential=runSequential)
-        iResults = functionContext.execute()
-        pdfNameListARMA = iResults
-        pdfNameListARMA = flattenList(inList=pdfNameListARMA)
-        pprint.pprint(object="generateARMA()", stream=fileAnalysisLog)
-        pprint.pprint(object=pdfNameListARMA, stream=fileAnalysisLog)
+        kwargs_ARMA = {'inputINI'         : readDataFilePath,
+                       'subSequenceLength': subSequenceLength,
+                       'matrixProfileFlag': matrixProfileFlag,
+                       'debug'            : debug,
+                       'inParallel'       : inParallel,
+                       'requiredList'     : requiredList,
+                       'outFolder'        : outputFolder}
+        phaseList.append((6, generateARMA, kwargs_ARMA, ['armaGraphs']))
 
-    readDataFilePath = os.path.join(outputFolder, dataFileName)
     # Phase 7
     if 7 not in skipPhases:
-        kwargsList_RNN = [{'inputINI'               : readDataFilePath,
-                           'subSequenceLength'      : subSequenceLength,
-                           'matrixProfileFlag'      : matrixProfileFlag,
-                           'batchSize'              : batchSize,
-                           'maxEpochs'              : maxEpochs,
-                           'inputWidth'             : inputWidth,
-                           'labelWidth'             : labelWidth,
-                           'shift'                  : shift,
-                           'hiddenLayers'           : hiddenLayers,
-                           'embeddedEncodingFlag'   : embeddedEncodingFlag,
-                           'categoricalEncodingFlag': categoricalEncodingFlag,
-                           'debug'                  : debug,
-                           'inParallel'             : inParallel,
-                           'requiredList'           : requiredList,
-                           'timeOut'                : timeOut,
-                           'max_workers'            : max_workers}]
-        functionContext = MassiveParallelismSingleFunctionManyParameters(debug=debug,
-                                                                         functionName=generateRNNLSTM,
-                                                                         fParameters=kwargsList_RNN,
-                                                                         workers=max_workers,
-                                                                         timeOut=timeOut,
-                                                                         inOrder=inOrder,
-                                                                         runSequential=runSequential)
-        iResults = functionContext.execute()
-        pdfNameListRNN = iResults
-        pdfNameListRNN = flattenList(inList=pdfNameListRNN)
+        kwargs_RNN = {'inputINI'               : readDataFilePath,
+                      'subSequenceLength'      : subSequenceLength,
+                      'matrixProfileFlag'      : matrixProfileFlag,
+                      'batchSize'              : batchSize,
+                      'maxEpochs'              : maxEpochs,
+                      'inputWidth'             : inputWidth,
+                      'labelWidth'             : labelWidth,
+                      'shift'                  : shift,
+                      'hiddenLayers'           : hiddenLayers,
+                      'embeddedEncodingFlag'   : embeddedEncodingFlag,
+                      'categoricalEncodingFlag': categoricalEncodingFlag,
+                      'debug'                  : debug,
+                      'inParallel'             : inParallel,
+                      'requiredList'           : requiredList,
+                      'timeOut'                : timeOut,
+                      'max_workers'            : max_workers}
+        phaseList.append((7, generateRNNLSTM, kwargs_RNN, ['rnnGraphs']))
+
+    cachedResults = dict()
+    phaseKeys = dict()
+    for phaseNumber, functionName, fParameters, outputs in phaseList:
+        if phaseCache is not None:
+            phaseKeys[phaseNumber] = phaseCache.key(functionName.__name__, inputPaths=[readDataFilePath], **fParameters)
+            (cacheHit, cachedResult) = phaseCache.load(phaseKeys[phaseNumber], outputFolder)
+            if cacheHit:
+                cachedResults[phaseNumber] = cachedResult
+                continue
+        phaseScheduler.addPhase(name=phaseNumber, functionName=functionName, fParameters=fParameters,
+                                inputs=['timeSeriesINI'], outputs=outputs)
+
+    phaseResults = phaseScheduler.execute(available=['timeSeriesINI'])
+    if phaseCache is not None:
+        # Phases share the output folder while running concurrently, keep the files each result names
+        for phaseNumber, phaseResult in phaseResults.items():
+            if phaseResult is not None:
+                phaseCache.store(phaseKeys[phaseNumber], phaseResult, outputFolder, src.software.phaseCache.resultFiles(phaseResult))
+    phaseResults.update(cachedResults)
+    if 4 in phaseResults:
+        pdfFilesTimeSeries = flattenList(inList=[phaseResults[4]])
+        pprint.pprint(object="generateTimeSeriesGraphs()", stream=fileAnalysisLog)
+        pprint.pprint(object=pdfFilesTimeSeries, stream=fileAnalysisLog)
+        pprint.pprint(object=pdfFilesTimeSeries)
+    if 5 in phaseResults:
+        pdfFilesDH = flattenList(inList=[phaseResults[5]])
+        pprint.pprint(object="generateDefragHistory()", stream=fileAnalysisLog)
+        pprint.pprint(object=pdfFilesDH, stream=fileAnalysisLog)
+    if 6 in phaseResults:
+        pdfNameListARMA = flattenList(inList=[phaseResults[6]])
+        pprint.pprint(object="generateARMA()", stream=fileAnalysisLog)
+        pprint.pprint(object=pdfNameListARMA, stream=fileAnalysisLog)
+    if 7 in phaseResults:
+        pdfNameListRNN = flattenList(inList=[phaseResults[7]])
         pprint.pprint(object="generateRNNLSTM()", stream=fileAnalysisLog)
         pprint.pprint(object=pdfNameListRNN, stream=fileAnalysisLog)
 
@@ -1133,6 +1151,7 @@ def generateAllContent(debug=True,
     # Phase 10
     if 10 not in skipPhases:
         # ###################### JIRA Mining Phase (Preprocessing/Analysis/Visualization) ######################
+        from src.software.JIRA.executeJiraMining import executeJiraMining
         execute = executeJiraMining(datakey=str(driveInformation['DeviceStatus']))
         success, finalTables, tableTitles = execute.executeAllJobs(embeddingType='bert',
                                                                    knownCauses=dataMatch['knownCauses'],
@@ -1155,21 +1174,23 @@ def generateAllContent(debug=True,
     # Phase 11
     if 11 not in skipPhases:
         print("Executing Nlog Prediction ... ")
+        from src.software.autoAI.nlogPrediction import NlogPredictor
         nlogFileFolder = os.path.join(outputFolder, "nlog")
         nlogParserFolder = nlogFolder
         # Executing Nlog Prediction with default values for simplicity. For full execution, please refer to the script
         # or the GUI
-        nlogPredictor = src.software.autoAI.nlogPrediction.NlogPredictor(nlogFolder=nlogFileFolder,
-                                                                         nlogParserFolder=nlogParserFolder)
+        nlogPredictor = NlogPredictor(nlogFolder=nlogFileFolder,
+                                      nlogParserFolder=nlogParserFolder)
         nlogPredictor.nlogPredictorAPI()
 
     # Phase 12
     if 12 not in skipPhases:
         print("Extracting NLOG Table...")
+        from src.software.autoAI.nlogPrediction import NlogUtils
         nlogFileName = dataFileName.replace(".ini", "_NLOG.txt")
         nlogFilePath = os.path.join(outputFolder, "nlog")
         nlogFilePath = os.path.join(nlogFilePath, nlogFileName)
-        nlogTable = src.software.autoAI.nlogPrediction.NlogUtils().extractNlogTable(nlogFilePath)
+        nlogTable = NlogUtils().extractNlogTable(nlogFilePath)
     else:
         nlogTable = None
 
@@ -1177,6 +1198,8 @@ def generateAllContent(debug=True,
     if 13 not in skipPhases:
         # Prepare report
         # Generate LaTeX simulate generation of beautiful report.
+        from src.software.dAMP.reportGenerator import ReportGenerator
+        from src.software.dAMP.gatherMeta import GatherMeta
         deviceConfiguration = telemetryDataDictionary["uid-58"] if "uid-58" in telemetryDataDictionary else None
         dataDict = telemetryDataDictionary
         dataDictDimensions = telemetryDataDictionaryFlatSize
@@ -1254,9 +1277,10 @@ def generateAllContent(debug=True,
     fileAnalysisLog.close()  # Close log file
 
     if 14 not in skipPhases:
-        packageObj = src.software.axon.packageInterface.packageInterface(absPath=outputFolder,
-                                                                         timeSeriesFile=readDataFilePath,
-                                                                         debug=debug).createZIP(zipFileName=fileZipNamePostfix)
+        from src.software.axon.packageInterface import packageInterface
+        packageObj = packageInterface(absPath=outputFolder,
+                                      timeSeriesFile=readDataFilePath,
+                                      debug=debug).createZIP(zipFileName=fileZipNamePostfix)
     else:
         packageObj = None
 
@@ -1294,6 +1318,9 @@ def generateJIRAClusters(debug=True,
         credentialsFile: credential cache file with name and password.
     Returns: Display report dictionary.
     """
+    from src.software.JIRA.executeJiraMining import executeJiraMining, cleanSearchString
+    from src.software.dAMP.reportGenerator import ReportGenerator
+    from src.software.dAMP.gatherMeta import GatherMeta
     logoFileName = tryFile(fileName=logoFileName)
     inputFolder = tryFolder(path=inputFolder)
     autoParseFolder = tryFolder(path=autoParseFolder)
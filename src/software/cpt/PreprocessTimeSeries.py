@@ -7,6 +7,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import os, json, sys
 import numpy as np
 import src.software.mp.matrixProfile as mp
+import src.software.mp.cache as profileCache
 import src.software.getOptions as op
 from datetime import datetime
 from scipy import signal, spatial, stats
@@ -42,9 +43,10 @@ def getMP(shapelets):
         for feature in shapelets['data'][run]['data']:
             try:
                 arr = signal.resample(shapelets['data'][run]['data'][feature], 100)
-                arr = np.random.normal(arr, np.finfo(float).eps)
                 print(arr)
-                MP[run][feature] = mp.stomp(arr,8)[0].tolist()
+                # Cached by the resampled series, the noise only breaks ties.
+                MP[run][feature] = profileCache.defaultCache().profile(
+                    arr, 8, 'stomp', lambda: mp.stomp(np.random.normal(arr, np.finfo(float).eps), 8))[0].tolist()
                 #print(MP[run][feature])
             except OverflowError:
                 continue
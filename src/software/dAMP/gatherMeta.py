@@ -643,8 +643,8 @@ class GatherMeta(object):
                 self.telemetryHeaderDict = self.extractTelemetryHeader()
             else:
                 print("Using INI file...")
-                self.configData = preprocessingAPI.readFileIntoConfig(configFileName=self.configFileName)
-                self.dataDict = preprocessingAPI.loadConfigIntoDict(config=self.configData, debug=debug)
+                self.configData = None
+                self.dataDict = preprocessingAPI().loadDataDict(configFilePath=self.configFileName, debugStatus=debug)
                 self.telemetryHeaderDict = self.extractTelemetryHeader()
         except:
             print("Time series were not set correctly...")
@@ -976,10 +976,16 @@ class GatherMeta(object):
             subSeqLen = 4
         MLProfiles = {}
         try:
-            MLProfiles['MP'] = preprocessingAPI().generateMP(self.dataDict, subSeqLen=subSeqLen)
-            self.MLProfiles = MLProfiles
+            MLProfiles['MP'] = preprocessingAPI().generateMP(self.dataDict, subSeqLen=subSeqLen, n_threads=-1)
         except:
             self.MLProfiles = None
+            return True
+        # Joint (mSTAMP) profile of the fields of each object with its best motif and discord sets.
+        try:
+            MLProfiles['mSTAMP'] = preprocessingAPI().generateMultidimensionalMP(self.dataDict, subSeqLen=subSeqLen)
+        except:
+            MLProfiles['mSTAMP'] = None
+        self.MLProfiles = MLProfiles
         return True
 
     def getMLMinedJira(self):
@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Joseph Tarango
+# *****************************************************************************/
+"""
+Persistent index of the tool paths discovered at launch (auto parsers, TWIDL and the folders added to the system path).
+Each entry records the modification time of the directories whose contents decided it and is reused only while they
+all match, so a launch costs one stat per directory instead of walking the trees again. The index is kept in the
+.raadProfile folder next to the user configuration and is cleared with main.py --rescan.
+"""
+from __future__ import absolute_import, division, print_function, \
+    unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
+
+import json
+import os
+
+INDEX_VERSION = 1
+INDEX_FILE_NAME = 'discoveryIndex.json'
+CONFIG_FOLDER_NAME = '.raadProfile'
+
+_defaultIndex = None
+
+
+def defaultIndexFile():
+    """
+    Returns the path of the index in the .raadProfile folder of the repository.
+    """
+    baseFolder = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(baseFolder, CONFIG_FOLDER_NAME, INDEX_FILE_NAME)
+
+
+def directoryStamps(directories):
+    """
+    Returns the dictionary of absolute directory path to modification time in nanoseconds, None for a missing one.
+
+    Parameters
+    ----------
+    directories: Directories to stamp.
+    """
+    stamps = {}
+    for directory in directories:
+        directory = os.path.abspath(directory)
+        try:
+            stamps[directory] = os.stat(directory).st_mtime_ns
+        except OSError:
+            stamps[directory] = None
+    return stamps
+
+
+def ancestorDirectories(path):
+    """
+    Returns path and every parent directory of it up to the file system root.
+
+    Parameters
+    ----------
+    path: Directory to start from.
+    """
+    path = os.path.abspath(path)
+    ancestors = [path]
+    while os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+        ancestors.append(path)
+    return ancestors
+
+
+class DiscoveryIndex(object):
+    """
+    Index of discovery results. An entry is looked up by a kind (findAutoParser, findTWIDL, findAll) and a JSON
+    serializable key of the arguments deciding it.
+    """
+
+    def __init__(self, indexFile=None, debug=False):
+        """
+        Loads the index, a missing or unreadable index file is an empty index.
+
+        Parameters
+        ----------
+        indexFile: Path of the index file, defaults to defaultIndexFile().
+        debug: Flag to print the hits and misses.
+        """
+        if indexFile is None:
+            indexFile = defaultIndexFile()
+        self.indexFile = indexFile
+        self.debug = debug
+        self.entries = {}
+        try:
+            with open(indexFile, 'r') as fileObj:
+                content = json.load(fileObj)
+            if content.get('version') == INDEX_VERSION:
+                self.entries = content.get('entries', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    @staticmethod
+    def _entryKey(kind, key):
+        """
+        Returns the string an entry is stored under.
+        """
+        return json.dumps([kind, key], sort_keys=True)
+
+    def lookup(self, kind, key):
+        """
+        Returns (True, value) when the entry exists and none of its directories changed, (False, None) otherwise.
+
+        Parameters
+        ----------
+        kind: Name of the discovery function.
+        key: Arguments deciding the result.
+        """
+        entry = self.entries.get(self._entryKey(kind, key))
+        if entry is None:
+            return (False, None)
+        if directoryStamps(entry['stamps'].keys()) != entry['stamps']:
+            if self.debug:
+                print(f"Discovery index stale for {kind} {key}")
+            return (False, None)
+        if self.debug:
+            print(f"Discovery index hit for {kind} {key}")
+        return (True, entry['value'])
+
+    def update(self, kind, key, value, directories):
+        """
+        Stores value with the modification times of directories and saves the index.
+
+        Parameters
+        ----------
+        kind: Name of the discovery function.
+        key: Arguments deciding the result.
+        value: JSON serializable result.
+        directories: Directories whose contents decided the result, a change to any of them invalidates the entry.
+        """
+        self.entries[self._entryKey(kind, key)] = {'value': value, 'stamps': directoryStamps(directories)}
+        self.save()
+
+    def cached(self, kind, key, compute, directories):
+        """
+        Returns the indexed result, computing and storing it on a miss.
+
+        Parameters
+        ----------
+        kind: Name of the discovery function.
+        key: Arguments deciding the result.
+        compute: Callable without arguments returning the result.
+        directories: Callable receiving the result and returning the directories whose contents decided it.
+        """
+        hit, value = self.lookup(kind, key)
+        if hit:
+            return value
+        value = compute()
+        self.update(kind, key, value, directories(value))
+        return value
+
+    def save(self):
+        """
+        Writes the index to a temporary file renamed over the index, a read only location keeps the index in memory.
+        """
+        temporary = '{0}.{1}.tmp'.format(self.indexFile, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.indexFile), exist_ok=True)
+            with open(temporary, 'w') as fileObj:
+                json.dump({'version': INDEX_VERSION, 'entries': self.entries}, fileObj, indent=1)
+            os.replace(temporary, self.indexFile)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def rescan(self):
+        """
+        Removes every entry so the next discovery walks the directories again.
+        """
+        self.entries = {}
+        try:
+            os.remove(self.indexFile)
+        except OSError:
+            pass
+
+
+def defaultIndex():
+    """
+    Returns the process wide index in the default location, created on first use.
+    """
+    global _defaultIndex
+    if _defaultIndex is None:
+        _defaultIndex = DiscoveryIndex()
+    return _defaultIndex
@@ -4,4 +4,4 @@
 # * Authors: Yan Zhu, Chin-Chia Michael Yeh, Zachary Zimmerman, Kaveh Kamgar, Eamonn Keogh, Tyler Woods, Joseph Tarango
 # *****************************************************************************/
 name = "matrixprofile"
-__all__ = ['utils', 'order', 'distanceProfile', 'matrixProfile', 'fluss', 'regimes', 'motifs']
+__all__ = ['utils', 'order', 'distanceProfile', 'matrixProfile', 'fluss', 'regimes', 'motifs', 'streaming', 'batchProfile', 'multidimensional', 'cache']
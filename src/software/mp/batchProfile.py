@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Joseph Tarango
+# *****************************************************************************/
+"""
+Batched STOMP self join matrix profiles of many equal length fields, such as every counter of a telemetry object. The
+moving statistics of all fields come from one cumulative sum and the first rows from one batched real FFT, then the
+fields are split across a process pool that maps the shared arrays instead of receiving pickled copies. Constant fields
+are detected up front and skipped.
+"""
+from __future__ import absolute_import, division, print_function, \
+    unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
+
+import math
+import multiprocessing
+from functools import partial
+import numpy as np
+
+from .matrixProfile import _shareArray, _attachSharedArray, _threadCount, _trivialMatchZone, _stompSelfJoinBand, \
+    _stompDistance
+from .utils import indexDtype
+
+
+def _batchStatistics(fields, m, dtype=np.float64):
+    """
+    Computes the moving statistics of every field (one per row) with the conventions of matrixProfile._stompStatistics:
+    population deviation for the profile side, sample deviation for the query side and zero deviations replaced by
+    machine epsilon.
+
+    Parameters
+    ----------
+    fields: 2-D array of cleaned time series, one per row.
+    m: Length of subsequence to compare.
+    dtype: Floating point type of the deviations, the means stay in double precision.
+
+    Returns the 2-D arrays (mean, queryStd, std).
+    """
+    numericalResolution = np.finfo(float).eps
+    rows = fields.shape[0]
+    values = fields.astype(np.longdouble)
+    s = np.concatenate([np.zeros((rows, 1), dtype=np.longdouble), np.cumsum(values, axis=1)], axis=1)
+    sSq = np.concatenate([np.zeros((rows, 1), dtype=np.longdouble), np.cumsum(values ** 2, axis=1)], axis=1)
+    segSum = s[:, m:] - s[:, :-m]
+    segSumSq = sSq[:, m:] - sSq[:, :-m]
+
+    mean = segSum / m
+    std = np.sqrt(np.abs((segSumSq / m) - mean ** 2))
+    mean = mean.astype(np.float64)
+    std = std.astype(np.float64)
+    queryStd = std * math.sqrt(m / (m - 1))
+    queryStd[queryStd == 0.0] = numericalResolution
+    std[std == 0.0] = numericalResolution
+
+    return mean, queryStd.astype(dtype), std.astype(dtype)
+
+
+def _batchFirstRows(fields, m):
+    """
+    Sliding dot products of the first subsequence of every field against the whole field, from one batched real FFT.
+
+    Parameters
+    ----------
+    fields: 2-D array of cleaned time series, one per row.
+    m: Length of subsequence to compare.
+    """
+    n = fields.shape[1]
+    product = np.fft.rfft(fields, n, axis=1) * np.fft.rfft(fields[:, m - 1::-1], n, axis=1)
+    return np.fft.irfft(product, n, axis=1)[:, m - 1:]
+
+
+def _constantFields(fields, tolerance):
+    """
+    Flags the fields whose range is within tolerance of their magnitude. Their z-normalized distances are undefined.
+
+    Parameters
+    ----------
+    fields: 2-D array of cleaned time series, one per row.
+    tolerance: Relative range under which a field is considered constant.
+    """
+    scale = np.maximum(np.max(np.abs(fields), axis=1), 1.0)
+    return np.ptp(fields, axis=1) <= tolerance * scale
+
+
+def _batchRows(fields, m, stats, firstRows, rows, dtype=np.float64):
+    """
+    Runs the STOMP self join of the given fields and returns their squared (mp, mpIndex) as 2-D arrays.
+
+    Parameters
+    ----------
+    fields: 2-D array of cleaned time series, one per row.
+    m: Length of subsequence to compare.
+    stats: Tuple of 2-D arrays returned by _batchStatistics.
+    firstRows: 2-D array returned by _batchFirstRows.
+    rows: Indices of the fields to evaluate.
+    dtype: Floating point type of the profile.
+    """
+    profileLen = fields.shape[1] - m + 1
+    mpSquared = np.full((len(rows), profileLen), np.inf, dtype=dtype)
+    mpIndex = np.full((len(rows), profileLen), -1, dtype=indexDtype(profileLen))
+    zoneBefore, zoneAfter = _trivialMatchZone(m)
+    bandStart = min(zoneAfter, zoneBefore + 1)
+    mean, queryStd, std = stats
+    for position, row in enumerate(rows):
+        _stompSelfJoinBand(fields[row], m, (mean[row], queryStd[row], mean[row], std[row]), firstRows[row], bandStart,
+                           profileLen, mpSquared[position], mpIndex[position])
+    return mpSquared, mpIndex
+
+
+def _batch_worker(rows, descriptors, m, dtype=np.float64):
+    """
+    Runs the STOMP self join of a chunk of the shared fields and returns their squared (mp, mpIndex).
+
+    Parameters
+    ----------
+    rows: Indices of the fields to evaluate.
+    descriptors: Shared memory descriptors of the fields, mean, queryStd, std and first rows.
+    m: Length of subsequence to compare.
+    dtype: Floating point type of the profile.
+    """
+    attached = [_attachSharedArray(descriptor) for descriptor in descriptors]
+    try:
+        fields, mean, queryStd, std, firstRows = [array for _, array in attached]
+        result = _batchRows(fields, m, (mean, queryStd, std), firstRows, rows, dtype=dtype)
+    finally:
+        del fields, mean, queryStd, std, firstRows
+        for block, _ in attached:
+            block.close()
+    return result
+
+
+def stompBatch(fields, m, n_threads=None, dtype=np.float64, constantTolerance=1e-12):
+    """
+    Calculates the self join Matrix Profile of every field with the STOMP engine, sharing the moving statistics, the FFT
+    of the first rows and a process pool across the fields. Each row of the result matches matrixProfile.stomp() of the
+    corresponding field.
+
+    Parameters
+    ----------
+    fields: 2-D array like of equal length time series, one per row. nan and inf values are replaced with zeros.
+    m: Length of subsequence to compare.
+    n_threads: Number of processes to use in parallel mode. Defaults to single threaded mode. Set to -1 to use all cores.
+    dtype: Floating point type of the profile and moving statistics, numpy.float64 or numpy.float32.
+    constantTolerance: Relative range under which a field is considered constant. Constant fields are not computed,
+                       their profile is all zeros and their index all -1.
+
+    Returns (mp, mpIndex) as 2-D arrays with one row per field.
+    """
+    dtype = np.dtype(dtype).type
+    if dtype not in (np.float64, np.float32):
+        raise ValueError('Matrix profile dtype must be numpy.float64 or numpy.float32.')
+    fields = np.array(fields, dtype=np.float64, ndmin=2)
+    if fields.ndim != 2:
+        raise ValueError('Fields must be a 2-D array with one time series per row.')
+    if m <= 1:
+        raise ValueError("Query length must be longer than one")
+    if fields.shape[1] < m:
+        raise ValueError('Fields must be at least as long as the query length.')
+    fields[~np.isfinite(fields)] = 0
+
+    profileLen = fields.shape[1] - m + 1
+    mp = np.zeros((fields.shape[0], profileLen), dtype=dtype)
+    mpIndex = np.full((fields.shape[0], profileLen), -1, dtype=indexDtype(profileLen))
+    rows = np.flatnonzero(~_constantFields(fields, constantTolerance))
+    if len(rows) == 0:
+        return mp, mpIndex
+
+    stats = _batchStatistics(fields, m, dtype=dtype)
+    firstRows = _batchFirstRows(fields, m)
+
+    n_threads = 1 if n_threads is None else min(_threadCount(n_threads), len(rows))
+    if n_threads == 1:
+        mpSquared, index = _batchRows(fields, m, stats, firstRows, rows, dtype=dtype)
+    else:
+        blocks = []
+        try:
+            descriptors = []
+            for array in (fields,) + stats + (firstRows,):
+                block, descriptor = _shareArray(array)
+                blocks.append(block)
+                descriptors.append(descriptor)
+            chunks = [chunk for chunk in np.array_split(rows, n_threads) if len(chunk) > 0]
+            func = partial(_batch_worker, descriptors=descriptors, m=m, dtype=dtype)
+            with multiprocessing.Pool(processes=len(chunks)) as pool:
+                results = pool.map(func, chunks)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        mpSquared = np.concatenate([profile for profile, _ in results])
+        index = np.concatenate([index for _, index in results])
+
+    mp[rows] = _stompDistance(mpSquared)
+    mpIndex[rows] = index
+    return mp, mpIndex
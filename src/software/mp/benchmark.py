@@ -0,0 +1,266 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Joseph Tarango
+# *****************************************************************************/
+"""benchmark.py
+
+Wall clock benchmarks of the matrix profile engines against the previous implementations. Sizes whose full run would
+exceed the exact limit are measured on a block of rows and extrapolated to the whole profile. The --check option
+instead compares stomp() with a brute force profile on a series containing flat segments.
+
+Example:
+    Default usage:
+        $ python -m src.software.mp.benchmark
+    Specific usage:
+        $ python -m src.software.mp.benchmark --sizes 10000,100000,1000000 --subSeqLen 32 --exactLimit 100000
+        $ python -m src.software.mp.benchmark --check
+"""
+from __future__ import absolute_import, division, print_function, \
+    unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
+
+import datetime, optparse, time, traceback
+import numpy as np
+
+from . import distanceProfile
+from . import matrixProfile
+from .utils import slidingDotProduct
+
+
+def _randomWalk(n, randomState=0):
+    """
+    Creates a reproducible random walk, the usual stand-in for telemetry counters.
+
+    Parameters
+    ----------
+    n: Length of the time series.
+    randomState: Seed of the random generator.
+    """
+    return np.cumsum(np.random.RandomState(randomState).normal(size=n))
+
+
+def _flatSegmentWalk(n, randomState=0):
+    """
+    Creates a random walk with flat segments, as left by counters that stop at a whole value.
+
+    Parameters
+    ----------
+    n: Length of the time series.
+    randomState: Seed of the random generator.
+    """
+    ts = _randomWalk(n, randomState)
+    for start, stop in ((n // 6, n // 3), (n // 2, n // 2 + n // 8), (3 * n // 4, 3 * n // 4 + n // 16)):
+        ts[start:stop] = np.round(ts[start])
+    return ts
+
+
+def _bruteForceProfile(ts, m):
+    """
+    Computes the self join profile pair by pair with the conventions of the STOMP engine: sample deviation for the
+    query, population deviation for the profile side, zero distance between two constant windows and 2 * m between a
+    constant window and any other one.
+
+    Parameters
+    ----------
+    ts: Time series under analysis.
+    m: Length of subsequence to compare.
+    """
+    windows = np.lib.stride_tricks.as_strided(ts, shape=(len(ts) - m + 1, m), strides=(ts.strides[0],) * 2)
+    means = windows.mean(axis=1)
+    stds = windows.std(axis=1)
+    constant = np.all(windows == windows[:, :1], axis=1)
+    zoneBefore, zoneAfter = matrixProfile._trivialMatchZone(m)
+    mpSquared = np.full(len(windows), np.inf)
+    for idx in range(len(windows)):
+        if constant[idx]:
+            distance = np.where(constant, 0.0, 2.0 * m)
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                correlation = windows.dot(windows[idx]) - m * means * means[idx]
+                correlation /= m * stds * windows[idx].std(ddof=1)
+            distance = np.maximum(2.0 * m * (1.0 - correlation), 0.0)
+            distance[constant] = 2.0 * m
+        distance[max(0, idx - zoneBefore):idx + zoneAfter] = np.inf
+        mpSquared = np.minimum(mpSquared, distance)
+    return np.sqrt(np.sqrt(mpSquared)), constant
+
+
+def checkStompFlatSegments(n=1000, m=32, randomState=0, tolerance=1e-4):
+    """
+    Regression check of stomp() on a series with flat segments, where the z-normalization of constant windows is
+    undefined and rounding in the moving statistics used to produce arbitrary distances.
+
+    Parameters
+    ----------
+    n: Length of the time series.
+    m: Length of subsequence to compare.
+    randomState: Seed of the random generator.
+    tolerance: Largest absolute difference allowed between the profiles.
+
+    Returns True when the profile matches the brute force one and every constant window is matched to another one.
+    """
+    ts = _flatSegmentWalk(n, randomState)
+    expected, constant = _bruteForceProfile(ts, m)
+    mp, mpIndex = matrixProfile.stomp(ts, m)
+    matches = bool(np.allclose(mp, expected, rtol=0.0, atol=tolerance))
+    constantMatched = bool(np.all(mp[constant] == 0.0)) and bool(np.all(constant[mpIndex[constant]]))
+    print("Flat segments n={0} m={1}: profile {2}, constant windows {3}".format(
+        n, m, 'matches' if matches else 'differs', 'matched' if constantMatched else 'unmatched'))
+    return matches and constantMatched
+
+
+def _legacyStompRows(ts, m, rows):
+    """
+    Replays the per-row work of the previous stomp(): a full MASS distance profile plus a separate sliding dot product
+    for every query.
+
+    Parameters
+    ----------
+    ts: Time series under analysis.
+    m: Length of subsequence to compare.
+    rows: Number of queries to evaluate.
+    """
+    mp = np.full(len(ts) - m + 1, np.inf)
+    for idx in range(rows):
+        profile, _ = distanceProfile.massDistanceProfile(ts, idx, m)
+        slidingDotProduct(ts[idx:idx + m], ts)
+        mp = np.minimum(mp, profile)
+    return mp
+
+
+def _stompRows(ts, m, rows):
+    """
+    Runs the STOMP engine over the first rows of a full (non symmetric) join of ts against itself.
+
+    Parameters
+    ----------
+    ts: Time series under analysis.
+    m: Length of subsequence to compare.
+    rows: Number of queries to evaluate.
+    """
+    stats = matrixProfile._stompStatistics(ts, ts, m)
+    firstColumn = slidingDotProduct(ts[:m], ts)
+    mpSquared, mpIndex = matrixProfile._self_join_or_not_preprocess(ts, None, m)
+    return matrixProfile._stompRows(ts, ts, m, stats, firstColumn, 0, rows, mpSquared, mpIndex)
+
+
+def _elapsed(function, *args, **kwargs):
+    """
+    Returns the wall clock seconds spent in function(*args, **kwargs).
+    """
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def benchmarkStomp(sizes=(10 ** 4, 10 ** 5, 10 ** 6), m=32, exactLimit=10 ** 4, sampleRows=256, randomState=0):
+    """
+    Compares the STOMP engine with the previous MASS per row implementation of stomp().
+
+    Parameters
+    ----------
+    sizes: Time series lengths to evaluate.
+    m: Length of subsequence to compare.
+    exactLimit: Largest length run completely, larger sizes are extrapolated from sampleRows rows.
+    sampleRows: Number of rows timed for extrapolated sizes.
+    randomState: Seed of the random generator.
+
+    Returns a list of dictionaries with the size, the seconds of each engine and whether the value was extrapolated.
+    """
+    results = []
+    for n in sizes:
+        ts = _randomWalk(n, randomState)
+        rows = n - m + 1
+        if n <= exactLimit:
+            legacySeconds = _elapsed(_legacyStompRows, ts, m, rows)
+            stompSeconds = _elapsed(matrixProfile.stomp, ts, m)
+            extrapolated = False
+        else:
+            sample = min(sampleRows, rows)
+            legacySeconds = _elapsed(_legacyStompRows, ts, m, sample) * rows / sample
+            # The self join only visits the upper triangle, so on average half of a full row.
+            stompSeconds = _elapsed(_stompRows, ts, m, sample) * rows / sample / 2
+            extrapolated = True
+        results.append({'n': n, 'm': m, 'legacy': legacySeconds, 'stomp': stompSeconds, 'extrapolated': extrapolated})
+    return results
+
+
+def printResults(results):
+    """
+    Prints benchmark results as a table.
+
+    Parameters
+    ----------
+    results: List of dictionaries as returned by the benchmark functions.
+    """
+    engines = [key for key in results[0] if key not in ('n', 'm', 'extrapolated')] if results else []
+    print(("{:>10} {:>6}" + " {:>14}" * len(engines) + " {:>10}").format('n', 'm', *(engines + ['speedup'])))
+    for result in results:
+        seconds = [result[key] for key in engines]
+        print(("{:>10} {:>6}" + " {:>14.3f}" * len(engines) + " {:>9.1f}x{}").format(
+            result['n'], result['m'], *seconds, seconds[0] / seconds[-1], ' (extrapolated)' if result['extrapolated'] else ''))
+    return
+
+
+def main():
+    """
+    main function to be called when the script is directly executed from the command line
+    """
+    ##############################################
+    # Main function, Options
+    ##############################################
+    parser = optparse.OptionParser()
+    parser.add_option("--sizes",
+                      dest='sizes',
+                      default=None,
+                      help='Comma separated time series lengths to evaluate')
+    parser.add_option("--subSeqLen",
+                      dest='subSeqLen',
+                      default=None,
+                      help='Integer for the length of the sliding window for matrix profile')
+    parser.add_option("--exactLimit",
+                      dest='exactLimit',
+                      default=None,
+                      help='Largest length to run completely, larger lengths are extrapolated')
+    parser.add_option("--check",
+                      action='store_true',
+                      dest='check',
+                      default=False,
+                      help='Check stomp() against a brute force profile on a series with flat segments')
+    (options, args) = parser.parse_args()
+
+    ##############################################
+    # Main
+    ##############################################
+    if options.sizes is None:
+        sizes = (10 ** 4, 10 ** 5, 10 ** 6)
+    else:
+        sizes = [int(size) for size in options.sizes.split(',')]
+
+    if options.subSeqLen is None:
+        subSeqLen = 32
+    else:
+        subSeqLen = int(options.subSeqLen)
+
+    if options.exactLimit is None:
+        exactLimit = 10 ** 4
+    else:
+        exactLimit = int(options.exactLimit)
+
+    if options.check:
+        return 0 if checkStompFlatSegments(m=subSeqLen) else 1
+
+    printResults(benchmarkStomp(sizes=sizes, m=subSeqLen, exactLimit=exactLimit))
+    return 0
+
+
+if __name__ == '__main__':
+    """Performs execution delta of the process."""
+    pStart = datetime.datetime.now()
+    try:
+        main()
+    except Exception as errorMain:
+        print("Fail End Process: {0}".format(errorMain))
+        traceback.print_exc()
+    qStop = datetime.datetime.now()
+    print("Execution time: " + str(qStop - pStart))
@@ -0,0 +1,249 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Joseph Tarango
+# *****************************************************************************/
+"""
+Persistent content addressed cache of matrix profiles. An entry is keyed by a hash of the series bytes, the subsequence
+length, the algorithm, its parameters and the cache version, and is stored as a pair of .npy files, so regenerating a
+report for unchanged telemetry skips the profile computation. The directory is capped in size by evicting the least
+recently used entries.
+
+Entries are looked up by a predictable key, so the cache lives in a per user directory only its owner can write to, and
+a directory owned by another user or writable by others is never read from or written to.
+"""
+from __future__ import absolute_import, division, print_function, \
+    unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
+
+import hashlib
+import os
+import stat
+import numpy as np
+
+# Bump when the engines change numerically so stale profiles are never served.
+CACHE_VERSION = 1
+
+_defaultCache = None
+
+
+def defaultDirectory():
+    """
+    Returns the default cache directory, raad/matrixProfileCache in the per user cache folder ($XDG_CACHE_HOME or
+    ~/.cache).
+    """
+    cacheFolder = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cacheFolder, 'raad', 'matrixProfileCache')
+
+
+class ProfileCache(object):
+    """
+    On disk matrix profile cache. Entries are <key>.mp.npy and <key>.index.npy in the cache directory, the access time
+    of an entry is the modification time of its profile file.
+    """
+
+    def __init__(self, directory=None, maxBytes=1 << 30, version=CACHE_VERSION):
+        """
+        Creates the cache, the directory is created on first use with access for its owner only.
+
+        Parameters
+        ----------
+        directory: Directory of the cache files, defaults to defaultDirectory().
+        maxBytes: Size cap of the directory, the least recently used entries are evicted beyond it. None disables it.
+        version: Version mixed into every key.
+        """
+        if directory is None:
+            directory = defaultDirectory()
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.version = version
+
+    def key(self, ts, m, algorithm, **parameters):
+        """
+        Returns the hexadecimal key of a profile.
+
+        Parameters
+        ----------
+        ts: Time series, or 2-D array of series, the profile is computed from.
+        m: Length of subsequence to compare.
+        algorithm: Name of the algorithm producing the profile.
+        parameters: Any other argument changing the result.
+        """
+        ts = np.ascontiguousarray(ts)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((self.version, algorithm, int(m), ts.dtype.str, ts.shape,
+                            sorted(parameters.items()))).encode('utf-8'))
+        digest.update(ts.tobytes())
+        return digest.hexdigest()
+
+    def _isPrivate(self, create=False):
+        """
+        Returns True when the directory is a real directory owned by the current user that no other user can write to.
+
+        Parameters
+        ----------
+        create: Flag to create a missing directory, with access for its owner only.
+        """
+        if create:
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            except OSError:
+                return False
+        try:
+            info = os.lstat(self.directory)
+        except OSError:
+            return False
+        if not stat.S_ISDIR(info.st_mode):
+            return False
+        if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+            return False
+        return True
+
+    def _paths(self, key):
+        """
+        Returns the profile and index file paths of an entry.
+        """
+        return (os.path.join(self.directory, key + '.mp.npy'), os.path.join(self.directory, key + '.index.npy'))
+
+    def load(self, key, mmap_mode=None):
+        """
+        Returns the cached (mp, mpIndex) of key, or None on a miss, and marks the entry as recently used. Every entry of
+        a directory failing _isPrivate() is a miss.
+
+        Parameters
+        ----------
+        key: Key returned by key().
+        mmap_mode: Memory map mode handed to numpy.load. None reads writable arrays into memory, the same as a computed
+                   profile, 'r' maps the files read only.
+        """
+        if not self._isPrivate():
+            return None
+        mpPath, indexPath = self._paths(key)
+        try:
+            mp = np.load(mpPath, mmap_mode=mmap_mode)
+            mpIndex = np.load(indexPath, mmap_mode=mmap_mode)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(mpPath, None)
+        except OSError:
+            pass
+        return (mp, mpIndex)
+
+    def store(self, key, mp, mpIndex, evict=True):
+        """
+        Writes (mp, mpIndex) under key, then evicts the least recently used entries beyond the size cap. Each file is
+        written to a temporary name and renamed, so concurrent readers never see a partial entry. Nothing is stored in
+        a directory failing _isPrivate().
+
+        Parameters
+        ----------
+        key: Key returned by key().
+        mp: Matrix profile.
+        mpIndex: Matrix profile index.
+        evict: False to skip the eviction, call evict() once after storing a batch of entries.
+        """
+        if not self._isPrivate(create=True):
+            return
+        # The index goes first since an entry is only visible once its profile file exists.
+        for path, array in zip(reversed(self._paths(key)), (mpIndex, mp)):
+            temporary = '{0}.{1}.tmp'.format(path, os.getpid())
+            try:
+                with open(temporary, 'wb') as fileObj:
+                    np.save(fileObj, np.asarray(array))
+                os.replace(temporary, path)
+            except OSError:
+                # A reader may hold the previous file mapped on some platforms, the entry is simply not refreshed.
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                return
+        if evict:
+            self.evict()
+
+    def profile(self, ts, m, algorithm, compute, **parameters):
+        """
+        Returns the (mp, mpIndex) of ts from the cache, computing and storing it on a miss.
+
+        Parameters
+        ----------
+        ts: Time series, or 2-D array of series, the profile is computed from.
+        m: Length of subsequence to compare.
+        algorithm: Name of the algorithm producing the profile.
+        compute: Callable without arguments returning (mp, mpIndex).
+        parameters: Any other argument changing the result.
+        """
+        key = self.key(ts, m, algorithm, **parameters)
+        cached = self.load(key)
+        if cached is not None:
+            return cached
+        mp, mpIndex = compute()
+        self.store(key, mp, mpIndex)
+        return (mp, mpIndex)
+
+    def _entries(self):
+        """
+        Returns the list of (access time, bytes, key) of the complete entries.
+        """
+        sizes = {}
+        accessed = {}
+        try:
+            files = list(os.scandir(self.directory))
+        except OSError:
+            return []
+        for entry in files:
+            for suffix in ('.mp.npy', '.index.npy'):
+                if entry.name.endswith(suffix):
+                    key = entry.name[:-len(suffix)]
+                    try:
+                        info = entry.stat()
+                    except OSError:
+                        continue
+                    sizes[key] = sizes.get(key, 0) + info.st_size
+                    if suffix == '.mp.npy':
+                        accessed[key] = info.st_mtime
+        return [(accessed[key], sizes[key], key) for key in accessed]
+
+    def size(self):
+        """
+        Returns the number of bytes used by the cache entries.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits within maxBytes.
+        """
+        if self.maxBytes is None:
+            return
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.maxBytes:
+                break
+            self.invalidate(key)
+            total -= size
+
+    def invalidate(self, key=None):
+        """
+        Removes one entry, or every entry when key is None.
+
+        Parameters
+        ----------
+        key: Key returned by key().
+        """
+        keys = [key] if key is not None else [entry for _, _, entry in self._entries()]
+        for entry in keys:
+            for path in self._paths(entry):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def defaultCache():
+    """
+    Returns the process wide cache in the default directory, created on first use.
+    """
+    global _defaultCache
+    if _defaultCache is None:
+        _defaultCache = ProfileCache()
+    return _defaultCache
@@ -27,14 +27,13 @@ def discords(mp, ex_zone, k=3):
     k = len(mp) if k > len(mp) else k
 
     mp_current = np.copy(mp)
-    d = np.zeros(k, dtype='int')
+    d = np.zeros(k, dtype=np.int64)
     for i in range(k):
-        maxVal = 0
-        maxIdx = sys.maxsize
-        for j, val in enumerate(mp_current):
-            if not np.isinf(val) and val > maxVal:
-                maxVal = val
-                maxIdx = j
+        # First position of the largest finite positive value, as a scan with a strict comparison would find.
+        candidates = np.where(np.isfinite(mp_current), mp_current, 0)
+        maxIdx = int(np.argmax(candidates))
+        if not candidates[maxIdx] > 0:
+            maxIdx = sys.maxsize
 
         d[i] = maxIdx
         mp_current[max([maxIdx - ex_zone, 0]):min([maxIdx + ex_zone, len(mp_current)])] = np.inf
@@ -48,7 +48,7 @@ def naiveDistanceProfile(tsA, idx, m, tsB=None):
 
         dp[trivialMatchRange[0]: trivialMatchRange[1]] = numpy.inf
 
-    return (dp, numpy.full(n - m + 1, idx, dtype=numpy.float128))
+    return (dp, numpy.full(n - m + 1, idx, dtype=indexDtype(n - m + 1)))
 
 
 def massDistanceProfile(tsA, idx, m, tsB=None):
@@ -77,7 +77,7 @@ def massDistanceProfile(tsA, idx, m, tsB=None):
         distanceProfile[trivialMatchRange[0]:trivialMatchRange[1]] = numpy.inf
 
     # Both the distance profile and corresponding matrix profile index (which should just have the current index)
-    return (distanceProfile, numpy.full(n - m + 1, idx, dtype=numpy.float128))
+    return (distanceProfile, numpy.full(n - m + 1, idx, dtype=indexDtype(n - m + 1)))
 
 
 def mass_distance_profile_parallel(indices, tsA=None, tsB=None, m=None):
@@ -123,18 +123,16 @@ def STOMPDistanceProfile(tsA, idx, m, tsB, dot_first, dp, mean, std):
     query = tsA[idx:(idx + m)]
     n = len(tsB)
 
-    # Calculate the first distance profile via MASS
-    if idx >= 0:
-        distanceProfile = numpy.real(numpy.sqrt(mass(query, tsB).astype(complex)))
-
-        # Currently re-calculating the dot product separately as opposed to updating all of the mass function...
+    # Calculate the first distance profile via the FFT sliding dot product, or whenever the shortcut is not available
+    if idx == 0 or dp is None or dot_first is None or not selfJoin:
         dot = slidingDotProduct(query, tsB)
+        if mean is None or std is None or not selfJoin:
+            mean, std = movmeanstd(tsB, m)
 
     # Calculate all subsequent distance profiles using the STOMP dot product shortcut
     else:
-        res, dot = massStomp(query, tsB, dot_first, dp, idx, mean, std)
-        distanceProfile = numpy.real(numpy.sqrt(res.astype(complex)))
-    # print(distanceProfile)
+        dot = DotProductStomp(tsB, m, dot_first, dp, idx)
+    distanceProfile = numpy.real(numpy.sqrt(massFromDot(query, dot, mean, std).astype(complex)))
 
     distanceProfile = _clean_nan_inf(distanceProfile)
 
@@ -146,7 +144,7 @@ def STOMPDistanceProfile(tsA, idx, m, tsB, dot_first, dp, mean, std):
     distanceProfile = _clean_nan_inf(distanceProfile)
 
     # Both the distance profile and corresponding matrix profile index (which should just have the current index)
-    return (distanceProfile, numpy.full(n - m + 1, idx, dtype=numpy.float128)), dot
+    return (distanceProfile, numpy.full(n - m + 1, idx, dtype=indexDtype(n - m + 1))), dot
 
 
 if __name__ == "__main__":
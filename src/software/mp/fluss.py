@@ -45,6 +45,9 @@ def fluss(mpi, m=None):
     # find the number of additional arcs starting to cross over each index
     for i in range(0, n):
         mpi_val = mpi[i]
+        # -1 marks a subsequence without any neighbor, it has no arc
+        if mpi_val < 0:
+            continue
         small = int(min(i, mpi_val))
         large = int(max(i, mpi_val))
         nnmark[small + 1] = nnmark[small + 1] + 1
@@ -9,9 +9,10 @@ from __future__ import absolute_import, division, print_function, \
 
 from . import distanceProfile
 from . import order
-from .utils import movmeanstd
+from .utils import movmeanstd, slidingDotProduct, is_self_join, indexDtype
 import numpy as np
 import multiprocessing
+from multiprocessing import shared_memory
 from functools import partial
 import math
 
@@ -69,24 +70,25 @@ def _clean_nan_inf(ts):
     return ts
 
 
-def _self_join_or_not_preprocess(tsA, tsB, m):
+def _self_join_or_not_preprocess(tsA, tsB, m, dtype=np.float64):
     """
     Core method for determining if a self join is occuring and returns appropriate
-    profile and index numpy arrays with correct dimensions as all np.nan values.
+    profile and index numpy arrays with correct dimensions, the profile as all np.inf values and the index as all -1.
 
     Parameters
     ----------
     tsA: Time series containing the queries for which to calculate the Matrix Profile.
     tsB: Time series to compare the query against. Note that, if no value is provided, ts_b = ts_a by default.
     m: Length of subsequence to compare.
+    dtype: Floating point type of the profile.
     """
     if tsB is not None:
-        n = tsB.size
+        n = np.size(tsB)
     else:
-        n = tsA.size
+        n = np.size(tsA)
     shape = n - m + 1
 
-    return (np.full(shape, np.inf), np.full(shape, np.inf))
+    return (np.full(shape, np.inf, dtype=dtype), np.full(shape, -1, dtype=indexDtype(shape)))
 
 
 def _matrixProfile(tsA, m, orderClass, distanceProfileFunction, tsB=None):
@@ -128,9 +130,96 @@ def _matrixProfile(tsA, m, orderClass, distanceProfileFunction, tsB=None):
     return (mp, mpIndex)
 
 
+def _shareArray(array):
+    """
+    Copies an array into a new block of shared memory so worker processes can map it instead of receiving a pickled
+    copy. The caller owns the block and must close and unlink it.
+
+    Parameters
+    ----------
+    array: Numpy array to share.
+
+    Returns the shared memory block and the (name, shape, dtype) descriptor to hand to the workers.
+    """
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attachSharedArray(descriptor):
+    """
+    Maps an array shared with _shareArray without copying it.
+
+    Parameters
+    ----------
+    descriptor: The (name, shape, dtype) descriptor returned by _shareArray.
+
+    Returns the shared memory block, to be closed once the array is no longer referenced, and the array.
+    """
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _reduceProfiles(results):
+    """
+    Merges the (mp, mpIndex) pairs returned by the workers with a single element-wise minimum. Ties resolve to the
+    first worker, as the serial merge did.
+
+    Parameters
+    ----------
+    results: List of (mp, mpIndex) pairs of equal length.
+    """
+    profiles = np.vstack([profile for profile, _ in results])
+    indices = np.vstack([index for _, index in results])
+    best = np.argmin(profiles, axis=0)
+    columns = np.arange(profiles.shape[1])
+    return (profiles[best, columns], indices[best, columns])
+
+
+def _threadCount(n_threads):
+    """
+    Resolves the n_threads argument, where -1 means all CPU cores.
+    """
+    if n_threads == -1:
+        return multiprocessing.cpu_count()
+    return max(1, int(n_threads))
+
+
+def _stamp_worker(indices, descriptorA, descriptorB, m):
+    """
+    Computes the distance profiles of the given queries against the shared series and keeps only a running
+    (mp, mpIndex) pair, so a worker returns O(n) values whatever the number of queries.
+
+    Parameters
+    ----------
+    indices: Array of query indices to compute distance profile for.
+    descriptorA: Shared memory descriptor of the time series containing the queries.
+    descriptorB: Shared memory descriptor of the time series to compare against, None for a self join.
+    m: Length of query.
+    """
+    blockA, tsA = _attachSharedArray(descriptorA)
+    blockB, tsB = (None, tsA) if descriptorB is None else _attachSharedArray(descriptorB)
+    try:
+        mp, mpIndex = _self_join_or_not_preprocess(tsA, tsB, m)
+        for index in indices:
+            profile, _ = distanceProfile.massDistanceProfile(tsA, index, m, tsB=tsB)
+            idsToUpdate = profile < mp
+            mp[idsToUpdate] = profile[idsToUpdate]
+            mpIndex[idsToUpdate] = index
+    finally:
+        del tsA, tsB
+        blockA.close()
+        if blockB is not None:
+            blockB.close()
+    return (mp, mpIndex)
+
+
 def _stamp_parallel(tsA, m, tsB=None, sampling=0.2, n_threads=-1, random_state=None):
     """
-    Computes distance profiles in parallel using all CPU cores by default.
+    Computes distance profiles in parallel using all CPU cores by default. The series are placed in shared memory and
+    every worker returns its own running (mp, mpIndex) pair, which are merged with a single reduction.
 
     Parameters
     ----------
@@ -141,17 +230,13 @@ def _stamp_parallel(tsA, m, tsB=None, sampling=0.2, n_threads=-1, random_state=N
     n_threads: Number of threads to use in parallel mode. Defaults to using all CPU cores.
     random_state: Set the random seed generator for reproducible results.
     """
-    if n_threads == -1:
-        n_threads = multiprocessing.cpu_count()
+    n_threads = _threadCount(n_threads)
 
     n = len(tsA)
-    mp, mpIndex = _self_join_or_not_preprocess(tsA, tsB, m)
-
-    if not is_array_like(tsB):
-        tsB = tsA
 
+    selfJoin = not is_array_like(tsB)
     tsA = _clean_nan_inf(tsA)
-    tsB = _clean_nan_inf(tsB)
+    tsB = tsA if selfJoin else _clean_nan_inf(tsB)
 
     # determine sampling size
     sample_size = math.ceil((n - m + 1) * sampling)
@@ -165,24 +250,26 @@ def _stamp_parallel(tsA, m, tsB=None, sampling=0.2, n_threads=-1, random_state=N
     indices = np.array_split(indices, n_threads)
 
     # create pool of workers and compute
-    with multiprocessing.Pool(processes=n_threads) as pool:
-        func = partial(distanceProfile.mass_distance_profile_parallel, tsA=tsA, tsB=tsB, m=m)
-        results = pool.map(func, indices)
+    blocks = []
+    try:
+        blockA, descriptorA = _shareArray(tsA)
+        blocks.append(blockA)
+        # A self join maps the same block as tsB, as the sequential stamp compares against tsB = tsA.
+        descriptorB = None
+        if not selfJoin:
+            blockB, descriptorB = _shareArray(tsB)
+            blocks.append(blockB)
+        with multiprocessing.Pool(processes=n_threads) as pool:
+            func = partial(_stamp_worker, descriptorA=descriptorA, descriptorB=descriptorB, m=m)
+            results = pool.map(func, indices)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
 
     # The overall matrix profile is the element-wise minimum of each sub-profile, and each element of the overall
     # matrix profile index is the time series position of the corresponding sub-profile.
-    for result in results:
-        for dp, querySegmentsID in result:
-            # Check which of the indices have found a new minimum
-            idsToUpdate = dp < mp
-
-            # Update the Matrix Profile Index to indicate that the current index is the minimum location for the aforementioned indices
-            mpIndex[idsToUpdate] = querySegmentsID[idsToUpdate]
-
-            # Update the matrix profile to include the new minimum values (where appropriate)
-            mp = np.minimum(mp, dp)
-
-    return (mp, mpIndex)
+    return _reduceProfiles(results)
 
 
 def _matrixProfile_sampling(tsA, m, orderClass, distanceProfileFunction, tsB=None, sampling=0.2, random_state=None):
@@ -219,52 +306,381 @@ def _matrixProfile_sampling(tsA, m, orderClass, distanceProfileFunction, tsB=Non
     return (mp, mpIndex)
 
 
-# Write matrix profile function for STOMP and then consolidate later! (aka link to the previous distance profile)
-def _matrixProfile_stomp(tsA, m, orderClass, distanceProfileFunction, tsB=None):
-    orderObj = orderClass(len(tsA) - m + 1)
-    mp, mpIndex = _self_join_or_not_preprocess(tsA, tsB, m)
+def _constantWindows(ts, m):
+    """
+    Flags the subsequences of length m whose values are all equal. Rounding in movmeanstd leaves small non zero
+    deviations on such windows, so they are found from the series itself.
 
-    if (not is_array_like(tsB)) or (tsB is None):
-        tsB = tsA
+    Parameters
+    ----------
+    ts: Cleaned time series.
+    m: Length of subsequence to compare.
+    """
+    changes = np.concatenate(([0], np.cumsum(ts[1:] != ts[:-1])))
+    return changes[m - 1:] == changes[:len(ts) - m + 1]
 
-    tsA = _clean_nan_inf(tsA)
-    tsB = _clean_nan_inf(tsB)
 
-    idx = orderObj.next()
+def _stompStatistics(tsA, tsB, m, dtype=np.float64):
+    """
+    Computes the moving statistics used by the STOMP engine with the same conventions as utils.mass: population
+    deviation for the profile side, sample deviation for the query side and zero deviations replaced by machine epsilon.
+    The constant window flags of both series are returned last, (meanA, queryStd, meanB, stdB, constantA, constantB).
 
-    # Get moving mean and standard deviation
-    mean, std = movmeanstd(tsA, m)
+    Parameters
+    ----------
+    tsA: Time series containing the queries.
+    tsB: Time series to compare the queries against.
+    m: Length of subsequence to compare.
+    dtype: Floating point type of the statistics.
+    """
+    numericalResolution = np.finfo(float).eps
+    meanA, stdA = movmeanstd(tsA, m)
+    # The means stay in double precision since the numerator dot - m * meanB * meanA cancels catastrophically.
+    meanA = np.asarray(meanA, dtype=np.float64)
+    queryStd = np.asarray(stdA, dtype=np.float64) * math.sqrt(m / (m - 1))
+    queryStd[queryStd == 0.0] = numericalResolution
+    queryStd = queryStd.astype(dtype)
+
+    if tsB is tsA:
+        meanB = meanA
+        stdB = np.array(stdA, dtype=np.float64)
+    else:
+        meanB, stdB = movmeanstd(tsB, m)
+        meanB = np.asarray(meanB, dtype=np.float64)
+        stdB = np.array(stdB, dtype=np.float64)
+    stdB[stdB == 0.0] = numericalResolution
+    constantA = _constantWindows(tsA, m)
+    constantB = constantA if tsB is tsA else _constantWindows(tsB, m)
 
-    # Initialize code to set dot_prev to None for the first pass
-    dp = None
+    return meanA, queryStd, meanB, stdB.astype(dtype), constantA, constantB
 
-    # Initialize dot_first to None for the first pass
-    dot_first = None
 
-    while idx is not None:
+def _trivialMatchZone(m):
+    """
+    Returns the number of columns excluded before and after the query in a self join, (before, after), matching the
+    trivial match range of the distance profile functions.
 
-        # Need to pass in the previous sliding dot product for subsequent distance profile calculations
-        (distanceProfileMatrix, querySegmentsID), dot_prev = distanceProfileFunction(tsA, idx, m, tsB, dot_first, dp,
-                                                                                     mean, std)
+    Parameters
+    ----------
+    m: Length of subsequence to compare.
+    """
+    return int(np.round(m / 2, 0)), int(np.round(m / 2 + 1, 0))
 
-        if idx == 0:
-            dot_first = dot_prev
 
-        # Check which of the indices have found a new minimum
-        idsToUpdate = distanceProfileMatrix < mp
+def _stompConstantDistance(distance, m, queryConstant, columnsConstant):
+    """
+    Replaces the distances involving constant subsequences, whose z-normalization is undefined: two constant windows
+    are at distance zero and a constant window is at the uncorrelated distance 2 * m of any other window.
 
-        # Update the Matrix Profile Index to indicate that the current index is the minimum location for the aforementioned indices
-        mpIndex[idsToUpdate] = querySegmentsID[idsToUpdate]
+    Parameters
+    ----------
+    distance: Squared distances of one query, updated in place.
+    m: Length of subsequence to compare.
+    queryConstant: True when the query is constant.
+    columnsConstant: Constant window flags of the columns of distance.
+    """
+    if queryConstant:
+        distance.fill(2.0 * m)
+        np.copyto(distance, 0.0, where=columnsConstant)
+    else:
+        np.copyto(distance, 2.0 * m, where=columnsConstant)
+    return distance
 
-        # Update the matrix profile to include the new minimum values (where appropriate)
-        mp = np.minimum(mp, distanceProfileMatrix)
-        idx = orderObj.next()
 
-        dp = dot_prev
+def _stompDistance(mpSquared):
+    """
+    Converts squared z-normalized distances of the STOMP engine to the values reported by massDistanceProfile, so both
+    paths produce interchangeable profiles.
 
-        # print('mp:', mp)
+    Parameters
+    ----------
+    mpSquared: Squared distances, clipped at zero.
+    """
+    return np.sqrt(np.sqrt(mpSquared))
 
-    return (mp, mpIndex)
+
+def _stompSelfJoinBand(ts, m, stats, firstRow, bandStart, bandStop, mpSquared, mpIndex):
+    """
+    Runs STOMP over the diagonals bandStart <= j - i < bandStop of a self join. Every diagonal keeps its dot product
+    up to date in O(1) per cell, and each distance updates both mp[j] (query i) and mp[i] (query j) since the self join
+    is symmetric, so only the upper triangle is visited.
+
+    Parameters
+    ----------
+    ts: Cleaned time series.
+    m: Length of subsequence to compare.
+    stats: Tuple returned by _stompStatistics.
+    firstRow: Sliding dot product of the first subsequence against ts.
+    bandStart: First diagonal of the band, at least one.
+    bandStop: Diagonal after the last one of the band.
+    mpSquared: Running squared matrix profile, updated in place.
+    mpIndex: Running matrix profile index, updated in place.
+    """
+    meanA, queryStd, meanB, stdB, constantA, constantB = stats
+    anyConstant = bool(np.any(constantB))
+    profileLen = len(ts) - m + 1
+    bandStop = min(bandStop, profileLen)
+    if bandStart >= bandStop:
+        return mpSquared, mpIndex
+
+    zoneBefore, zoneAfter = _trivialMatchZone(m)
+    # Offsets within the band of the first cell allowed to update the column (mp[j]) and the row (mp[i]).
+    columnSkip = max(0, zoneAfter - bandStart)
+    rowSkip = max(0, zoneBefore + 1 - bandStart)
+
+    mMeanB = m * meanB
+    invStdB = 1.0 / stdB
+    dot = np.array(firstRow[bandStart:bandStop], dtype=np.float64)
+    res = np.empty(len(dot), dtype=mpSquared.dtype)
+    scratch = np.empty_like(dot)
+    update = np.empty(len(dot), dtype=bool)
+
+    for i in range(profileLen - bandStart):
+        width = min(bandStop, profileLen - i) - bandStart
+        first = i + bandStart
+        if i > 0:
+            # QT(i, j) = QT(i - 1, j - 1) - t(i - 1) * t(j - 1) + t(i + m - 1) * t(j + m - 1)
+            np.multiply(ts[first - 1:first - 1 + width], ts[i - 1], out=scratch[:width])
+            dot[:width] -= scratch[:width]
+            np.multiply(ts[first + m - 1:first + m - 1 + width], ts[i + m - 1], out=scratch[:width])
+            dot[:width] += scratch[:width]
+
+        distance = res[:width]
+        numerator = scratch[:width]
+        np.multiply(mMeanB[first:first + width], meanA[i], out=numerator)
+        np.subtract(dot[:width], numerator, out=numerator)
+        np.multiply(numerator, invStdB[first:first + width], out=distance, casting='same_kind')
+        distance *= -2.0 / queryStd[i]
+        distance += 2.0 * m
+        np.maximum(distance, 0.0, out=distance)
+        if anyConstant:
+            _stompConstantDistance(distance, m, constantA[i], constantB[first:first + width])
+
+        if columnSkip < width:
+            columns = slice(first + columnSkip, first + width)
+            found = update[columnSkip:width]
+            np.less(distance[columnSkip:], mpSquared[columns], out=found)
+            np.copyto(mpSquared[columns], distance[columnSkip:], where=found)
+            np.copyto(mpIndex[columns], i, where=found)
+
+        if rowSkip < width:
+            nearest = rowSkip + int(np.argmin(distance[rowSkip:]))
+            if distance[nearest] < mpSquared[i]:
+                mpSquared[i] = distance[nearest]
+                mpIndex[i] = first + nearest
+
+    return mpSquared, mpIndex
+
+
+def _stompRows(tsA, tsB, m, stats, firstColumn, rowStart, rowStop, mpSquared, mpIndex):
+    """
+    Runs STOMP over the queries rowStart <= i < rowStop of tsA against tsB. The first row costs one FFT, every following
+    row is derived from the previous one with a vectorized O(1) per cell update.
+
+    Parameters
+    ----------
+    tsA: Cleaned time series containing the queries.
+    tsB: Cleaned time series to compare the queries against.
+    m: Length of subsequence to compare.
+    stats: Tuple returned by _stompStatistics.
+    firstColumn: Sliding dot product of the first subsequence of tsB against tsA.
+    rowStart: First query of the block.
+    rowStop: Query after the last one of the block.
+    mpSquared: Running squared matrix profile, updated in place.
+    mpIndex: Running matrix profile index, updated in place.
+    """
+    meanA, queryStd, meanB, stdB, constantA, constantB = stats
+    anyConstant = bool(np.any(constantA[rowStart:rowStop])) or bool(np.any(constantB))
+    profileLen = len(tsB) - m + 1
+    if rowStart >= rowStop:
+        return mpSquared, mpIndex
+
+    mMeanB = m * meanB
+    invStdB = 1.0 / stdB
+    dot = np.array(slidingDotProduct(tsA[rowStart:rowStart + m], tsB)[:profileLen], dtype=np.float64)
+    previous = np.empty_like(dot)
+    distance = np.empty(profileLen, dtype=mpSquared.dtype)
+    scratch = np.empty(profileLen, dtype=np.float64)
+    update = np.empty(profileLen, dtype=bool)
+
+    for i in range(rowStart, rowStop):
+        if i > rowStart:
+            dot, previous = previous, dot
+            # QT(i, j) = QT(i - 1, j - 1) - a(i - 1) * b(j - 1) + a(i + m - 1) * b(j + m - 1)
+            np.multiply(tsB[:profileLen - 1], tsA[i - 1], out=scratch[1:])
+            np.subtract(previous[:-1], scratch[1:], out=dot[1:])
+            np.multiply(tsB[m:m + profileLen - 1], tsA[i + m - 1], out=scratch[1:])
+            dot[1:] += scratch[1:]
+            dot[0] = firstColumn[i]
+
+        np.multiply(mMeanB, meanA[i], out=scratch)
+        np.subtract(dot, scratch, out=scratch)
+        np.multiply(scratch, invStdB, out=distance, casting='same_kind')
+        distance *= -2.0 / queryStd[i]
+        distance += 2.0 * m
+        np.maximum(distance, 0.0, out=distance)
+        if anyConstant:
+            _stompConstantDistance(distance, m, constantA[i], constantB)
+
+        np.less(distance, mpSquared, out=update)
+        np.copyto(mpSquared, distance, where=update)
+        np.copyto(mpIndex, i, where=update)
+
+    return mpSquared, mpIndex
+
+
+def _diagonalBands(bandStart, profileLen, count):
+    """
+    Splits the diagonals bandStart <= j - i < profileLen of a self join into at most count bands holding about the same
+    number of cells.
+
+    Parameters
+    ----------
+    bandStart: First diagonal outside of the trivial match zone.
+    profileLen: Length of the matrix profile.
+    count: Number of bands wanted.
+    """
+    if bandStart >= profileLen:
+        return []
+    cells = np.cumsum(profileLen - np.arange(bandStart, profileLen))
+    cuts = np.searchsorted(cells, cells[-1] * np.arange(1, count) / count, side='right')
+    edges = np.unique(np.concatenate([[bandStart], bandStart + cuts, [profileLen]]))
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:])]
+
+
+def _stomp_band_worker(band, descriptor, m, dtype=np.float64):
+    """
+    Runs STOMP over one band of diagonals of the shared series and returns the band's own running squared (mp, mpIndex).
+
+    Parameters
+    ----------
+    band: Tuple (first diagonal, diagonal after the last one).
+    descriptor: Shared memory descriptor of the cleaned time series.
+    m: Length of subsequence to compare.
+    dtype: Floating point type of the profile.
+    """
+    block, ts = _attachSharedArray(descriptor)
+    try:
+        mpSquared, mpIndex = _self_join_or_not_preprocess(ts, None, m, dtype=dtype)
+        stats = _stompStatistics(ts, ts, m, dtype=dtype)
+        firstRow = slidingDotProduct(ts[:m], ts)
+        _stompSelfJoinBand(ts, m, stats, firstRow, band[0], band[1], mpSquared, mpIndex)
+    finally:
+        del ts
+        block.close()
+    return (mpSquared, mpIndex)
+
+
+def _stomp_rows_worker(rows, descriptorA, descriptorB, m, dtype=np.float64):
+    """
+    Runs STOMP over one block of queries of the shared series and returns the block's own running squared
+    (mp, mpIndex).
+
+    Parameters
+    ----------
+    rows: Tuple (first query, query after the last one).
+    descriptorA: Shared memory descriptor of the cleaned time series containing the queries.
+    descriptorB: Shared memory descriptor of the cleaned time series to compare the queries against.
+    m: Length of subsequence to compare.
+    dtype: Floating point type of the profile.
+    """
+    blockA, tsA = _attachSharedArray(descriptorA)
+    blockB, tsB = _attachSharedArray(descriptorB)
+    try:
+        mpSquared, mpIndex = _self_join_or_not_preprocess(tsA, tsB, m, dtype=dtype)
+        stats = _stompStatistics(tsA, tsB, m, dtype=dtype)
+        firstColumn = slidingDotProduct(tsB[:m], tsA)
+        _stompRows(tsA, tsB, m, stats, firstColumn, rows[0], rows[1], mpSquared, mpIndex)
+    finally:
+        del tsA, tsB
+        blockA.close()
+        blockB.close()
+    return (mpSquared, mpIndex)
+
+
+def _stomp_parallel(tsA, m, tsB, selfJoin, n_threads=-1, dtype=np.float64):
+    """
+    Computes the STOMP Matrix Profile in parallel. The series live in shared memory, a self join is partitioned into
+    bands of diagonals of equal work and an AB join into blocks of queries. Each worker returns a single running
+    (mp, mpIndex) pair, so memory stays O(n * workers).
+
+    Parameters
+    ----------
+    tsA: Cleaned time series containing the queries.
+    m: Length of subsequence to compare.
+    tsB: Cleaned time series to compare the queries against.
+    selfJoin: True when tsB is tsA.
+    n_threads: Number of processes, -1 to use all CPU cores.
+    dtype: Floating point type of the profile.
+    """
+    n_threads = _threadCount(n_threads)
+    profileLen = len(tsB) - m + 1
+
+    blocks = []
+    try:
+        blockA, descriptorA = _shareArray(tsA)
+        blocks.append(blockA)
+        if selfJoin:
+            zoneBefore, zoneAfter = _trivialMatchZone(m)
+            parts = _diagonalBands(min(zoneAfter, zoneBefore + 1), profileLen, n_threads)
+            func = partial(_stomp_band_worker, descriptor=descriptorA, m=m, dtype=dtype)
+        else:
+            blockB, descriptorB = _shareArray(tsB)
+            blocks.append(blockB)
+            rows = np.array_split(np.arange(len(tsA) - m + 1), n_threads)
+            parts = [(int(part[0]), int(part[-1]) + 1) for part in rows if len(part) > 0]
+            func = partial(_stomp_rows_worker, descriptorA=descriptorA, descriptorB=descriptorB, m=m, dtype=dtype)
+
+        if len(parts) == 0:
+            return _self_join_or_not_preprocess(tsA, None if selfJoin else tsB, m, dtype=dtype)
+        with multiprocessing.Pool(processes=min(n_threads, len(parts))) as pool:
+            results = pool.map(func, parts)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return _reduceProfiles(results)
+
+
+def _matrixProfile_stomp(tsA, m, tsB=None, n_threads=None, dtype=np.float64):
+    """
+    Core method for calculating the Matrix Profile with the STOMP engine: a single FFT for the first row (and the first
+    column of an AB join) followed by rolling dot product updates reusing the movmeanstd statistics.
+
+    Parameters
+    ----------
+    tsA: Time series containing the queries for which to calculate the Matrix Profile.
+    m: Length of subsequence to compare.
+    tsB: Time series to compare the query against. Note that, if no value is provided, tsB = tsA by default.
+    n_threads: Number of processes to use in parallel mode. Defaults to single threaded mode. Set to -1 to use all cores.
+    dtype: Floating point type of the profile and moving statistics, numpy.float64 or numpy.float32.
+    """
+    dtype = np.dtype(dtype).type
+    if dtype not in (np.float64, np.float32):
+        raise ValueError('Matrix profile dtype must be numpy.float64 or numpy.float32.')
+    mp, mpIndex = _self_join_or_not_preprocess(tsA, tsB, m, dtype=dtype)
+
+    if (not is_array_like(tsB)) or (tsB is None):
+        tsB = tsA
+
+    tsA = _clean_nan_inf(tsA).astype(np.float64)
+    tsB = _clean_nan_inf(tsB).astype(np.float64)
+    selfJoin = is_self_join(tsA, tsB)
+
+    if n_threads is not None:
+        mp, mpIndex = _stomp_parallel(tsA, m, tsA if selfJoin else tsB, selfJoin, n_threads=n_threads, dtype=dtype)
+    elif selfJoin:
+        stats = _stompStatistics(tsA, tsA, m, dtype=dtype)
+        firstRow = slidingDotProduct(tsA[:m], tsA)
+        bandStart = min(_trivialMatchZone(m)[1], _trivialMatchZone(m)[0] + 1)
+        _stompSelfJoinBand(tsA, m, stats, firstRow, bandStart, len(mp), mp, mpIndex)
+    else:
+        stats = _stompStatistics(tsA, tsB, m, dtype=dtype)
+        firstColumn = slidingDotProduct(tsB[:m], tsA)
+        _stompRows(tsA, tsB, m, stats, firstColumn, 0, len(tsA) - m + 1, mp, mpIndex)
+
+    return (_stompDistance(mp), mpIndex)
 
 
 def _distanceProfile_stomp(tsA, m, orderClass, distanceProfileFunction, tsB=None):
@@ -312,14 +728,15 @@ def _distanceProfile_stomp(tsA, m, orderClass, distanceProfileFunction, tsB=None
 
 
 def stampi_update(tsA, m, mp, mpIndex, newval, tsB=None, distanceProfileFunction=distanceProfile.massDistanceProfile):
-    """Updates the self-matched matrix profile for a time series TsA with the arrival of a new data point newval. Note that comparison of two separate time-series with new data arriving will be built later -> currently, tsB should be set to tsA"""
+    """Updates the self-matched matrix profile for a time series TsA with the arrival of a new data point newval. Note that comparison of two separate time-series with new data arriving will be built later -> currently, tsB should be set to tsA
+    Every call copies the series and profile, live streams should use streaming.StreamingMatrixProfile instead."""
 
     # Update time-series array with recent value
     tsA_new = np.append(np.copy(tsA), newval)
 
     # Expand matrix profile and matrix profile index to include space for latest point
     mp_new = np.append(np.copy(mp), np.inf)
-    mpIndex_new = np.append(np.copy(mpIndex), np.inf)
+    mpIndex_new = np.append(np.copy(mpIndex), -1).astype(indexDtype(len(mpIndex) + 1))
 
     # Determine new index value
     idx = len(tsA_new) - m
@@ -391,7 +808,7 @@ def stamp(tsA, m, tsB=None, sampling=0.2, n_threads=None, random_state=None):
     return _stamp_parallel(tsA, m, tsB=tsB, sampling=sampling, n_threads=n_threads, random_state=random_state)
 
 
-def stomp(tsA, m, tsB=None):
+def stomp(tsA, m, tsB=None, n_threads=None, dtype=np.float64):
     """
     Calculate the Matrix Profile using the more efficient MASS calculation. Distance profiles are computed according to the directed STOMP procedure.
 
@@ -400,8 +817,16 @@ def stomp(tsA, m, tsB=None):
     tsA: Time series containing the queries for which to calculate the Matrix Profile.
     m: Length of subsequence to compare.
     tsB: Time series to compare the query against. Note that, if no value is provided, tsB = tsA by default.
+    n_threads: Number of processes to use in parallel mode. Defaults to single threaded mode. Set to -1 to use all cores.
+    dtype: numpy.float64 (default) or numpy.float32. In float32 mode the profile and the moving statistics are kept in
+        single precision, halving their memory, while the rolling dot products and moving means stay in double
+        precision. The squared distance then carries an absolute error below about 4 * m * 2**-23 (4.8e-7 * m), so a
+        reported profile value v is accurate to about that error / (4 * v ** 3); use float64 when nearly identical
+        subsequences must be ranked.
+
+    Returns (mp, mpIndex) where mpIndex is an int32 array (int64 beyond 2**31 subsequences), -1 without a neighbor.
     """
-    return _matrixProfile_stomp(tsA, m, order.linearOrder, distanceProfile.STOMPDistanceProfile, tsB)
+    return _matrixProfile_stomp(tsA, m, tsB, n_threads=n_threads, dtype=dtype)
 
 
 def DP(tsA, m, tsB=None):
@@ -58,7 +58,7 @@ def motifs(ts, mp, max_motifs=3, radius=2, n_neighbors=None, ex_zone=None):
         motif_set = set()
         initial_motif = [min_idx]
         pair_idx = int(mp[1][min_idx])
-        if mp_current[pair_idx] != np.inf:
+        if pair_idx >= 0 and mp_current[pair_idx] != np.inf:
             initial_motif += [pair_idx]
 
         motif_set = set(initial_motif)
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Joseph Tarango
+# *****************************************************************************/
+"""
+Multidimensional (mSTAMP) matrix profile of several equal length fields analysed jointly, such as correlated error
+counters of one telemetry object. Row k - 1 of the profile holds, for every subsequence, the smallest average distance
+over its best k dimensions: at each pair the per dimension distances are sorted and averaged cumulatively, so a single
+pass answers every k. The dot products follow the STOMP recurrence along the diagonals of all dimensions at once, and
+the moving statistics and first rows share the batched computations of batchProfile.
+
+Yeh, Chin-Chia Michael, Nickolas Kavantzas, and Eamonn Keogh. "Matrix Profile VI: Meaningful Multidimensional Motif
+Discovery." ICDM 2017.
+"""
+from __future__ import absolute_import, division, print_function, \
+    unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
+
+import sys
+import numpy as np
+
+from .batchProfile import _batchStatistics, _batchFirstRows
+from .matrixProfile import _trivialMatchZone, _stompDistance
+from .discords import discords
+from .utils import indexDtype
+
+
+def _pairDistances(fields, m, index, neighbor):
+    """
+    Returns the per dimension distance between the subsequences at index and neighbor, in the units of the profile.
+
+    Parameters
+    ----------
+    fields: 2-D array of cleaned time series, one dimension per row.
+    m: Length of subsequence to compare.
+    index: Start of the first subsequence.
+    neighbor: Start of the second subsequence.
+    """
+    mean, queryStd, std = _batchStatistics(fields[:, index:index + m], m)
+    meanB, _, stdB = _batchStatistics(fields[:, neighbor:neighbor + m], m)
+    dot = np.sum(fields[:, index:index + m] * fields[:, neighbor:neighbor + m], axis=1)
+    squared = 2.0 * m - 2.0 * (dot - m * mean[:, 0] * meanB[:, 0]) / (queryStd[:, 0] * stdB[:, 0])
+    return _stompDistance(np.maximum(squared, 0.0))
+
+
+def mstomp(fields, m):
+    """
+    Calculates the self join multidimensional Matrix Profile of fields with the STOMP engine, visiting every pair once.
+    The one dimensional profile of a single field matches matrixProfile.stomp().
+
+    Parameters
+    ----------
+    fields: 2-D array like of equal length time series, one dimension per row. nan and inf values are replaced with
+            zeros.
+    m: Length of subsequence to compare.
+
+    Returns (mp, mpIndex) as 2-D arrays where row k - 1 is the profile using the best k dimensions.
+    """
+    fields = np.array(fields, dtype=np.float64, ndmin=2)
+    if fields.ndim != 2:
+        raise ValueError('Fields must be a 2-D array with one time series per row.')
+    if m <= 1:
+        raise ValueError("Query length must be longer than one")
+    if fields.shape[1] < m:
+        raise ValueError('Fields must be at least as long as the query length.')
+    fields[~np.isfinite(fields)] = 0
+
+    dimensions = fields.shape[0]
+    profileLen = fields.shape[1] - m + 1
+    mp = np.full((dimensions, profileLen), np.inf)
+    mpIndex = np.full((dimensions, profileLen), -1, dtype=indexDtype(profileLen))
+
+    zoneBefore, zoneAfter = _trivialMatchZone(m)
+    bandStart = min(zoneAfter, zoneBefore + 1)
+    if bandStart >= profileLen:
+        return mp, mpIndex
+    # Offsets within the row of the first cell allowed to update the column (mp[:, j]) and the row (mp[:, i]).
+    columnSkip = max(0, zoneAfter - bandStart)
+    rowSkip = max(0, zoneBefore + 1 - bandStart)
+
+    mean, queryStd, std = _batchStatistics(fields, m)
+    mMean = m * mean
+    invStd = 1.0 / std
+    dot = np.array(_batchFirstRows(fields, m)[:, bandStart:profileLen])
+    scratch = np.empty_like(dot)
+    counts = np.arange(1, dimensions + 1)[:, np.newaxis]
+
+    for i in range(profileLen - bandStart):
+        width = profileLen - i - bandStart
+        first = i + bandStart
+        if i > 0:
+            # QT(i, j) = QT(i - 1, j - 1) - t(i - 1) * t(j - 1) + t(i + m - 1) * t(j + m - 1), for every dimension
+            np.multiply(fields[:, first - 1:first - 1 + width], fields[:, i - 1:i], out=scratch[:, :width])
+            dot[:, :width] -= scratch[:, :width]
+            np.multiply(fields[:, first + m - 1:first + m - 1 + width], fields[:, i + m - 1:i + m],
+                        out=scratch[:, :width])
+            dot[:, :width] += scratch[:, :width]
+
+        distance = scratch[:, :width]
+        np.multiply(mMean[:, first:first + width], mean[:, i:i + 1], out=distance)
+        np.subtract(dot[:, :width], distance, out=distance)
+        distance *= invStd[:, first:first + width]
+        distance *= -2.0 / queryStd[:, i:i + 1]
+        distance += 2.0 * m
+        np.maximum(distance, 0.0, out=distance)
+        distance = _stompDistance(distance)
+
+        # Average distance over the best k dimensions of each pair, for every k.
+        distance.sort(axis=0)
+        np.cumsum(distance, axis=0, out=distance)
+        distance /= counts
+
+        if columnSkip < width:
+            columns = slice(first + columnSkip, first + width)
+            found = distance[:, columnSkip:] < mp[:, columns]
+            np.copyto(mp[:, columns], distance[:, columnSkip:], where=found)
+            np.copyto(mpIndex[:, columns], i, where=found)
+
+        if rowSkip < width:
+            nearest = rowSkip + np.argmin(distance[:, rowSkip:], axis=1)
+            best = distance[np.arange(dimensions), nearest]
+            found = best < mp[:, i]
+            mp[found, i] = best[found]
+            mpIndex[found, i] = first + nearest[found]
+
+    return mp, mpIndex
+
+
+def subspace(fields, m, index, neighbor, k):
+    """
+    Returns the k dimensions in which the subsequences at index and neighbor are the closest, the dimensions averaged by
+    row k - 1 of the multidimensional profile.
+
+    Parameters
+    ----------
+    fields: 2-D array like of equal length time series, one dimension per row.
+    m: Length of subsequence to compare.
+    index: Start of the first subsequence.
+    neighbor: Start of the second subsequence.
+    k: Number of dimensions.
+    """
+    fields = np.array(fields, dtype=np.float64, ndmin=2)
+    fields[~np.isfinite(fields)] = 0
+    return np.sort(np.argsort(_pairDistances(fields, m, index, neighbor), kind='stable')[:k])
+
+
+def motifSets(fields, m, mp, mpIndex, max_motifs=3, ex_zone=None):
+    """
+    Computes the top motif pairs of every dimensionality of a multidimensional profile.
+
+    Parameters
+    ----------
+    fields: 2-D array like of equal length time series used to calculate mp.
+    m: Length of subsequence to compare.
+    mp: Multidimensional matrix profile returned by mstomp.
+    mpIndex: Multidimensional matrix profile index returned by mstomp.
+    max_motifs: the maximum number of motifs to discover per dimensionality.
+    ex_zone: the number of samples to exclude on either side of a found motif, defaults to m/2.
+
+    Returns a list with, for k = 1 to the number of dimensions, a list of (index, neighbor, distance, dimensions).
+    """
+    if ex_zone is None:
+        ex_zone = m / 2
+    motifsFound = []
+    for row in range(mp.shape[0]):
+        current = np.copy(mp[row])
+        found = []
+        for _ in range(max_motifs):
+            index = int(np.argmin(current))
+            neighbor = int(mpIndex[row, index])
+            if current[index] == np.inf or neighbor < 0:
+                break
+            found.append((index, neighbor, float(current[index]), subspace(fields, m, index, neighbor, row + 1)))
+            for idx in (index, neighbor):
+                current[int(max(0, idx - ex_zone)):int(idx + ex_zone + 1)] = np.inf
+        motifsFound.append(found)
+    return motifsFound
+
+
+def discordSets(fields, m, mp, mpIndex, max_discords=3, ex_zone=None):
+    """
+    Computes the top discords of every dimensionality of a multidimensional profile.
+
+    Parameters
+    ----------
+    fields: 2-D array like of equal length time series used to calculate mp.
+    m: Length of subsequence to compare.
+    mp: Multidimensional matrix profile returned by mstomp.
+    mpIndex: Multidimensional matrix profile index returned by mstomp.
+    max_discords: the maximum number of discords to discover per dimensionality.
+    ex_zone: the number of samples to exclude on either side of a found discord, defaults to m/2.
+
+    Returns a list with, for k = 1 to the number of dimensions, a list of (index, neighbor, distance, dimensions).
+    """
+    if ex_zone is None:
+        ex_zone = int(m / 2)
+    discordsFound = []
+    for row in range(mp.shape[0]):
+        found = []
+        for index in discords(mp[row], ex_zone, max_discords):
+            if index == sys.maxsize:
+                break
+            neighbor = int(mpIndex[row, index])
+            found.append((int(index), neighbor, float(mp[row, index]), subspace(fields, m, index, neighbor, row + 1)))
+        discordsFound.append(found)
+    return discordsFound
@@ -21,6 +21,7 @@ https://www.cs.ucr.edu/~eamonn/SCRIMP_ICDM_camera_ready_updated.pdf
 from __future__ import absolute_import, division, print_function, \
     unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
 
+import collections
 import math
 import time
 
@@ -28,6 +29,8 @@ import warnings
 
 import numpy as np
 
+from .utils import indexDtype
+
 
 def fast_find_nn_pre(ts, m):
     n = len(ts)
@@ -81,201 +84,255 @@ def calc_profile_len(n, window_size):
     return n - window_size + 1
 
 
-def next_subsequence(ts, idx, m):
-    return ts[idx:idx + m]
-
-
-def calc_exclusion_start(idx, exclusion_zone):
-    return int(np.max([0, idx - exclusion_zone]))
-
-
-def calc_exclusion_stop(idx, exclusion_zone, profile_len):
-    return int(np.min([profile_len, idx + exclusion_zone]))
-
-
-def apply_exclusion_zone(idx, exclusion_zone, profile_len, distance_profile):
-    exc_start = calc_exclusion_start(idx, exclusion_zone)
-    exc_stop = calc_exclusion_stop(idx, exclusion_zone, profile_len)
-    distance_profile[exc_start:exc_stop + 1] = np.inf
-
-    return distance_profile
-
-
-def find_and_store_nn(iteration, idx, matrix_profile, mp_index,
-                      distance_profile):
-    if iteration == 0:
-        matrix_profile = distance_profile
-        mp_index[:] = idx
-    else:
-        update_pos = distance_profile < matrix_profile
-        mp_index[update_pos] = idx
-        matrix_profile[update_pos] = distance_profile[update_pos]
-
-    idx_min = np.argmin(distance_profile)
-    matrix_profile[idx] = distance_profile[idx_min]
-    mp_index[idx] = idx_min
-    idx_nn = mp_index[idx]
-
-    return (matrix_profile, mp_index, idx_nn)
-
-
-def calc_idx_diff(idx, idx_nn):
-    return idx_nn - idx
-
-
-def calc_dotproduct_idx(dotproduct, m, mp, idx, sigmax, idx_nn, meanx):
-    dotproduct[idx] = (m - mp[idx] ** 2 / 2) * \
-                      sigmax[idx] * sigmax[idx_nn] + m * meanx[idx] * meanx[idx_nn]
-
-    return dotproduct
-
-
-def calc_end_idx(profile_len, idx, step_size, idx_diff):
-    return np.min([profile_len - 1, idx + step_size - 1,
-                   profile_len - idx_diff - 1])
-
-
-def calc_dotproduct_end_idx(ts, dp, idx, m, endidx, idx_nn, idx_diff):
-    tmp_a = ts[idx + m:endidx + m]
-    tmp_b = ts[idx_nn + m:endidx + m + idx_diff]
-    tmp_c = ts[idx:endidx]
-    tmp_d = ts[idx_nn:endidx + idx_diff]
-    tmp_f = tmp_a * tmp_b - tmp_c * tmp_d
-
-    dp[idx + 1:endidx + 1] = dp[idx] + np.cumsum(tmp_f)
-
-    return dp
-
+# Number of matrix cells evaluated per NumPy block, bounds the memory of one block to a few tens of MB.
+_BLOCK_ELEMENTS = 2 ** 20
 
-def calc_refine_distance_end_idx(refine_distance, dp, idx, endidx, meanx,
-                                 sigmax, idx_nn, idx_diff, m):
-    tmp_a = dp[idx + 1:endidx + 1]
-    tmp_b = meanx[idx + 1:endidx + 1]
-    tmp_c = meanx[idx_nn + 1:endidx + idx_diff + 1]
-    tmp_d = sigmax[idx + 1:endidx + 1]
-    tmp_e = sigmax[idx_nn + 1:endidx + idx_diff + 1]
-    tmp_f = tmp_b * tmp_c
-    tmp_g = tmp_d * tmp_e
-    tmp_h = (m - (tmp_a - m * tmp_f) / (tmp_g))
-    refine_distance[idx + 1:endidx + 1] = np.sqrt(np.abs(2 * tmp_h))
+ScrimpProgress = collections.namedtuple(
+    "ScrimpProgress", ["phase", "fraction", "updated", "elapsed", "matrix_profile", "mp_index"])
 
-    return refine_distance
 
+def time_is_exceeded(start_time, runtime):
+    """Helper method to determine if the runtime has exceeded or not.
 
-def calc_begin_idx(idx, step_size, idx_diff):
-    return np.max([0, idx - step_size + 1, 2 - idx_diff])
-
-
-def calc_dotproduct_begin_idx(ts, dp, beginidx, idx, idx_diff, m,
-                              idx_nn):
-    indices = list(range(idx - 1, beginidx - 1, -1))
-
-    if not indices:
-        return dp
-
-    tmp_a = ts[indices]
-    indices_b = list(range(idx_nn - 1, beginidx + idx_diff - 1, -1))
-    tmp_b = ts[indices_b]
-    indices_c = list(range(idx + m - 1, beginidx + m - 1, -1))
-    tmp_c = ts[indices_c]
-    indices_d = list(range(idx_nn - 1 + m, beginidx + idx_diff + m - 1, -1))
-    tmp_d = ts[indices_d]
-
-    dp[indices] = dp[idx] + np.cumsum((tmp_a * tmp_b) - (tmp_c * tmp_d))
-
-    return dp
-
-
-def calc_refine_distance_begin_idx(refine_distance, dp, beginidx, idx,
-                                   idx_diff, idx_nn, sigmax, meanx, m):
-    if not (beginidx < idx):
-        return refine_distance
-
-    tmp_a = dp[beginidx:idx]
-    tmp_b = meanx[beginidx:idx]
-    tmp_c = meanx[beginidx + idx_diff:idx_nn]
-    tmp_d = sigmax[beginidx:idx]
-    tmp_e = sigmax[beginidx + idx_diff:idx_nn]
-    tmp_f = tmp_b * tmp_c
-    tmp_g = tmp_d * tmp_e
-    tmp_h = (m - (tmp_a - m * tmp_f) / (tmp_g))
+    Returns
+    -------
+    bool
+        Whether or not hte runtime has exceeded.
+    """
+    elapsed = time.time() - start_time
+    exceeded = runtime is not None and elapsed >= runtime
+    if exceeded:
+        warnings.warn(
+            'Max runtime exceeded. Approximate solution is given.',
+            RuntimeWarning
+        )
 
-    refine_distance[beginidx:idx] = np.sqrt(np.abs(2 * tmp_h))
+    return exceeded
 
-    return refine_distance
 
+def calc_distances_from_dot(dot, m, meanx_a, meanx_b, sigmax_a, sigmax_b):
+    """Z-normalized Euclidean distances from the dot products of subsequence
+    pairs and their moving statistics. All arguments broadcast together.
+    """
+    dist = (dot - m * meanx_a * meanx_b) / (sigmax_a * sigmax_b)
+    return np.sqrt(np.absolute(2 * (m - dist)))
+
+
+def calc_sliding_dot_products(ts, queries, ts_fft, m, profile_len):
+    """Dot products of every query (one per row) against every subsequence
+    of ts, computed with one batched real FFT.
+
+    Parameters
+    ----------
+    ts : np.ndarray
+        The time series.
+    queries : np.ndarray
+        Queries of length m, one per row.
+    ts_fft : np.ndarray
+        The real FFT of ts.
+    m : int
+        The window size.
+    profile_len : int
+        Number of subsequences of ts.
+    """
+    n = len(ts)
+    queries_fft = np.fft.rfft(queries[:, ::-1], n, axis=1)
+    dot = np.fft.irfft(ts_fft * queries_fft, n, axis=1)
 
-def apply_update_positions(matrix_profile, mp_index, refine_distance, beginidx,
-                           endidx, orig_index, idx_diff):
-    tmp_a = refine_distance[beginidx:endidx + 1]
-    tmp_b = matrix_profile[beginidx:endidx + 1]
-    update_pos1 = np.argwhere(tmp_a < tmp_b).flatten()
+    return dot[:, m - 1:m - 1 + profile_len]
 
-    if len(update_pos1) > 0:
-        update_pos1 = update_pos1 + beginidx
-        matrix_profile[update_pos1] = refine_distance[update_pos1]
-        mp_index[update_pos1] = orig_index[update_pos1] + idx_diff
 
-    tmp_a = refine_distance[beginidx:endidx + 1]
-    tmp_b = matrix_profile[beginidx + idx_diff:endidx + idx_diff + 1]
-    update_pos2 = np.argwhere(tmp_a < tmp_b).flatten()
+def apply_minimum(matrix_profile, mp_index, targets, distances, sources):
+    """Lowers matrix_profile[targets] to distances (recording sources as the
+    nearest neighbors) where smaller. Targets may repeat, the smallest
+    distance wins.
 
-    if len(update_pos2) > 0:
-        update_pos2 = update_pos2 + beginidx
-        matrix_profile[update_pos2 + idx_diff] = refine_distance[update_pos2]
-        mp_index[update_pos2 + idx_diff] = orig_index[update_pos2]
+    Returns
+    -------
+    int
+        The number of profile entries improved.
+    """
+    if len(targets) == 0:
+        return 0
 
-    return (matrix_profile, mp_index)
+    order = np.lexsort((distances, targets))
+    targets = targets[order]
+    first = np.ones(len(targets), dtype=bool)
+    np.not_equal(targets[1:], targets[:-1], out=first[1:])
+    targets = targets[first]
+    distances = distances[order][first]
+    sources = sources[order][first]
 
+    better = distances < matrix_profile[targets]
+    matrix_profile[targets[better]] = distances[better]
+    mp_index[targets[better]] = sources[better]
 
-def calc_curlastz(ts, m, n, idx, profile_len, curlastz):
-    curlastz[idx] = np.sum(ts[0:m] * ts[idx:idx + m])
+    return int(np.count_nonzero(better))
 
-    tmp_a = ts[m:n - idx]
-    tmp_b = ts[idx + m:n]
-    tmp_c = ts[0:profile_len - idx - 1]
-    tmp_d = ts[idx:profile_len - 1]
-    tmp_e = tmp_a * tmp_b
-    tmp_f = tmp_c * tmp_d
-    curlastz[idx + 1:profile_len] = curlastz[idx] + np.cumsum(tmp_e - tmp_f)
 
-    return curlastz
+def update_band_minimum(matrix_profile, mp_index, first, squared, partner,
+                        step=1):
+    """Lowers matrix_profile[first + c] to the smallest distance of column c
+    of squared (squared distances, one row per diagonal of a band). The
+    neighbor of the winning row r is partner[c] + step * r. The arg minimum
+    is only searched in the columns that improve.
 
+    Returns
+    -------
+    int
+        The number of profile entries improved.
+    """
+    columns = squared.shape[1]
+    target = matrix_profile[first:first + columns]
+    lowest = np.sqrt(np.min(squared, axis=0))
+    better = np.flatnonzero(lowest < target)
+    if len(better) == 0:
+        return 0
 
-def calc_curdistance(curlastz, meanx, sigmax, idx, profile_len, m,
-                     curdistance):
-    tmp_a = curlastz[idx:profile_len + 1]
-    tmp_b = meanx[idx:profile_len]
-    tmp_c = meanx[0:profile_len - idx]
-    tmp_d = sigmax[idx:profile_len]
-    tmp_e = sigmax[0:profile_len - idx]
-    tmp_f = tmp_b * tmp_c
-    tmp_g = (m - (tmp_a - m * tmp_f) / (tmp_d * tmp_e))
-    curdistance[idx:profile_len] = np.sqrt(np.abs(2 * tmp_g))
+    best = np.argmin(squared[:, better], axis=0)
+    target[better] = lowest[better]
+    mp_index[first + better] = partner[better] + step * best
 
-    return curdistance
+    return len(better)
 
 
-def time_is_exceeded(start_time, runtime):
-    """Helper method to determine if the runtime has exceeded or not.
+def prescrimp_block(ts, m, samples, ts_fft, meanx, sigmax, exclusion_zone,
+                    step_size, matrix_profile, mp_index):
+    """PreSCRIMP over a block of sampled queries: their distance profiles
+    come from one batched FFT, then every sample refines the diagonal of its
+    nearest neighbor over step_size positions on each side.
 
     Returns
     -------
-    bool
-        Whether or not hte runtime has exceeded.
+    int
+        The number of profile entries improved.
     """
-    elapsed = time.time() - start_time
-    exceeded = runtime is not None and elapsed >= runtime
-    if exceeded:
-        warnings.warn(
-            'Max runtime exceeded. Approximate solution is given.',
-            RuntimeWarning
-        )
+    profile_len = len(meanx)
+    rows = np.arange(len(samples))
+    columns = np.arange(profile_len)
+
+    queries = ts[samples[:, np.newaxis] + np.arange(m)]
+    dot = calc_sliding_dot_products(ts, queries, ts_fft, m, profile_len)
+    dist = calc_distances_from_dot(dot, m, meanx[samples, np.newaxis], meanx,
+                                   sigmax[samples, np.newaxis], sigmax)
+    dist[np.abs(columns - samples[:, np.newaxis]) <= exclusion_zone] = np.inf
+
+    # every subsequence may have one of the samples as nearest neighbor
+    best = np.argmin(dist, axis=0)
+    updated = apply_minimum(matrix_profile, mp_index, columns,
+                            dist[best, columns], samples[best])
+
+    # nearest neighbor of every sample
+    nn = np.argmin(dist, axis=1)
+    updated += apply_minimum(matrix_profile, mp_index, samples,
+                             dist[rows, nn], nn)
+
+    # refine along the diagonal of each (sample, nearest neighbor) pair
+    steps = np.arange(1, max(step_size, 1))
+    if len(steps) == 0:
+        return updated
+    dot_nn = dot[rows, nn][:, np.newaxis]
+
+    fwd_a = samples[:, np.newaxis] + steps
+    fwd_b = nn[:, np.newaxis] + steps
+    fwd_valid = (fwd_a < profile_len) & (fwd_b < profile_len)
+    a = np.minimum(fwd_a, profile_len - 1)
+    b = np.minimum(fwd_b, profile_len - 1)
+    fwd_dot = dot_nn + np.cumsum(ts[a + m - 1] * ts[b + m - 1] -
+                                 ts[a - 1] * ts[b - 1], axis=1)
+
+    bwd_a = samples[:, np.newaxis] - steps
+    bwd_b = nn[:, np.newaxis] - steps
+    bwd_valid = (bwd_a >= 0) & (bwd_b >= 0)
+    a = np.maximum(bwd_a, 0)
+    b = np.maximum(bwd_b, 0)
+    bwd_dot = dot_nn + np.cumsum(ts[a] * ts[b] - ts[a + m] * ts[b + m], axis=1)
+
+    pair_a = np.concatenate([fwd_a[fwd_valid], bwd_a[bwd_valid]])
+    pair_b = np.concatenate([fwd_b[fwd_valid], bwd_b[bwd_valid]])
+    pair_dot = np.concatenate([fwd_dot[fwd_valid], bwd_dot[bwd_valid]])
+    pair_dist = calc_distances_from_dot(pair_dot, m, meanx[pair_a],
+                                        meanx[pair_b], sigmax[pair_a],
+                                        sigmax[pair_b])
+
+    updated += apply_minimum(matrix_profile, mp_index,
+                             np.concatenate([pair_a, pair_b]),
+                             np.concatenate([pair_dist, pair_dist]),
+                             np.concatenate([pair_b, pair_a]))
+
+    return updated
+
+
+def _band_view(series, first, rows, columns):
+    """Read-only 2-D view whose row r is series[first + r:first + r + columns]
+    without copying. series must hold at least first + rows + columns - 1
+    values.
+    """
+    stride = series.strides[0]
+    return np.lib.stride_tricks.as_strided(series[first:], shape=(rows, columns),
+                                           strides=(stride, stride),
+                                           writeable=False)
 
-    return exceeded
 
+def scrimp_block(ts, m, first_diagonal, last_diagonal, first_row, meanx,
+                 sigmax, matrix_profile, mp_index):
+    """SCRIMP over the band of consecutive diagonals first_diagonal <= k <
+    last_diagonal evaluated as one 2-D array: row r holds the pairs
+    (i, i + first_diagonal + r). The series and statistics of the partners
+    are strided views, and each distance updates both subsequences of its
+    pair. ts, meanx and sigmax must be padded with the band width.
 
-def scrimp_plus_plus(ts, m, step_size=0.25, runtime=None, random_state=None):
+    Returns
+    -------
+    int
+        The number of profile entries improved.
+    """
+    profile_len = len(matrix_profile)
+    width = last_diagonal - first_diagonal
+    length = profile_len - first_diagonal
+    rows = np.arange(length)
+
+    # dot products along every diagonal of the band, seeded by the first row
+    dot = np.empty((width, length + width))
+    dot[:, 0] = first_row[first_diagonal:last_diagonal]
+    terms = dot[:, 1:length]
+    np.multiply(ts[m:m + length - 1],
+                _band_view(ts, first_diagonal + m, width, length - 1), out=terms)
+    terms -= ts[:length - 1] * _band_view(ts, first_diagonal, width, length - 1)
+    np.cumsum(dot[:, :length], axis=1, out=dot[:, :length])
+
+    # squared distances in place, the square root is only taken for the
+    # entries that improve the profile
+    dist = dot
+    window = dist[:, :length]
+    window -= m * meanx[:length] * _band_view(meanx, first_diagonal, width, length)
+    window /= sigmax[:length] * _band_view(sigmax, first_diagonal, width, length)
+    np.subtract(m, window, out=window)
+    np.absolute(window, out=window)
+    window *= 2
+    # pairs beyond the end of the series and the padding columns
+    for r in range(1, width):
+        dist[r, length - r:length] = np.inf
+    dist[:, length:] = np.inf
+
+    # subsequence i with its partner i + k as neighbor
+    updated = update_band_minimum(matrix_profile, mp_index, 0, window,
+                                  rows + first_diagonal)
+
+    # subsequence j = i + k with i as neighbor: column c of the skewed view
+    # holds the pairs (c - r, first_diagonal + c) and reads padding elsewhere
+    stride = dist.strides[1]
+    skewed = np.lib.stride_tricks.as_strided(
+        dist, shape=(width, length), strides=(dist.strides[0] - stride, stride),
+        writeable=False)
+    updated += update_band_minimum(matrix_profile, mp_index, first_diagonal,
+                                   skewed, rows, step=-1)
+
+    return updated
+
+
+def scrimp_plus_plus(ts, m, step_size=0.25, runtime=None, random_state=None,
+                     progress_callback=None):
     """SCRIMP++ is an anytime algorithm that computes the matrix profile for a
     given time series (ts) over a given window size (m). Essentially, it allows
     for an approximate solution to be provided for quicker analysis. In the
@@ -284,6 +341,11 @@ def scrimp_plus_plus(ts, m, step_size=0.25, runtime=None, random_state=None):
     solution is returned. If the runtime is None, the exact solution is
     returned.
 
+    Both phases work on blocks: PreSCRIMP evaluates a block of sampled
+    queries with one batched FFT and SCRIMP evaluates a block of randomly
+    chosen diagonals as one 2-D array, so the time budget and the progress
+    callback are checked once per block.
+
     This algorithm was created at the University of California Riverside. For
     further academic understanding, please review this paper:
 
@@ -302,12 +364,18 @@ def scrimp_plus_plus(ts, m, step_size=0.25, runtime=None, random_state=None):
         step_size : float, default 0.25
             The sampling interval for the window. The paper suggest 0.25 is the
             most practical. It should be a float value between 0 and 1.
-        runtime : int, default None
+        runtime : float, default None
             The maximum number of seconds based on wall clock time for this
             algorithm to run. It computes the exact solution when it is set to
             None.
         random_state : int, default None
             Set the random seed generator for reproducible results.
+        progress_callback : callable, default None
+            Called after every block with a ScrimpProgress tuple (phase,
+            fraction of the exact computation done, number of profile entries
+            improved by the block, elapsed seconds, matrix_profile, mp_index).
+            The arrays are the live profile, not copies. Returning True stops
+            the computation, e.g. once the profile has converged enough.
 
         Returns
         -------
@@ -322,8 +390,8 @@ def scrimp_plus_plus(ts, m, step_size=0.25, runtime=None, random_state=None):
         raise ValueError('step_size should be a float between 0 and 1.')
 
     # validate runtime
-    if runtime is not None and (not isinstance(runtime, int) or runtime < 1):
-        raise ValueError('runtime should be a valid positive integer.')
+    if runtime is not None and (not isinstance(runtime, (int, float)) or runtime <= 0):
+        raise ValueError('runtime should be a positive number of seconds.')
 
     # validate random_state
     if random_state is not None:
@@ -332,10 +400,11 @@ def scrimp_plus_plus(ts, m, step_size=0.25, runtime=None, random_state=None):
         except:
             raise ValueError('Invalid random_state value given.')
 
+    ts = np.asarray(ts, dtype=np.float64)
     ts_len = len(ts)
 
     # set the trivial match range
-    exclusion_zone = calc_exclusion_zone(m)
+    exclusion_zone = int(calc_exclusion_zone(m))
 
     # value checking
     if m > ts_len / 2:
@@ -349,105 +418,62 @@ def scrimp_plus_plus(ts, m, step_size=0.25, runtime=None, random_state=None):
     step_size = calc_step_size(m, step_size)
     profile_len = calc_profile_len(ts_len, m)
 
-    matrix_profile = np.zeros(profile_len)
-    mp_index = np.zeros(profile_len, dtype='int32')
-
-    X, n, sumx2, sumx, meanx, sigmax2, sigmax = fast_find_nn_pre(ts, m)
-
-    ###########################
-    # PreSCRIMP
-    #
-    # compute distance profile
-    dotproduct = np.zeros(profile_len)
-    refine_distance = np.full(profile_len, np.inf)
-    orig_index = np.arange(profile_len)
-
-    compute_order = list(range(0, profile_len, step_size))
-    np.random.shuffle(compute_order)
-
-    for iteration, idx in enumerate(compute_order):
-        # compute distance profile
-        subsequence = next_subsequence(ts, idx, m)
-
-        distance_profile = calc_distance_profile(X, subsequence, n, m, meanx,
-                                                 sigmax)
+    matrix_profile = np.full(profile_len, np.inf)
+    mp_index = np.full(profile_len, -1, dtype=indexDtype(profile_len))
 
-        # apply exclusion zone
-        distance_profile = apply_exclusion_zone(
-            idx, exclusion_zone, profile_len, distance_profile)
+    _, _, _, _, meanx, _, sigmax = fast_find_nn_pre(ts, m)
+    ts_fft = np.fft.rfft(ts)
 
-        # find and store nearest neighbor
-        matrix_profile, mp_index, idx_nn = find_and_store_nn(
-            iteration, idx, matrix_profile, mp_index, distance_profile)
+    samples = np.arange(0, profile_len, max(step_size, 1))
+    np.random.shuffle(samples)
+    # SCRIMP visits bands of consecutive diagonals in random order
+    band_width = max(1, _BLOCK_ELEMENTS // profile_len)
+    bands = np.arange(exclusion_zone + 1, profile_len, band_width)
+    np.random.shuffle(bands)
 
-        idx_diff = calc_idx_diff(idx, idx_nn)
-        dotproduct = calc_dotproduct_idx(dotproduct, m, matrix_profile, idx,
-                                         sigmax, idx_nn, meanx)
+    # progress is measured in matrix cells, PreSCRIMP evaluates a full row per sample
+    total_cells = len(samples) * profile_len + int(np.sum(profile_len - np.arange(exclusion_zone + 1, profile_len)))
+    done_cells = 0
 
-        endidx = calc_end_idx(profile_len, idx, step_size, idx_diff)
+    def report(phase, updated):
+        if progress_callback is None:
+            return False
+        return bool(progress_callback(ScrimpProgress(
+            phase, done_cells / max(total_cells, 1), updated,
+            time.time() - start_time, matrix_profile, mp_index)))
 
-        dotproduct = calc_dotproduct_end_idx(ts, dotproduct, idx, m,
-                                             endidx, idx_nn, idx_diff)
-
-        refine_distance = calc_refine_distance_end_idx(
-            refine_distance, dotproduct, idx, endidx, meanx, sigmax, idx_nn,
-            idx_diff, m)
-
-        beginidx = calc_begin_idx(idx, step_size, idx_diff)
-
-        dotproduct = calc_dotproduct_begin_idx(
-            ts, dotproduct, beginidx, idx, idx_diff, m, idx_nn)
-
-        refine_distance = calc_refine_distance_begin_idx(
-            refine_distance, dotproduct, beginidx, idx, idx_diff, idx_nn,
-            sigmax, meanx, m)
-
-        matrix_profile, mp_index = apply_update_positions(matrix_profile,
-                                                          mp_index,
-                                                          refine_distance,
-                                                          beginidx,
-                                                          endidx,
-                                                          orig_index, idx_diff)
+    ###########################
+    # PreSCRIMP
+    #
+    block_size = max(1, _BLOCK_ELEMENTS // ts_len)
+    for first in range(0, len(samples), block_size):
+        block = samples[first:first + block_size]
+        updated = prescrimp_block(ts, m, block, ts_fft, meanx, sigmax,
+                                  exclusion_zone, step_size, matrix_profile,
+                                  mp_index)
+        done_cells += len(block) * profile_len
+
+        # check if time is up or the caller is satisfied
+        if report('prescrimp', updated) or time_is_exceeded(start_time, runtime):
+            return (matrix_profile, mp_index)
 
-        # check if time is up
-        if time_is_exceeded(start_time, runtime):
+    ###########################
+    # SCRIMP
+    #
+    first_row = calc_sliding_dot_products(ts, ts[np.newaxis, :m], ts_fft, m,
+                                          profile_len)[0]
+    ts_padded = np.concatenate([ts, np.zeros(band_width)])
+    meanx_padded = np.concatenate([meanx, np.zeros(band_width)])
+    sigmax_padded = np.concatenate([sigmax, np.ones(band_width)])
+    for first in bands:
+        last = min(first + band_width, profile_len)
+        updated = scrimp_block(ts_padded, m, first, last, first_row,
+                               meanx_padded, sigmax_padded, matrix_profile,
+                               mp_index)
+        done_cells += int(np.sum(profile_len - np.arange(first, last)))
+
+        # check if time is up or the caller is satisfied
+        if report('scrimp', updated) or time_is_exceeded(start_time, runtime):
             break
 
-    if not time_is_exceeded(start_time, runtime):
-        ###########################
-        # SCRIMP
-        #
-        compute_order = orig_index[orig_index > exclusion_zone]
-        np.random.shuffle(compute_order)
-
-        curlastz = np.zeros(profile_len)
-        curdistance = np.zeros(profile_len)
-        dist1 = np.full(profile_len, np.inf)
-        dist2 = np.full(profile_len, np.inf)
-
-        for idx in compute_order:
-            curlastz = calc_curlastz(ts, m, n, idx, profile_len, curlastz)
-            curdistance = calc_curdistance(curlastz, meanx, sigmax, idx,
-                                           profile_len, m, curdistance)
-
-            dist1[0:idx - 1] = np.inf
-            dist1[idx:profile_len] = curdistance[idx:profile_len]
-
-            dist2[0:profile_len - idx] = curdistance[idx:profile_len]
-            dist2[profile_len - idx + 2:profile_len] = np.inf
-
-            loc1 = dist1 < matrix_profile
-            if loc1.any():
-                matrix_profile[loc1] = dist1[loc1]
-                mp_index[loc1] = orig_index[loc1] - idx + 1
-
-            loc2 = dist2 < matrix_profile
-            if loc2.any():
-                matrix_profile[loc2] = dist2[loc2]
-                mp_index[loc2] = orig_index[loc2] + idx - 1
-
-            # check if time is up
-            if time_is_exceeded(start_time, runtime):
-                break
-
     return (matrix_profile, mp_index)
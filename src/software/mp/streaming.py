@@ -0,0 +1,278 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Joseph Tarango
+# *****************************************************************************/
+"""
+Streaming (STAMPI style) matrix profile for live telemetry. Points are appended one at a time into preallocated storage,
+either growing geometrically or bounded to a window of the most recent points, so an append never copies the whole
+history. The dot product of the newest subsequence against all the others is derived from the previous one in O(n),
+the moving mean and deviation are updated in O(1), and left/right profiles are maintained as points arrive.
+"""
+from __future__ import absolute_import, division, print_function, \
+    unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
+
+import collections
+import math
+import numpy as np
+
+from .matrixProfile import _trivialMatchZone, _stompDistance
+
+StreamEvent = collections.namedtuple("StreamEvent", ["kind", "index", "distance", "neighbor"])
+
+
+class StreamingMatrixProfile(object):
+    """
+    Incrementally maintained self join matrix profile of a growing time series.
+
+    Indices reported by the profiles and events are absolute positions in the stream, they stay valid when a bounded
+    window drops old points. Distances use the same conventions as matrixProfile.stomp(), so the profile of an unbounded
+    stream matches stomp() of the whole series.
+    """
+    # Number of appends after which the rolling statistics are recomputed to avoid drifting.
+    _refreshInterval = 4096
+
+    def __init__(self, m, ts=None, window=None, discordThreshold=None, motifThreshold=None, onEvent=None,
+                 capacity=1024):
+        """
+        Creates the streaming matrix profile.
+
+        Parameters
+        ----------
+        m: Length of subsequence to compare.
+        ts: Optional initial history, loaded without emitting events.
+        window: Optional number of most recent points kept, memory stays constant once reached. None keeps everything.
+        discordThreshold: Emit a 'discord' event when a new subsequence is farther than this from all of its past.
+        motifThreshold: Emit a 'motif' event when a new subsequence is closer than this to one of its past.
+        onEvent: Optional callable receiving every StreamEvent as it is emitted.
+        capacity: Initial number of points allocated for an unbounded stream.
+        """
+        if m <= 1:
+            raise ValueError("Query length must be longer than one")
+        if window is not None and window <= m:
+            raise ValueError("Window must be longer than the query length")
+
+        self.m = int(m)
+        self.window = None if window is None else int(window)
+        self.discordThreshold = discordThreshold
+        self.motifThreshold = motifThreshold
+        self.onEvent = onEvent
+
+        self._zoneBefore, self._zoneAfter = _trivialMatchZone(self.m)
+        self._queryScale = math.sqrt(self.m / (self.m - 1))
+        self._capacity = max(int(capacity), 2 * self.m) if self.window is None else 2 * self.window
+        self._start = 0
+        self._size = 0
+        self._first = 0
+        self._appended = 0
+        self._squares = 0.0
+        self._allocate(self._capacity)
+
+        if ts is not None:
+            self.extend(ts, emit=False)
+
+    def _allocate(self, capacity):
+        """
+        Allocates the point and subsequence buffers, all indexed by buffer position.
+        """
+        self._ts = np.zeros(capacity)
+        self._mean = np.zeros(capacity)
+        self._queryStd = np.ones(capacity)
+        self._invStd = np.ones(capacity)
+        self._dot = np.zeros(capacity)
+        self._dotNext = np.zeros(capacity)
+        self._left = np.full(capacity, np.inf)
+        self._leftIndex = np.full(capacity, -1, dtype=np.int64)
+        self._right = np.full(capacity, np.inf)
+        self._rightIndex = np.full(capacity, -1, dtype=np.int64)
+
+    def _makeRoom(self):
+        """
+        Moves the live region to the front of the buffers, doubling them first for an unbounded stream. Happens once per
+        capacity appends, so the cost is amortized O(1) per point.
+        """
+        names = ('_ts', '_mean', '_queryStd', '_invStd', '_dot', '_left', '_leftIndex', '_right', '_rightIndex')
+        live = slice(self._start, self._start + self._size)
+        if self.window is None:
+            self._capacity *= 2
+            previous = {name: getattr(self, name) for name in names}
+            self._allocate(self._capacity)
+            for name in names:
+                getattr(self, name)[:self._size] = previous[name][live]
+        else:
+            for name in names:
+                array = getattr(self, name)
+                array[:self._size] = array[live]
+        self._start = 0
+
+    def _absolute(self, position):
+        """
+        Converts a buffer position into an absolute stream index.
+        """
+        return self._first + position - self._start
+
+    def __len__(self):
+        """
+        Returns the number of points currently retained.
+        """
+        return self._size
+
+    @property
+    def offset(self):
+        """
+        Absolute stream index of the first retained point and subsequence.
+        """
+        return self._first
+
+    def update(self, value, emit=True):
+        """
+        Appends one point and updates the profiles.
+
+        Parameters
+        ----------
+        value: New data point.
+        emit: Whether discord/motif events are produced for this point.
+
+        Returns the list of StreamEvent produced by this point.
+        """
+        if not np.isfinite(value):
+            value = 0.0
+        if self._start + self._size == self._capacity:
+            self._makeRoom()
+
+        m = self.m
+        ts = self._ts
+        end = self._start + self._size
+        ts[end] = value
+        self._size += 1
+        self._appended += 1
+        if self.window is not None and self._size > self.window:
+            self._start += 1
+            self._first += 1
+            self._size -= 1
+        if self._size < m:
+            return []
+
+        start = self._start
+        q = end + 1 - m
+        count = q - start + 1
+
+        # Rolling (Welford) statistics of the newest subsequence.
+        if count == 1 or self._appended % self._refreshInterval == 0:
+            mean = float(np.mean(ts[q:q + m]))
+            self._squares = float(np.sum(np.square(ts[q:q + m] - mean)))
+        else:
+            leaving = ts[q - 1]
+            previousMean = self._mean[q - 1]
+            mean = previousMean + (value - leaving) / m
+            self._squares += (value - leaving) * (value - mean + leaving - previousMean)
+        std = math.sqrt(abs(self._squares) / m)
+        self._mean[q] = mean
+        self._queryStd[q] = std * self._queryScale if std != 0.0 else np.finfo(float).eps
+        self._invStd[q] = 1.0 / std if std != 0.0 else 1.0 / np.finfo(float).eps
+        self._left[q] = np.inf
+        self._leftIndex[q] = -1
+        self._right[q] = np.inf
+        self._rightIndex[q] = -1
+
+        # Dot products of the newest subsequence against every retained one, derived from the previous newest.
+        dot = self._dotNext
+        if count > 1:
+            np.multiply(ts[start:q], -ts[q - 1], out=dot[start + 1:q + 1])
+            dot[start + 1:q + 1] += self._dot[start:q]
+            dot[start + 1:q + 1] += ts[q + m - 1] * ts[start + m:q + m]
+        dot[start] = np.dot(ts[start:start + m], ts[q:q + m])
+        self._dot, self._dotNext = dot, self._dot
+
+        distance = np.multiply(self._mean[start:q + 1], m * mean)
+        np.subtract(dot[start:q + 1], distance, out=distance)
+        distance *= self._invStd[start:q + 1]
+        distance *= -2.0 / self._queryStd[q]
+        distance += 2.0 * m
+        np.maximum(distance, 0.0, out=distance)
+
+        # Left profile of the newest subsequence: its nearest neighbor in the past.
+        leftCount = count - self._zoneAfter
+        if leftCount > 0:
+            nearest = int(np.argmin(distance[:leftCount]))
+            self._left[q] = distance[nearest]
+            self._leftIndex[q] = self._absolute(start + nearest)
+
+        # Right profiles of the past subsequences: the newest one may be their nearest neighbor in the future.
+        rightCount = count - 1 - self._zoneBefore
+        if rightCount > 0:
+            found = distance[:rightCount] < self._right[start:start + rightCount]
+            self._right[start:start + rightCount][found] = distance[:rightCount][found]
+            self._rightIndex[start:start + rightCount][found] = self._absolute(q)
+
+        if not emit or not np.isfinite(self._left[q]):
+            return []
+        return self._events(q)
+
+    def _events(self, q):
+        """
+        Produces the discord/motif events of the newest subsequence.
+        """
+        events = []
+        distance = float(_stompDistance(self._left[q]))
+        neighbor = int(self._leftIndex[q])
+        if self.discordThreshold is not None and distance > self.discordThreshold:
+            events.append(StreamEvent('discord', self._absolute(q), distance, neighbor))
+        if self.motifThreshold is not None and distance < self.motifThreshold:
+            events.append(StreamEvent('motif', self._absolute(q), distance, neighbor))
+        if self.onEvent is not None:
+            for event in events:
+                self.onEvent(event)
+        return events
+
+    def extend(self, values, emit=True):
+        """
+        Appends several points in order.
+
+        Parameters
+        ----------
+        values: Iterable of data points.
+        emit: Whether discord/motif events are produced for these points.
+
+        Returns the list of StreamEvent produced by these points.
+        """
+        events = []
+        for value in values:
+            events.extend(self.update(float(value), emit=emit))
+        return events
+
+    def series(self):
+        """
+        Returns the retained points, a view valid until the next append.
+        """
+        return self._ts[self._start:self._start + self._size]
+
+    def _profileSlice(self):
+        """
+        Buffer positions of the retained subsequences.
+        """
+        return slice(self._start, self._start + max(0, self._size - self.m + 1))
+
+    def leftProfile(self):
+        """
+        Returns (mp, mpIndex) where each subsequence only considers neighbors that arrived before it.
+        """
+        live = self._profileSlice()
+        return (_stompDistance(self._left[live]), self._leftIndex[live].copy())
+
+    def rightProfile(self):
+        """
+        Returns (mp, mpIndex) where each subsequence only considers neighbors that arrived after it.
+        """
+        live = self._profileSlice()
+        return (_stompDistance(self._right[live]), self._rightIndex[live].copy())
+
+    def matrixProfile(self):
+        """
+        Returns (mp, mpIndex) of the retained subsequences, the element-wise minimum of the left and right profiles.
+        """
+        live = self._profileSlice()
+        useRight = self._right[live] < self._left[live]
+        mp = np.where(useRight, self._right[live], self._left[live])
+        mpIndex = np.where(useRight, self._rightIndex[live], self._leftIndex[live])
+        return (_stompDistance(mp), mpIndex)
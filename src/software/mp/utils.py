@@ -425,21 +425,36 @@ def mass(query, ts):
     :query: Time series snippet to evaluate. Note that the query does not have to be a subset of ts.
     :ts: Time series to compare against query.
     """
+    m = int(len(query))
+    mean, std = movmeanstd(ts, m)
+    dot = slidingDotProduct(query, ts)
+    return massFromDot(query, dot, mean, std)
+
+
+def massFromDot(query, dot, mean, std):
+    """
+    Calculates MASS between a query and a time series from an already known sliding dot product, so that callers
+    carrying a rolling dot product (STOMP) get exactly the same result as mass().
+
+    Parameters
+    ----------
+    query: Time series snippet to evaluate.
+    dot: Sliding dot product between the query and every subsequence of the time series.
+    mean: Array containing the mean of every subsequence in the time series.
+    std: Array containing the standard deviation of every subsequence in the time series.
+    """
     numericalResolution = numpy.finfo(float).eps
     # query_normalized = zNormalize(numpy.copy(query))
     mQFloat = numpy.longdouble(len(query))
-    m = int(len(query))
     # Original
     # q_mean = numpy.mean(query)
     # q_std = numpy.std(query)
     # Multiply version, more robust
     q_mean, q_std = util_calculateMeanStd(data=query)
-    mean, std = movmeanstd(ts, m)
     if q_std == 0:
         q_std = numericalResolution
     std = numpy.array(std)
     std[std == 0.0] = numericalResolution
-    dot = slidingDotProduct(query, ts)
 
     # Original
     # res = numpy.sqrt(2*m*(1-(dot-m*mean*q_mean)/(m*std*q_std)))
@@ -502,6 +517,20 @@ def apply_av(mp, av=None):
         return (mp_corrected, mp[1])
 
 
+def indexDtype(length):
+    """
+    Returns the smallest integer type able to hold the matrix profile indices of a profile of the given length. Matrix
+    profile indices are stored as integers with -1 marking a subsequence without any neighbor.
+
+    Parameters
+    ----------
+    length: Length of the matrix profile.
+    """
+    if length < numpy.iinfo(numpy.int32).max:
+        return numpy.int32
+    return numpy.int64
+
+
 def is_self_join(tsA, tsB):
     """
     Helper function to determine if a self join is occurring or not. When tsA
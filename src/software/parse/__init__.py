@@ -17,6 +17,7 @@ from . import parseTelemetryBin
 from . import AutoGenParallel
 from . import autoObjects
 from . import bufdata
+from . import checksum
 # from . import collectStream
 from . import ctypeAutoGen
 from . import ctypeDict_test
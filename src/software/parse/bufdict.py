@@ -341,10 +341,14 @@ import operator
 import sys
 import math
 import binascii
+import numpy as np
 from ctypes import *
 from array import *
 from pprint import *
 
+from src.software.parse.checksum import CHOP, MOD28, MOD, ADLERINIT, BASE, NMAX, \
+    fwAdlerChecksum32, fnvChecksum32, fwChecksum32, fwChecksum8
+
 ################################################################################################################
 ################################################################################################################
 
@@ -470,7 +474,7 @@ class bdPrintStyle(object):
 
     def detoken(self, value):
         "Detokenize a value (change a token string to a number)."
-        if self.tokens != None and self.tokens.has_key(value):
+        if self.tokens != None and value in self.tokens:
             return self.tokens[value]
 
         # Is it a string?
@@ -687,174 +691,6 @@ bdStyleStrings = {
 
 # =========================================================================================================
 
-def CHOP(a):
-    a = a & 0xFFFFFFFF
-    a = (a & 0xffff) + ((a >> 16) << 4) - (a >> 16);
-    a = a & 0xFFFFFFFF
-    return a;
-
-
-def MOD28(a):
-    a = CHOP(a);
-    if (a >= BASE): a -= BASE;
-    return a;
-
-
-def MOD(a):
-    a = CHOP(a);
-    a = MOD28(a);
-    return a;
-
-
-## Helper function for Adler-32b checksums
-ADLERINIT = 1  # Initial value required for adler32 algorithm
-BASE = 65521  # largest prime smaller than 65536
-NMAX = 5552  # NMAX is the largest n such that 255n(n+1)/2 + (n+1)(BASE-1) <= 2^32-1
-
-
-def fwAdlerChecksum32(bytes, size=None, skip=0, adler=ADLERINIT):
-    '''
-    Calculates a Adler-32b checksum for an array of 'bytes'
-    Default 'size' will be len(bytes)
-    Use 'skip' to skip starting bytes (default 0)
-    '''
-    if size == None: size = len(bytes)
-
-    idx = skip
-    size -= skip
-    len = size
-
-    # split Adler-32 into component sums
-    sum2 = (adler >> 16) & 0xffff;
-    adler &= 0xffff;
-
-    # do length NMAX blocks -- requires just one modulo operation
-    while (len >= NMAX):
-        len -= NMAX;
-        n = NMAX / 16;  # NMAX is divisible by 16
-        for n in range(0, NMAX / 16):
-            for do16 in range(0, 16):
-                adler += bytes[idx];
-                adler &= 0xFFFFFFFF
-                idx += 1;
-                sum2 += adler;
-                sum2 &= 0xFFFFFFFF
-                len -= 1;
-
-        adler = MOD(adler);
-        sum2 = MOD(sum2);
-
-    # do remaining bytes (less than NMAX, still just one modulo)
-    if (len > 0):
-        # avoid modulos if none remaining
-        while (len >= 16):
-            for do16 in range(0, 16):
-                adler += bytes[idx];
-                adler &= 0xFFFFFFFF
-                idx += 1;
-                sum2 += adler;
-                sum2 &= 0xFFFFFFFF
-                len -= 1;
-
-        while (len > 0):
-            adler += bytes[idx];
-            adler &= 0xFFFFFFFF
-            idx += 1;
-            sum2 += adler;
-            sum2 &= 0xFFFFFFFF
-            len -= 1;
-
-        adler = MOD(adler);
-        sum2 = MOD(sum2);
-
-    # return recombined sums
-    adler = adler & 0xFFFFFFFF
-    sum2 = sum2 & 0xFFFF
-    sum2 = sum2 << 16
-
-    return adler | sum2;
-
-
-## Helper function for 32b checksum from FNV FW.
-def fnvChecksum32(bytes, size=None, skip=0):
-    '''
-    FNV FW 32b checksum for an array of 'bytes'
-    Default 'size' will be len(bytes)
-    Use 'skip' to skip starting bytes (default 0)
-    '''
-    if size == None: size = len(bytes)
-
-    csum = 0
-    idx = skip
-
-    while idx < size:
-        csum = 0xFFFFFFFF & (csum + bytes[idx] * (1 << (8 * (idx % 4))))
-        idx += 1
-
-    return 0xFFFFFFFF & (~(csum) + 1)
-
-
-## Helper function for 32b checksums
-def fwChecksum32(bytes, size=None, skip=0):
-    '''
-    Calculates a 32b checksum for an array of 'bytes'
-    Default 'size' will be len(bytes)
-    Use 'skip' to skip starting bytes (default 0)
-    '''
-    if size == None: size = len(bytes)
-
-    a = 1
-    b = 0
-    idx = skip
-    size -= skip
-
-    while (size > 0):
-        if size > 5550:
-            tempSize = 5550
-        else:
-            tempSize = size
-
-        size -= tempSize
-        a += (bytes[idx])
-        idx += 1
-        b += a
-        tempSize -= 1
-
-        while (tempSize > 0):
-            a += (bytes[idx])
-            idx += 1
-            b += a
-            tempSize -= 1
-
-        a = (a & 0xffff) + (a >> 16) * 15
-        b = (b & 0xffff) + (b >> 16) * 15
-
-    if a >= 65521: a -= 65521
-    b = (b & 0xffff) + (b >> 16) * 15
-    return ((b << 16) | a)
-
-
-## Helper function for 8b checksums
-def fwChecksum8(bytes, size=None, skip=0):
-    '''
-    Calculates an 8b checksum for an array of 'bytes'
-    Default 'size' will be len(bytes)
-    Use 'skip' to skip starting bytes (default 0)
-    '''
-    if size == None: size = len(bytes)
-
-    idx = skip
-    sum = 0
-
-    while idx < size:
-        sum += bytes[idx]
-        idx += 1
-
-    sum = 256 - (sum & 0xFF)
-
-    return sum
-
-
 ## Finds the length of the longest displayed name in a description list.
 def longestName(description, floor=12):
     longest = floor
@@ -1025,6 +861,159 @@ def generate_buflist_doc(header, entry, tail=None, brief=None):
     return buildDocString(strings, brief)
 
 
+## Compiled extraction plans.
+# A description list is compiled once into the bit layout of its fields with one print style instance per field.
+# Single entries are then decoded with precomputed shift/mask tables, and arrays of identical entries with one
+# vectorized pass: byte aligned 8/16/32/64 bit fields through a NumPy structured dtype, other bit fields through
+# shifts and masks of the gathered bytes.
+_extractionPlans = {}
+
+
+def _asByteArray(buf):
+    "View a byte buffer (bytes, bytearray, memoryview or list of byte values) as a uint8 array."
+    if isinstance(buf, (bytes, bytearray, memoryview)):
+        return np.frombuffer(buf, dtype=np.uint8)
+    return np.asarray(buf, dtype=np.uint8)
+
+
+def _column(values, dtype):
+    "One dimensional array of dtype holding the values, element by element for object columns."
+    column = np.empty(len(values), dtype=dtype)
+    column[:] = values
+    return column
+
+
+class bdExtractionPlan(object):
+    "Field layout of a description list compiled for fast extraction. Use extractionPlan() to get the cached one."
+
+    def __init__(self, description):
+        self.description = description
+        self.length = len(description)
+        self.fields = []  # (name, bits, shift, mask, signed, style, plain) of every buffer field.
+        self.bits = 0
+        for e in range(0, len(description), bdFIELDS):
+            bits = description[e + bdSIZE]
+
+            # Calculated fields are not in the buffer.
+            if bits <= 0: continue
+
+            signed = description[e + bdSIGN] != 0
+            style = description[e + bdSTYLE](bits=bits, signed=signed)
+
+            # Plain fields are integers extracted with the default rules, the others go through their style.
+            plain = (not style.isString()) and (type(style).extractValue is bdPrintStyle.extractValue)
+            self.fields.append((description[e + bdNAME], bits, self.bits, (1 << bits) - 1, signed, style, plain))
+            self.bits += bits
+
+        self.bytes = (self.bits + 7) >> 3
+        self.names = [field[0] for field in self.fields]
+
+        # Column types: byte aligned fields of a standard width are read directly with a structured dtype, other plain
+        # fields spanning up to 8 bytes are widened to 64 bits and everything else is kept as Python objects.
+        names, formats, offsets = [], [], []
+        self.types = {}
+        for index, (name, bits, shift, mask, signed, style, plain) in enumerate(self.fields):
+            if plain and shift % 8 == 0 and bits in (8, 16, 32, 64):
+                names.append('f%d' % index)
+                formats.append('<%s%d' % ('i' if signed else 'u', bits >> 3))
+                offsets.append(shift >> 3)
+                self.types[name] = np.dtype(formats[-1])
+            elif plain and ((shift & 7) + bits + 7) >> 3 <= 8:
+                self.types[name] = np.dtype(np.int64 if signed else np.uint64)
+            else:
+                self.types[name] = np.dtype(object)
+        self.dtype = np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': max(self.bytes, 1)})
+
+    def decode(self, giant_integer):
+        "List of the field values held by a giant integer, in field order."
+        values = []
+        for name, bits, shift, mask, signed, style, plain in self.fields:
+            rawInteger = giant_integer & mask
+            giant_integer = giant_integer >> bits
+            if not plain:
+                values.append(style.extractValue(rawInteger))
+            elif signed and rawInteger > (mask >> 1):
+                values.append(rawInteger - mask - 1)
+            else:
+                values.append(rawInteger)
+        return values
+
+    def decodeColumns(self, buf, offset=0, count=1):
+        """
+        Decode count consecutive entries starting at a bit offset of buf.
+
+        Returns a dictionary of field name to column array, typed as in self.types.
+        """
+        if offset == None: offset = 0
+        offset = int(offset)
+        count = int(count)
+        data = _asByteArray(buf)
+
+        # Entries off a byte boundary are decoded one giant integer at a time.
+        if offset % 8 != 0 or self.bits % 8 != 0:
+            rows = []
+            for i in range(count):
+                start = offset + i * self.bits
+                byte = start >> 3
+                nbytes = ((start & 7) + self.bits + 7) >> 3
+                rows.append(self.decode(int.from_bytes(data[byte:byte + nbytes].tobytes(), 'little') >> (start & 7)))
+            return dict((name, _column([row[i] for row in rows], self.types[name])) for i, name in enumerate(self.names))
+
+        start = offset >> 3
+        if data.size < start + count * self.bytes:
+            raise IndexError("Buffer holds less than %d entries of %d bytes" % (count, self.bytes))
+        matrix = data[start:start + count * self.bytes].reshape(count, self.bytes)
+        records = np.frombuffer(np.ascontiguousarray(matrix), dtype=self.dtype, count=count) if self.dtype.names else None
+
+        columns = {}
+        for index, (name, bits, shift, mask, signed, style, plain) in enumerate(self.fields):
+            if records is not None and ('f%d' % index) in self.dtype.fields:
+                columns[name] = records['f%d' % index].copy()
+                continue
+
+            first = shift >> 3
+            phase = shift & 7
+            nbytes = (phase + bits + 7) >> 3
+            if nbytes <= 8:
+                # Gather the bytes spanning the field into 64 bits, then shift and mask.
+                raw = np.zeros(count, dtype=np.uint64)
+                for i in range(nbytes):
+                    raw |= matrix[:, first + i].astype(np.uint64) << np.uint64(8 * i)
+                raw = (raw >> np.uint64(phase)) & np.uint64(mask)
+                if plain and signed:
+                    column = raw.astype(np.int64)
+                    column[column > (mask >> 1)] -= mask + 1
+                    columns[name] = column
+                    continue
+                if plain:
+                    columns[name] = raw
+                    continue
+                raw = raw.tolist()
+            else:
+                raw = [(int.from_bytes(row.tobytes(), 'little') >> phase) & mask for row in matrix[:, first:first + nbytes]]
+
+            if plain:
+                values = [value - mask - 1 if signed and value > (mask >> 1) else value for value in raw]
+            else:
+                values = [style.extractValue(value) for value in raw]
+            columns[name] = _column(values, self.types[name])
+        return columns
+
+    def decodeRows(self, buf, offset=0, count=1):
+        "List of the field value lists of count consecutive entries starting at a bit offset of buf."
+        columns = self.decodeColumns(buf, offset, count)
+        return [list(row) for row in zip(*[columns[name].tolist() for name in self.names])]
+
+
+def extractionPlan(description):
+    "The compiled extraction plan of a description list, built on first use."
+    cached = _extractionPlans.get(id(description))
+    if cached is None or cached.description is not description or cached.length != len(description):
+        cached = bdExtractionPlan(description)
+        _extractionPlans[id(description)] = cached
+    return cached
+
+
 class bufdict(object):
     """
     Base class for buffer structures.
@@ -1094,7 +1083,7 @@ class bufdict(object):
                 self.keyorder[key] = e  # Remember the key order for later.
                 value = self.info[e + bdINIT]  # Initial (default) Value.
                 tokens = self.info[e + bdTOKEN]  # Tokens for this key.
-                if tokens != None and tokens.has_key(value):
+                if tokens != None and value in tokens:
                     value = tokens[value]  # Token string converted to actual value.
                 self.entry[key] = value  # Internal storage of the value.
 
@@ -1167,7 +1156,7 @@ class bufdict(object):
                 bits += self.info[e + bdSIZE]
             return bits
 
-        elif not self.entry.has_key(key):
+        elif key not in self.entry:
             print("Invalid key:", key)
             raise KeyError
 
@@ -1189,7 +1178,7 @@ class bufdict(object):
 
     def bitposition(self, key):
         "Finds the bit position of a particular entry"
-        if not self.entry.has_key(key):
+        if key not in self.entry:
             print("Invalid key:", key)
             raise KeyError
             return -1
@@ -1210,7 +1199,7 @@ class bufdict(object):
 
     def default(self, key):
         "Default value for a particular entry"
-        if not self.entry.has_key(key):
+        if key not in self.entry:
             print("Invalid key:", key)
             raise KeyError
             return -1
@@ -1226,7 +1215,7 @@ class bufdict(object):
     def helpstring(self, key=None, full=False):
         "Returns a help string for the data members."
         format_string = "%" + str(self.namesize) + "s - %s\n"
-        if key == None or not self.entry.has_key(key):
+        if key == None or key not in self.entry:
             helpstring = "%s contains the following:\n" % (self.__name__)
             for e in range(0, len(self.info), bdFIELDS):
                 if (full == False):
@@ -1306,14 +1295,14 @@ class bufdict(object):
 
     def tokens(self, key):
         "Return the full token dictionary for a particular key."
-        if (not self.entry.has_key(key)):
+        if (key not in self.entry):
             print("Invalid key:", key)
             raise KeyError
         return self.info[self.keyorder[key] + bdTOKEN]
 
     def token(self, key):
         "Return the token string for a value or None if no token exists."
-        if (not self.entry.has_key(key)):
+        if (key not in self.entry):
             print("Invalid key:", key)
             raise KeyError
         tokens = self.tokens(key)
@@ -1326,7 +1315,7 @@ class bufdict(object):
 
     def detoken(self, key, value):
         "Detokenize a value (change a token string to a number)."
-        if (not self.entry.has_key(key)):
+        if (key not in self.entry):
             print("Invalid key:", key)
             raise KeyError
         e = self.keyorder[key]
@@ -1337,7 +1326,7 @@ class bufdict(object):
     def __getitem__(self, key):
         "Get data by key name."
         # Is the key valid? Must already exist.
-        if (not self.entry.has_key(key)):
+        if (key not in self.entry):
             print("Invalid Key: ", key)
             raise KeyError
 
@@ -1350,7 +1339,7 @@ class bufdict(object):
     # Dictionary access to set the value (can be tokenized value or in string form)
     def __setitem__(self, key, value):
         "Set data by key string."
-        if not self.entry.has_key(key):
+        if key not in self.entry:
             print("Invalid Key: ", key)
             raise KeyError
 
@@ -1372,8 +1361,8 @@ class bufdict(object):
         "Set data by attribute string."
         # This allows normal attributes to be set in __init__()
         # After init, the object contents are locked.
-        if (force and self.__dict__.has_key(item)) or \
-                not self.__dict__.has_key('_bufdict__initialised') or \
+        if (force and item in self.__dict__) or \
+                '_bufdict__initialised' not in self.__dict__ or \
                 item == 'raw':
             self.__dict__[item] = value
         else:
@@ -1382,8 +1371,8 @@ class bufdict(object):
     # Attribute access (dot syntax)
     def __getattr__(self, item):
         "Get data by attribute string."
-        if self.entry.has_key(item): return self.__getitem__(item)
-        if self.__dict__.has_key(item): return self.__dict__[item]
+        if item in self.entry: return self.__getitem__(item)
+        if item in self.__dict__: return self.__dict__[item]
         raise KeyError
 
     def __delattr__(self, item):
@@ -1543,59 +1532,37 @@ class bufdict(object):
             self.entry[key] = other[key]
         self._calculated_fields()
 
+    def _plan(self):
+        "Compiled extraction plan of the description."
+        return extractionPlan(self.info)
+
     def makeGiantInteger(self, buf, offset=0):
         "Make a giant integer from a byte buffer. Helper method used by from_buf()."
 
         if offset == None: offset = 0
-        bytesize = bufdict.bytesize(self)
-        if bytesize == 0: return offset
+        bitsize = self._plan().bits
+        if bitsize == 0: return offset
 
-        # Read the whole entry into a giant integer...
-        # Deal with starting location in the middle of a byte first.
+        # Read the whole entry into a giant integer at once, rounding up to the nearest byte.
+        # Deal with starting location in the middle of a byte by shifting out the bits to skip.
         offset = int(offset)  # Make sure it's an integer.
         byte = offset >> 3  # First byte in which data appears.
         location = offset % 8  # Number of bits to skip in the first byte.
-        if location > 0:
-            bitsdone = 8 - location  # Number of bits we're getting from the first byte.
-            giant_integer = long((buf[byte] & (256 - (1 << location))) >> location)
-            byte += 1
-        else:
-            giant_integer = long(0)
-            bitsdone = 0
-
-        # Get the rest of the bits needed, rounding up to nearest byte.
-        bitsize = bufdict.bitsize(self)
-        while bitsdone < bitsize:
-            giant_integer = giant_integer | (buf[byte] << bitsdone)
-            bitsdone += 8
-            byte += 1
-
-        return giant_integer
+        end = byte + ((location + bitsize + 7) >> 3)
+        if end > len(buf):
+            raise IndexError("Buffer too short for %s" % (self.__name__))
+        return int.from_bytes(bytes(buf[byte:end]), 'little') >> location
 
     def fromGiantInteger(self, giant_integer):
         "Get content from a giant integer. Helper method used by from_buf()."
+        self.fromValues(self._plan().decode(giant_integer))
 
-        # Parse the log entry.
-        for e in range(0, len(self.info), bdFIELDS):
-            bits = self.info[e + bdSIZE]
-
-            # Skip calculated fields
-            if bits <= 0: continue
+    def fromValues(self, values):
+        "Get content from the list of field values in description order, as decoded by an extraction plan."
+        for name, value in zip(self._plan().names, values):
+            self.entry[name] = value
 
-            # Make an instance of the print style.
-            signed = self.info[e + bdSIGN] != 0
-            style = self.info[e + bdSTYLE](bits=bits, signed=signed)
-
-            # Extract the raw integer for this data member.
-            mask = (1 << bits) - 1
-            rawInteger = giant_integer & mask
-            giant_integer = giant_integer >> bits
-
-            # Get the correct value from the raw integer.
-            value = style.extractValue(rawInteger)
-            self.entry[self.info[e]] = value
-
-            if self.version >= 0 and self.info[e] == 'version' and self.version != value:
+            if self.version >= 0 and name == 'version' and self.version != value:
                 raise Exception(("%s Version Mismatch: expect 0x%04X, actual 0x%04X" % (self.__name__, self.version, value)))
 
         self._calculated_fields()
@@ -1988,6 +1955,9 @@ class buflist(object):
             object.__setattr__(self, 'tail', None)
 
         # Clear out the internal list and then fill it if we can.
+        # In columnar mode (see frombuf) the entries are held as column arrays instead of bufdict objects.
+        object.__setattr__(self, 'columns', None)
+        object.__setattr__(self, 'columnsize', 0)
         object.__setattr__(self, 'buflist', [])
         if (filename != None): self.fromfile(filename=filename)
         if (buf != None): self.frombuf(buf=buf)
@@ -2007,29 +1977,36 @@ class buflist(object):
         return self.dummyentry.__contains__(key)
 
     def __len__(self):
+        if self.columns != None: return self.columnsize
         return len(self.buflist)
 
     def sort(self, key, reverse=False):
         "Sort by 'key'"
-        if not self.dummyentry.has_key(key): raise KeyError
+        if key not in self.dummyentry: raise KeyError
         sorted_list = sorted(self.buflist, key=operator.itemgetter(key), reverse=reverse)
         self.buflist = sorted_list
 
     # Attribute access (dot syntax)
     def __getattr__(self, item):
+        # Entries held in columns are turned into bufdict objects on first access to the list.
+        if item == 'buflist' and self.__dict__.get('columns') is not None: return self._rows_()
         # We must use this odd syntax to avoid recursion.
-        if self.__dict__['header'].has_key(item): return self.__dict__['header'][item]
-        if self.tail != None and self.tail.has_key(item): return self.__dict__['tail'][item]
-        if self.__dict__.has_key(item): return self.__dict__[item]
+        if item in self.__dict__['header']: return self.__dict__['header'][item]
+        if self.tail != None and item in self.tail: return self.__dict__['tail'][item]
+        if item in self.__dict__: return self.__dict__[item]
         raise KeyError
 
     def __setattr__(self, k, v):
+        # Replacing the list drops any columnar content.
+        if k == 'buflist':
+            object.__setattr__(self, 'columns', None)
+            object.__setattr__(self, 'buflist', v)
         # We must use this odd syntax to avoid recursion.
-        if self.__dict__['header'].has_key(k):
+        elif k in self.__dict__['header']:
             self.__dict__['header'][k] = v
-        elif self.tail != None and self.tail.has_key(k):
+        elif self.tail != None and k in self.tail:
             self.__dict__['tail'][k] = v
-        elif self.__dict__.has_key(k):
+        elif k in self.__dict__:
             self.__dict__[k] = v
         else:
             raise KeyError
@@ -2195,6 +2172,15 @@ class buflist(object):
         Sort the entries by 'key'.
         'reverse' is a boolean flag for descending order (default False).
         """
+        if self.columns != None and key in self.columns:
+            # Stable in both directions, as sorted() is.
+            column = self.columns[key]
+            if reverse:
+                order = len(column) - 1 - np.argsort(column[::-1], kind='stable')[::-1]
+            else:
+                order = np.argsort(column, kind='stable')
+            self._select_rows_(order)
+            return
         sorted_list = sorted(self.buflist, key=operator.itemgetter(key), reverse=reverse)
         self.buflist = sorted_list
 
@@ -2243,6 +2229,23 @@ class buflist(object):
 
     def del_duplicates(self, keylist=None):
         "Deletes duplicate rows."
+        if self.columns != None:
+            # Keep the first row of every distinct combination of the columns.
+            keys = [key for key in (keylist if keylist != None else self.columns) if key in self.columns]
+            if len(keys) > 0 and self.columnsize > 0:
+                records = self.to_records(keys)
+                if all(records.dtype[key] != np.dtype(object) for key in keys):
+                    _, first = np.unique(records, return_index=True)
+                else:
+                    # Object columns cannot be ordered in general, hash the values instead.
+                    seen = {}
+                    for row, values in enumerate(zip(*[self.columns[key].tolist() for key in keys])):
+                        seen.setdefault(values, row)
+                    first = np.fromiter(seen.values(), dtype=np.int64, count=len(seen))
+                self._select_rows_(np.sort(first))
+            self.header['size'] = len(self)
+            return
+
         for i in range(0, len(self)):
             if i >= len(self): break
 
@@ -2261,10 +2264,23 @@ class buflist(object):
         'key' is the the name of the entry to check.
         'num' is the number of rows allowed with the same value in the entry.
         """
+        if self.columns != None and key in self.columns:
+            # Rank of each row among the rows sharing its value, in list order.
+            _, inverse = np.unique(self.columns[key], return_inverse=True)
+            inverse = inverse.reshape(-1)
+            order = np.argsort(inverse, kind='stable')
+            grouped = inverse[order]
+            starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+            self._select_rows_(np.flatnonzero(rank < num))
+            self.header['size'] = len(self)
+            return
+
         count_dict = {}
         i = 0
         while i < len(self):
-            value = self.buflist[i][colname]
+            value = self.buflist[i][key]
             if value in count_dict:
                 count_dict[value] += 1
             else:
@@ -2297,7 +2313,7 @@ class buflist(object):
                     hopefully avoided in FW implementations of test commands.
         """
 
-        if not self.header.has_key('checksum'): return None
+        if 'checksum' not in self.header: return None
 
         if buf == None:
             buf = self.tobuf()
@@ -2349,10 +2365,78 @@ class buflist(object):
         """
         return self.entryclass
 
-    def from_buf(self, buf, append=False):
-        return self.frombuf(buf=buf, append=append)
+    def _entry_plan_(self, checkType=True):
+        """
+        Compiled extraction plan of the entries, or None when entries must be decoded one at a time.
+
+        Entries are decoded straight from the plan only when they use the stock bufdict decoding: no bufarray
+        payload and no overloaded frombuf()/fromGiantInteger(). With checkType, _determine_entry_type_() must
+        not be overloaded either, so that every entry is known to be of the entry class.
+        """
+        entryType = type(self.dummyentry)
+        if isinstance(self.dummyentry, bufarray) or \
+                entryType.frombuf is not bufdict.frombuf or \
+                entryType.fromGiantInteger is not bufdict.fromGiantInteger or \
+                entryType.makeGiantInteger is not bufdict.makeGiantInteger:
+            return None
+        if checkType and type(self)._determine_entry_type_ is not buflist._determine_entry_type_:
+            return None
+        return self.dummyentry._plan()
+
+    def _rows_(self):
+        "Turns columnar content back into a list of bufdict entries and returns that list."
+        rows = []
+        if self.columns != None:
+            names = self.dummyentry._plan().names
+            for values in zip(*[self.columns[name].tolist() for name in names]):
+                entry = self.entryclass(majorVersion=self.majorVersion, minorVersion=self.minorVersion)
+                entry.fromValues(list(values))
+                rows.append(entry)
+        object.__setattr__(self, 'columns', None)
+        object.__setattr__(self, 'buflist', rows)
+        return rows
+
+    def _to_columns_(self, convert=True):
+        "Turns the list of bufdict entries into columnar content, or only returns the columns when convert is False."
+        if self.columns != None: return self.columns
+        plan = self._entry_plan_()
+        if plan == None:
+            raise Exception("%s entries cannot be held in columns" % (self.__name__))
+        rows = self.__dict__['buflist']
+        columns = {}
+        for name in plan.names:
+            columns[name] = _column([entry.entry[name] for entry in rows], plan.types[name])
+        if not convert: return columns
+        self.__dict__.pop('buflist', None)
+        object.__setattr__(self, 'columnsize', len(rows))
+        object.__setattr__(self, 'columns', columns)
+        return columns
+
+    def _select_rows_(self, index):
+        "Keeps the columnar rows at the positions of the index array, in its order."
+        for name in self.columns:
+            self.columns[name] = self.columns[name][index]
+        object.__setattr__(self, 'columnsize', len(index))
+
+    def to_records(self, keys=None):
+        """
+        Return the entries as a NumPy structured array without making bufdict objects.
 
-    def frombuf(self, buf, append=False, overlay=False, ignoreSize=False):
+        keys        Optional list of the entry keys to include. Default is every field held in the buffer.
+                    Calculated fields (size 0) are not part of the records.
+        """
+        columns = self.columns if self.columns != None else self._to_columns_(convert=False)
+        if keys == None:
+            keys = list(columns.keys())
+        records = np.empty(len(self), dtype=[(str(key), columns[key].dtype) for key in keys])
+        for key in keys:
+            records[str(key)] = columns[key]
+        return records
+
+    def from_buf(self, buf, append=False, columnar=False):
+        return self.frombuf(buf=buf, append=append, columnar=columnar)
+
+    def frombuf(self, buf, append=False, overlay=False, ignoreSize=False, columnar=False):
         """
         Get content from a binary buffer.
 
@@ -2375,8 +2459,41 @@ class buflist(object):
                     Only meant to be altered by overloading frombuf() and setting True.
                     In such case, you MUST also overload _determine_entry_type_() to return
                     None when it finds the marker at the end of the buffer.
+
+        columnar    Optional choice to decode the entries straight into NumPy column arrays
+                    (self.columns) in one vectorized pass instead of bufdict objects. Sorting,
+                    del_duplicates(), limit_row(), table() and to_records() work on the columns.
+                    Any other list access turns the columns back into bufdict objects first.
+                    Calculated fields are not evaluated in columnar mode.
         """
 
+        # Decode the whole buffer into columns.
+        if columnar:
+            plan = self._entry_plan_()
+            if plan == None or overlay or ignoreSize:
+                raise Exception("%s entries cannot be decoded in columns" % (self.__name__))
+            previous = self._to_columns_() if append else None
+            offset = self.header.frombuf(buf=buf)
+            entries = self.header['size']
+            columns = plan.decodeColumns(buf, offset, entries)
+            if previous != None:
+                for name in columns:
+                    columns[name] = np.concatenate([previous[name], columns[name]]).astype(plan.types[name])
+                entries += self.columnsize
+            self.__dict__.pop('buflist', None)
+            object.__setattr__(self, 'columnsize', entries)
+            object.__setattr__(self, 'columns', columns)
+            offset += self.header['size'] * plan.bits
+
+            if self.tail != None: self.tail.frombuf(buf=buf, offset=offset)
+
+            # Calculate the checksum and compare.
+            if 'checksum' in self.header:
+                self.checksum(buf, self.header['checksum'])
+
+            self.header['size'] = len(self)
+            return
+
         # Remove all existing content unless appending or overlaying.
         if not append and not overlay: self.buflist = []
         offset = self.header.frombuf(buf=buf)
@@ -2384,6 +2501,16 @@ class buflist(object):
 
         # Read each entry...
         size = 0;
+        plan = None if (ignoreSize or overlay) else self._entry_plan_()
+        if plan != None:
+            # Homogeneous entries are all decoded in one vectorized pass of the compiled plan.
+            for values in plan.decodeRows(buf, offset, entries):
+                newEntry = self.entryclass(majorVersion=self.majorVersion, minorVersion=self.minorVersion)
+                newEntry.fromValues(values)
+                self.buflist.append(newEntry)
+            offset += entries * plan.bits
+            entries = 0
+
         while ignoreSize or size < entries:
             if overlay and size < len(self.buflist):
                 # Use the existing entries to get all the data.
@@ -2401,7 +2528,12 @@ class buflist(object):
                 # _determine_entry_type_() *MUST* return None when it finds the end.
                 if newType == None: break
 
-                newEntry = newType(majorVersion=self.majorVersion, minorVersion=self.minorVersion, buf=buf, offset=offset)
+                if newType is self.entryclass and self._entry_plan_(checkType=False) != None:
+                    # Same layout as the dummy entry, reuse its giant integer instead of reading the buffer again.
+                    newEntry = newType(majorVersion=self.majorVersion, minorVersion=self.minorVersion)
+                    newEntry.fromGiantInteger(giantInteger)
+                else:
+                    newEntry = newType(majorVersion=self.majorVersion, minorVersion=self.minorVersion, buf=buf, offset=offset)
 
                 self.buflist.append(newEntry)
                 size += 1
@@ -2410,7 +2542,7 @@ class buflist(object):
         if self.tail != None: self.tail.frombuf(buf=buf, offset=offset)
 
         # Calculate the checksum and compare.
-        if self.header.has_key('checksum'):
+        if 'checksum' in self.header:
             self.checksum(buf, self.header['checksum'])
 
         self.header['size'] = len(self)
@@ -2436,7 +2568,7 @@ class buflist(object):
         if self.tail != None: self.tail.tobuf(buf=buf, offset=offset)
 
         # Calculate a checksum if the header has one.
-        if self.header.has_key('checksum'):
+        if 'checksum' in self.header:
             self.header['checksum'] = self.checksum(buf)
             self.header.tobuf(buf)
 
@@ -2471,7 +2603,7 @@ class buflist(object):
             if filename != None: file.close()
 
             # Calculate the checksum and compare.
-            if self.header.has_key('checksum'):
+            if 'checksum' in self.header:
                 self.checksum(None, self.header['checksum'])
 
             self.header['size'] = len(self)
@@ -2577,12 +2709,34 @@ class buflist(object):
 
             mystring += '\n'
 
+        if self.columns != None:
+            # One print style per key, values come straight from the columns.
+            # Keys without a column (calculated fields) show the value of the dummy entry.
+            info = self.dummyentry.info
+            valuesize = self.dummyentry.valuesize
+            cells = []
+            for key in self.dummyentry:
+                e = self.dummyentry.keyorder[key]
+                style = info[e + bdSTYLE](bits=info[e + bdSIZE], tokens=info[e + bdTOKEN])
+                if key in self.columns:
+                    values = self.columns[key].tolist()
+                else:
+                    values = [self.dummyentry[key]] * len(self)
+                cells.append([style.getString(value, valueSize=valuesize) for value in values])
+
+            for i, row in enumerate(zip(*cells)):
+                if show_line_numbers == True:
+                    mystring += str(i) + delimiter
+                mystring += delimiter.join(row) + delimiter + '\n'
+
+            return mystring
+
         for i in range(0, len(self.buflist)):
             if show_line_numbers == True:
                 mystring += str(i) + delimiter
 
             for key in self.dummyentry:
-                mystring += self.buflist[i].item_string(key, valueSize=self.valuesize) + delimiter
+                mystring += self.buflist[i].item_string(key, valueSize=self.dummyentry.valuesize) + delimiter
 
             mystring += '\n'
 
@@ -2648,7 +2802,10 @@ class buflist(object):
     def bitsize(self):
         "Bits taken in a buffer by the entire object"
         bitsize = self.header.bitsize()
-        for i in range(len(self.buflist)): bitsize += self.buflist[i].bitsize()
+        if self.columns != None:
+            bitsize += self.columnsize * self.dummyentry._plan().bits
+        else:
+            for i in range(len(self.buflist)): bitsize += self.buflist[i].bitsize()
         if self.tail != None: bitsize += self.tail.bitsize()
         return bitsize
 
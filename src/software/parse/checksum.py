@@ -0,0 +1,468 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Joseph Tarango
+# *****************************************************************************/
+"""checksum.py
+
+Firmware checksums used by bufdict and buflist: Adler-32, the FNV FW 32b checksum and the FW 32b/8b checksums.
+
+The whole buffer is reduced at once instead of a byte at a time: the Adler-32 variant is bit compatible with
+zlib.adler32, the additive sums are NumPy reductions and the FNV checksum is the sum of the little endian 32 bit words
+of the buffer. Each checksum also has a streaming class with update() for chunked input. The byte loop versions are
+kept as the reference implementations.
+
+Example:
+    Default usage:
+        $ python -m src.software.parse.checksum
+    Specific usage:
+        $ python -m src.software.parse.checksum --sizes 1024,1048576 --repeat 5
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
+
+import datetime, optparse, time, traceback, zlib
+import numpy as np
+
+ADLERINIT = 1  # Initial value required for adler32 algorithm
+BASE = 65521  # largest prime smaller than 65536
+NMAX = 5552  # NMAX is the largest n such that 255n(n+1)/2 + (n+1)(BASE-1) <= 2^32-1
+FWBLOCK = 5550  # Bytes summed by fwChecksum32 between two folds of its sums
+
+
+def CHOP(a):
+    a = a & 0xFFFFFFFF
+    a = (a & 0xffff) + ((a >> 16) << 4) - (a >> 16);
+    a = a & 0xFFFFFFFF
+    return a;
+
+
+def MOD28(a):
+    a = CHOP(a);
+    if (a >= BASE): a -= BASE;
+    return a;
+
+
+def MOD(a):
+    a = CHOP(a);
+    a = MOD28(a);
+    return a;
+
+
+def _byteArray(data, size=None, skip=0):
+    "uint8 view of data[skip:size] without copying when data supports the buffer protocol."
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        array = np.frombuffer(data, dtype=np.uint8)
+    else:
+        array = np.asarray(data, dtype=np.uint8)
+    if size == None: size = len(array)
+    return array[int(skip):int(size)]
+
+
+def _fold(value):
+    "One fold of a running sum modulo 65521 as done by the FW: 65536 is 15 modulo 65521."
+    return (value & 0xffff) + (value >> 16) * 15
+
+
+## Adler-32b checksum, bit compatible with zlib.adler32.
+def fwAdlerChecksum32(bytes, size=None, skip=0, adler=ADLERINIT):
+    '''
+    Calculates a Adler-32b checksum for an array of 'bytes'
+    Default 'size' will be len(bytes)
+    Use 'skip' to skip starting bytes (default 0)
+    '''
+    if size == None: size = len(bytes)
+    if size <= skip:
+        return (adler & 0xffff) | (((adler >> 16) & 0xffff) << 16)
+    if (adler & 0xffff) >= BASE or ((adler >> 16) & 0xffff) >= BASE:
+        # Unreduced seeds are outside of what zlib accepts.
+        return referenceAdlerChecksum32(bytes, size, skip, adler)
+    return zlib.adler32(_byteArray(bytes, size, skip), adler) & 0xFFFFFFFF
+
+
+## FNV FW 32b checksum: two's complement of the sum of the little endian 32b words.
+def fnvChecksum32(bytes, size=None, skip=0):
+    '''
+    FNV FW 32b checksum for an array of 'bytes'
+    Default 'size' will be len(bytes)
+    Use 'skip' to skip starting bytes (default 0)
+    '''
+    if size == None: size = len(bytes)
+    return 0xFFFFFFFF & -_wordSum(_byteArray(bytes, size, skip), int(skip))
+
+
+def _wordSum(data, position):
+    "Sum of the bytes of data weighted by their place in the 32b words of the buffer, data starting at position."
+    total = 0
+    for phase in range(4):
+        # Bytes of data at an absolute offset congruent to phase modulo 4.
+        first = (phase - position) % 4
+        total += int(np.sum(data[first::4], dtype=np.uint64)) << (8 * phase)
+    return total & 0xFFFFFFFF
+
+
+## FW 32b checksum (Adler like sums folded every 5550 bytes).
+def fwChecksum32(bytes, size=None, skip=0):
+    '''
+    Calculates a 32b checksum for an array of 'bytes'
+    Default 'size' will be len(bytes)
+    Use 'skip' to skip starting bytes (default 0)
+    '''
+    stream = fwChecksum32Stream()
+    stream.update(_byteArray(bytes, size, skip))
+    return stream.value()
+
+
+## FW 8b checksum
+def fwChecksum8(bytes, size=None, skip=0):
+    '''
+    Calculates an 8b checksum for an array of 'bytes'
+    Default 'size' will be len(bytes)
+    Use 'skip' to skip starting bytes (default 0)
+    '''
+    return 256 - (int(np.sum(_byteArray(bytes, size, skip), dtype=np.uint64)) & 0xFF)
+
+
+class adlerChecksum32Stream(object):
+    "Streaming fwAdlerChecksum32: update() with consecutive chunks, value() at any point."
+
+    def __init__(self, adler=ADLERINIT):
+        self.adler = adler
+
+    def update(self, data):
+        self.adler = fwAdlerChecksum32(data, adler=self.adler)
+        return self
+
+    def value(self):
+        return self.adler
+
+
+class fnvChecksum32Stream(object):
+    "Streaming fnvChecksum32: update() with consecutive chunks, value() at any point."
+
+    def __init__(self, position=0):
+        self.position = position  # Offset of the next byte in the checksummed buffer, sets its place in a word.
+        self.total = 0
+
+    def update(self, data):
+        data = _byteArray(data)
+        self.total = (self.total + _wordSum(data, self.position)) & 0xFFFFFFFF
+        self.position += len(data)
+        return self
+
+    def value(self):
+        return 0xFFFFFFFF & -self.total
+
+
+class fwChecksum32Stream(object):
+    "Streaming fwChecksum32: update() with consecutive chunks, value() at any point."
+
+    def __init__(self):
+        self.a = 1
+        self.b = 0
+        self.filled = 0  # Bytes summed since the last fold.
+
+    def _sumBlock(self, block):
+        "Adds a block that does not cross a fold boundary."
+        length = len(block)
+        if length == 0: return
+        weights = np.arange(length, 0, -1, dtype=np.uint64)
+        self.b += length * self.a + int(np.dot(block.astype(np.uint64), weights))
+        self.a += int(np.sum(block, dtype=np.uint64))
+        self.filled += length
+        if self.filled == FWBLOCK:
+            self.a = _fold(self.a)
+            self.b = _fold(self.b)
+            self.filled = 0
+
+    def update(self, data):
+        data = _byteArray(data)
+        start = 0
+        # Complete the pending block first.
+        if self.filled > 0:
+            start = min(len(data), FWBLOCK - self.filled)
+            self._sumBlock(data[:start])
+        whole = (len(data) - start) // FWBLOCK
+        if whole > 0:
+            # All the whole blocks at once: per block sums and weighted sums, then the folds in order.
+            blocks = data[start:start + whole * FWBLOCK].reshape(whole, FWBLOCK).astype(np.uint64)
+            sums = np.sum(blocks, axis=1).tolist()
+            weighted = np.dot(blocks, np.arange(FWBLOCK, 0, -1, dtype=np.uint64)).tolist()
+            a, b = self.a, self.b
+            for blockSum, blockWeighted in zip(sums, weighted):
+                b = _fold(b + FWBLOCK * a + blockWeighted)
+                a = _fold(a + blockSum)
+            self.a, self.b = a, b
+            start += whole * FWBLOCK
+        self._sumBlock(data[start:])
+        return self
+
+    def value(self):
+        a, b = self.a, self.b
+        if self.filled > 0:
+            a = _fold(a)
+            b = _fold(b)
+        if a >= 65521: a -= 65521
+        b = _fold(b)
+        return ((b << 16) | a)
+
+
+class fwChecksum8Stream(object):
+    "Streaming fwChecksum8: update() with consecutive chunks, value() at any point."
+
+    def __init__(self):
+        self.total = 0
+
+    def update(self, data):
+        self.total = (self.total + int(np.sum(_byteArray(data), dtype=np.uint64))) & 0xFF
+        return self
+
+    def value(self):
+        return 256 - self.total
+
+
+## Reference byte loop implementations, the behavior the fast versions reproduce.
+def referenceAdlerChecksum32(bytes, size=None, skip=0, adler=ADLERINIT):
+    "Byte loop fwAdlerChecksum32."
+    if size == None: size = len(bytes)
+
+    idx = skip
+    size -= skip
+    length = size
+
+    # split Adler-32 into component sums
+    sum2 = (adler >> 16) & 0xffff;
+    adler &= 0xffff;
+
+    # do length NMAX blocks -- requires just one modulo operation
+    while (length >= NMAX):
+        for n in range(0, NMAX // 16):  # NMAX is divisible by 16
+            for do16 in range(0, 16):
+                adler += bytes[idx];
+                adler &= 0xFFFFFFFF
+                idx += 1;
+                sum2 += adler;
+                sum2 &= 0xFFFFFFFF
+                length -= 1;
+
+        adler = MOD(adler);
+        sum2 = MOD(sum2);
+
+    # do remaining bytes (less than NMAX, still just one modulo)
+    if (length > 0):
+        while (length > 0):
+            adler += bytes[idx];
+            adler &= 0xFFFFFFFF
+            idx += 1;
+            sum2 += adler;
+            sum2 &= 0xFFFFFFFF
+            length -= 1;
+
+        adler = MOD(adler);
+        sum2 = MOD(sum2);
+
+    # return recombined sums
+    adler = adler & 0xFFFFFFFF
+    sum2 = sum2 & 0xFFFF
+    sum2 = sum2 << 16
+
+    return adler | sum2;
+
+
+def referenceFnvChecksum32(bytes, size=None, skip=0):
+    "Byte loop fnvChecksum32."
+    if size == None: size = len(bytes)
+
+    csum = 0
+    idx = skip
+
+    while idx < size:
+        csum = 0xFFFFFFFF & (csum + bytes[idx] * (1 << (8 * (idx % 4))))
+        idx += 1
+
+    return 0xFFFFFFFF & (~(csum) + 1)
+
+
+def referenceFwChecksum32(bytes, size=None, skip=0):
+    "Byte loop fwChecksum32."
+    if size == None: size = len(bytes)
+
+    a = 1
+    b = 0
+    idx = skip
+    size -= skip
+
+    while (size > 0):
+        if size > FWBLOCK:
+            tempSize = FWBLOCK
+        else:
+            tempSize = size
+
+        size -= tempSize
+        while (tempSize > 0):
+            a += (bytes[idx])
+            idx += 1
+            b += a
+            tempSize -= 1
+
+        a = (a & 0xffff) + (a >> 16) * 15
+        b = (b & 0xffff) + (b >> 16) * 15
+
+    if a >= 65521: a -= 65521
+    b = (b & 0xffff) + (b >> 16) * 15
+    return ((b << 16) | a)
+
+
+def referenceFwChecksum8(bytes, size=None, skip=0):
+    "Byte loop fwChecksum8."
+    if size == None: size = len(bytes)
+
+    idx = skip
+    sum = 0
+
+    while idx < size:
+        sum += bytes[idx]
+        idx += 1
+
+    sum = 256 - (sum & 0xFF)
+
+    return sum
+
+
+# (fast, reference, streaming class) of every checksum.
+CHECKSUMS = {
+    'fwAdlerChecksum32': (fwAdlerChecksum32, referenceAdlerChecksum32, adlerChecksum32Stream),
+    'fnvChecksum32'    : (fnvChecksum32, referenceFnvChecksum32, fnvChecksum32Stream),
+    'fwChecksum32'     : (fwChecksum32, referenceFwChecksum32, fwChecksum32Stream),
+    'fwChecksum8'      : (fwChecksum8, referenceFwChecksum8, fwChecksum8Stream),
+}
+
+
+def verifyChecksums(sizes=(0, 1, 3, 16, 5549, 5550, 5551, 5552, 11104, 20000), skips=(0, 1, 3), randomState=0):
+    """
+    Compares the fast and streaming checksums with the reference implementations on random, all zero and all 0xFF
+    buffers of lengths around the block boundaries, skipped starts and chunked streaming. The fixed known good values
+    are checked by checksumTest() in parse/testall.py.
+
+    Returns the list of mismatches as (name, size, skip, expected, actual), empty when all agree.
+    """
+    generator = np.random.RandomState(randomState)
+    mismatches = []
+    for size in sizes:
+        for pattern in (generator.randint(0, 256, size), np.zeros(size, dtype=np.int64), np.full(size, 0xFF)):
+            data = bytearray(pattern.astype(np.uint8).tobytes())
+            for skip in skips:
+                if skip > size: continue
+                for name, (fast, reference, stream) in CHECKSUMS.items():
+                    expected = reference(data, size, skip)
+                    actual = fast(data, size, skip)
+                    if actual != expected:
+                        mismatches.append((name, size, skip, expected, actual))
+                    # Streaming over uneven chunks of the same bytes.
+                    streamer = stream(position=skip) if stream is fnvChecksum32Stream else stream()
+                    start = skip
+                    for chunk in (1, 7, 4096, FWBLOCK, size):
+                        streamer.update(data[start:start + chunk])
+                        start = min(size, start + chunk)
+                    if streamer.value() != expected:
+                        mismatches.append((name + 'Stream', size, skip, expected, streamer.value()))
+    return mismatches
+
+
+def benchmarkChecksums(sizes=(1 << 10, 1 << 16, 1 << 20), repeat=3, referenceLimit=1 << 16, randomState=0):
+    """
+    Throughput of the fast and reference checksums in MB/s.
+
+    Parameters
+    ----------
+    sizes: Buffer lengths to evaluate.
+    repeat: Number of runs, the best one is kept.
+    referenceLimit: Largest buffer the byte loop references are run on.
+    randomState: Seed of the random generator.
+
+    Returns a list of dictionaries with the name, size and the MB/s of both versions (None when not run).
+    """
+    results = []
+    for size in sizes:
+        data = bytearray(np.random.RandomState(randomState).randint(0, 256, size).astype(np.uint8).tobytes())
+        for name, (fast, reference, _) in CHECKSUMS.items():
+            rates = []
+            for function in (fast, reference):
+                if function is reference and size > referenceLimit:
+                    rates.append(None)
+                    continue
+                best = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    function(data)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                rates.append(size / max(best, 1e-9) / 1e6)
+            results.append({'name': name, 'size': size, 'fast': rates[0], 'reference': rates[1]})
+    return results
+
+
+def printResults(results):
+    """
+    Prints benchmark results as a table.
+
+    Parameters
+    ----------
+    results: List of dictionaries as returned by benchmarkChecksums.
+    """
+    print("{:>20} {:>10} {:>14} {:>14}".format('checksum', 'bytes', 'fast MB/s', 'reference MB/s'))
+    for result in results:
+        reference = '-' if result['reference'] is None else "{:.2f}".format(result['reference'])
+        print("{:>20} {:>10} {:>14.2f} {:>14}".format(result['name'], result['size'], result['fast'], reference))
+    return
+
+
+def main():
+    """
+    main function to be called when the script is directly executed from the command line
+    """
+    ##############################################
+    # Main function, Options
+    ##############################################
+    parser = optparse.OptionParser()
+    parser.add_option("--sizes",
+                      dest='sizes',
+                      default=None,
+                      help='Comma separated buffer lengths to benchmark')
+    parser.add_option("--repeat",
+                      dest='repeat',
+                      default=None,
+                      help='Number of runs of each checksum, the best is kept')
+    (options, args) = parser.parse_args()
+
+    ##############################################
+    # Main
+    ##############################################
+    if options.sizes is None:
+        sizes = (1 << 10, 1 << 16, 1 << 20)
+    else:
+        sizes = [int(size) for size in options.sizes.split(',')]
+
+    if options.repeat is None:
+        repeat = 3
+    else:
+        repeat = int(options.repeat)
+
+    mismatches = verifyChecksums()
+    for mismatch in mismatches:
+        print("MISMATCH %s size %d skip %d: expected 0x%X actual 0x%X" % mismatch)
+    print("Golden vectors: %s" % ("FAIL" if mismatches else "PASS"))
+
+    printResults(benchmarkChecksums(sizes=sizes, repeat=repeat))
+    return 0 if not mismatches else 1
+
+
+if __name__ == '__main__':
+    """Performs execution delta of the process."""
+    pStart = datetime.datetime.now()
+    try:
+        main()
+    except Exception as errorMain:
+        print("Fail End Process: {0}".format(errorMain))
+        traceback.print_exc()
+    qStop = datetime.datetime.now()
+    print("Execution time: " + str(qStop - pStart))
@@ -24,6 +24,8 @@ TOOL_VERSION = 1.0
 
 class HostTimeMarkerTriage(nlogTriageBase):
     localTimeZone = None
+    hostTimeMarker = "Nvme Host time since 12:00am, January 1, 1970"
+    formatMarkers = (hostTimeMarker,)
 
     @staticmethod
     def GetNlogTimestamp(tsSeconds, flag):
@@ -63,7 +65,7 @@ class HostTimeMarkerTriage(nlogTriageBase):
         """
         self.hostMessage = None
 
-        if (("Nvme Host time since 12:00am, January 1, 1970" in formatStr) and (len(params) >= 6)):
+        if ((HostTimeMarkerTriage.hostTimeMarker in formatStr) and (len(params) >= 6)):
             utcHostTimeParamMs = (int(list(params)[0]) << 32) + int(list(params)[1])
             utcHostTimeParmSec = (int(list(params)[2]) << 32) + int(list(params)[3])
             powerOnTimeMs = (int(list(params)[4]) << 32) + int(list(params)[5])
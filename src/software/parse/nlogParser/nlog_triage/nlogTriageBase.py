@@ -23,6 +23,9 @@ class nlogTriageBase(object):
     warningLevel = 1
     information = 2
 
+    # Substrings of the nlog format strings handled by addNlogEvent(), None to receive every event
+    formatMarkers = None
+
     def __init__(self, triageName, TOOL_VERSION):
         self.versionString = format("%s version %4.2f\n" % (triageName, TOOL_VERSION))
         self.messageLog = [self.versionString]
@@ -56,6 +59,20 @@ class nlogTriageBase(object):
     def getVersion(self):
         return self.versionString
 
+    def isTriageFormat(self, formatStr):
+        """
+        Determine if the events of a format string must be passed to addNlogEvent(), the translator calls
+        this once per format to build its dispatch table
+
+        @param formatStr - nlog format string
+
+        @return bool - True if the format string contains one of the format markers
+        """
+        if (self.formatMarkers is None): return True
+        for marker in self.formatMarkers:
+            if (marker in formatStr): return True
+        return False
+
     def updateTime(self, seconds):
         pass
 
@@ -31,6 +31,7 @@ class padrTriage(nlogTriageBase):
     padrStateEndMarker = "_"
     padrActionStartMarker = "__"
     padrActionStartMarkerLen = len(padrActionStartMarker)
+    formatMarkers = (padrMarker,)
 
     def __init__(self):
         self.currentIntfState = {}
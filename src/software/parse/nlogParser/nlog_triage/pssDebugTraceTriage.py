@@ -199,6 +199,7 @@ class pssDebugTraceTriage(nlogTriageBase):
     errorLevel = 0
     warningLevel = 1
     eventList = []
+    formatMarkers = ("PssDebugTrace", "Initiating safe shutdown", "Initiating abrupt shutdown")
 
     def __resetTimeStamps(self):
         self.startTime = None
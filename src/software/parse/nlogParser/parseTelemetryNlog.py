@@ -60,7 +60,7 @@ def ReadNlogList(listFileName):
 
 def nlogParserAPI(inputfiles=None, nlogListFile=None, nlogFormats=buildBaseDirectory+'/Nlog_formats.py',
                   nlogenum=buildBaseDirectory+'/nlogEnumParser.py', outputFile='nlog.txt', triageFileName=None,
-                  inputVersion=2.0, debug=0):
+                  inputVersion=2.0, debug=0, workers=1):
     returnStatus = False
 
     # Assign the argument values
@@ -79,44 +79,29 @@ def nlogParserAPI(inputfiles=None, nlogListFile=None, nlogFormats=buildBaseDirec
 
     # File list created, parse the data
     OutputLog.Information(format("\nAttempting to parse file nlogs, File alignment type: %1.1f..." % (inputVersion)))
-    masterEventList = []
-
-    parser = TelemetryV2NlogEventParserL2(None, binPack)
-
     for fileName in inputfiles:
-        parser.setNlogBinFileName(fileName)
-
-        # Parse the input file
         OutputLog.DebugPrint(1, format("\nAttempting to parse file \"%s\", File alignment type: %1.1f..." % (fileName, inputVersion)))
 
-        # Generate the event list
-        eventList = parser.getEventTupleList()
-
-        # Add the list to the master
-        if (len(eventList) > 0): masterEventList.extend(eventList)
-
-    # Translate the master event tuple list into text
-    nlogTextList, headerText, triageText = parser.xlateToText(masterEventList, nlogFormats, nlogenum)
-
-    # Output the text file(s)
+    # Open the output file(s) first, the text is written as the merged events are translated
     if (outputFile is not None):
         outputStream = openWriteFile(outputFile, True)
     else:
         outputStream = sys.stdout
 
-    if (outputStream is not None):
-        parser.WriteNlogStream(outputStream, headerText, nlogTextList)
-        outputStream.close()
-        returnStatus = True
-
     if (triageFileName is not None):
-        outputStream = openWriteFile(triageFileName, True)
+        triageStream = openWriteFile(triageFileName, True)
     else:
-        outputStream = None
+        triageStream = None
+
+    parser = TelemetryV2NlogEventParserL2(None, binPack)
+    parser.XlateAndOutputMultipleNlog(inputfiles, nlogFormats, outputStream, triageStream, nlogenum, workers)
 
     if (outputStream is not None):
-        parser.WriteTriageStream(outputStream, triageText)
-        outputStream.close()
+        if (outputFile is not None): outputStream.close()
+        returnStatus = True
+
+    if (triageStream is not None):
+        triageStream.close()
 
     return returnStatus
 
@@ -132,6 +117,7 @@ def main():
     parser.add_argument('--enum', action='store', dest="nlogenum", type=str, default=buildBaseDirectory+'/nlogEnumParser.py', help='Path/filename of nlogEnumParser.py file for this build, default = <buildBase>/nlogEnumParser.py')
     parser.add_argument('-i', action='store', dest="nlogListFile", type=str, default=None, help='File containing Path/filename nlog bin files to parse')
     parser.add_argument('--triage', action='store', dest="triageFileName", type=str, default=None, help='File containing Path/filename of triage output')
+    parser.add_argument('-j', '--workers', action='store', dest="workers", type=int, default=1, help='Number of nlog translation processes, 0 = one per CPU, default = 1')
     parser.add_argument('inputfiles', action='store', nargs='*', type=str, help='List of Path/filename nlog bin files to parse')
     options = parser.parse_args()
 
@@ -139,7 +125,7 @@ def main():
     returnStatus = nlogParserAPI(inputfiles=options.inputfiles, nlogListFile=options.nlogListFile,
                                  nlogFormats=options.nlogFormats, nlogenum=options.nlogenum,
                                  outputFile=options.outputFile, triageFileName=options.triageFileName,
-                                 inputVersion=options.inputVersion, debug=options.debug)
+                                 inputVersion=options.inputVersion, debug=options.debug, workers=options.workers)
     return returnStatus
 
 ######## Test it #######
@@ -26,6 +26,7 @@ class nlogEnumTranslate(object):
     Method(s):
         __init__(enumParserFile = None, inlineTriage = False)
         newFormatString, newParamsTuple enumParser(format, params)
+        nlogEnumFormat getEnumFormat(format, paramCount)
 
     Related:
 
@@ -249,4 +250,180 @@ class nlogEnumTranslate(object):
 
         return s
 
+    def getEnumFormat(self, format, paramCount):
+        """
+        Compile the enum translation of a format string for repeated use
+
+        @param format - Format string for the nlog message
+        @param paramCount - Number of message parameters
+
+        @return nlogEnumFormat - Object translating the parameter tuples of the format, same output as enumParser()
+        """
+        return nlogEnumFormat(self, format, paramCount)
+
+
+class nlogEnumFormat(object):
+    """
+    Brief:
+        nlogEnumFormat() - Precompiled enum translation of one format string
+
+    Description:
+        The enum markers and the brute force enum replacement of nlogEnumTranslate.enumParser() are resolved
+        once for a format string and parameter count, so translating an event only does the enum lookups and
+        one % evaluation.  Any failure of the fast path is handed to enumParser() for the original error handling.
+
+    Class(es):
+        nlogEnumTranslate
+
+    Method(s):
+        __init__(enumTranslate, format, paramCount)
+        string xlate(params)
+
+    Related:
+        nlogEnumTranslate
+
+    Author(s):
+        Randal Eike
+    """
+    PLAIN = 0
+    MARKER = 1
+    REPLACE = 2
+
+    def __init__(self, enumTranslate, format, paramCount):
+        """
+        Constructor
+
+        @param enumTranslate - nlogEnumTranslate object holding the enum dictionary
+        @param format - Format string for the nlog message
+        @param paramCount - Number of message parameters
+        """
+        self.enumTranslate = enumTranslate
+        self.format = format
+        self.enumDictionary = enumTranslate.enumDictionary
+        self.replaceTables = []
+        self.replaceMarkers = []
+        self.replaceQuotes = True
+        self.pieces = []
+
+        if (self.enumDictionary is None):
+            self.mode = nlogEnumFormat.PLAIN
+        elif (nlogEnumTranslate.enumFormatIdMarker in format):
+            self.mode = nlogEnumFormat.MARKER
+            try:
+                self.pieces = self.__compileMarkers(format)
+            except Exception:
+                self.pieces = None
+        else:
+            self.mode = nlogEnumFormat.REPLACE
+            self.__compileReplace(format, paramCount)
+
+    def __compileMarkers(self, format):
+        """
+        Split the format string on its enum markers, following nlogEnumTranslate.__enumMarkerReplace()
+
+        @param format - Format string for the nlog message
+
+        @return list - Format text strings and (enum table name, parameter number) tuples
+        """
+        pieces = []
+        paramNumber = 0
+        nextIndex = format.find("%")
+        formatIndex = nextIndex
+        newFormat = format[:nextIndex]
 
+        while (nextIndex != -1):
+            if (format[formatIndex:formatIndex+nlogEnumTranslate.enumFormatIdMarkerLen] == nlogEnumTranslate.enumFormatIdMarker):
+                enumEndIndex = format[formatIndex:].find(nlogEnumTranslate.enumFormatIdEndMarker)
+                if (enumEndIndex == -1): raise ValueError("Unterminated enum marker")
+                pieces.append(newFormat.replace('"', ''))
+                pieces.append((format[formatIndex+nlogEnumTranslate.enumFormatIdMarkerLen:formatIndex+enumEndIndex], paramNumber))
+                newFormat = ""
+                formatIndex += (enumEndIndex + nlogEnumTranslate.enumFormatIdEndMarkerLen)
+            elif (format[formatIndex+1] == "%"):
+                while (format[formatIndex] == "%"):
+                    newFormat += format[formatIndex]
+                    formatIndex += 1
+            else:
+                paramNumber += 1
+                newFormat += format[formatIndex]
+                formatIndex += 1
+
+            nextIndex = format[formatIndex:].find("%")
+            if (nextIndex != -1):
+                newFormat += format[formatIndex:nextIndex+formatIndex]
+                formatIndex += nextIndex
+            else:
+                newFormat += format[formatIndex:]
+
+        pieces.append(newFormat.replace('"', ''))
+        return pieces
+
+    def __compileReplace(self, format, paramCount):
+        """
+        Select the brute force enum replacement of nlogEnumTranslate.__bruteForceReplace() used by the format
+
+        @param format - Format string for the nlog message
+        @param paramCount - Number of message parameters
+        """
+        if (("PssDebugTrace" in format) and (paramCount == 1)):
+            self.replaceTables = ['pcie']
+            self.replaceMarkers = ['(%d)']
+        elif (("Npl_AdminCmdHandler: Received" in format) and ("AC_IDENTIFY" not in format) and (paramCount != 0)):
+            self.replaceTables = ['nvmeAdminCommands']
+            self.replaceMarkers = ['0x%x']
+            self.replaceQuotes = False
+        elif (("init state is: (%d)" in format) and (paramCount == 1)):
+            self.replaceTables = ['transInitState_e']
+            self.replaceMarkers = ['(%d)']
+        elif (("Bis_SetTransportSubSystemState(): Changing PSS State" in format)  and (paramCount == 2)):
+            self.replaceTables = ['pssState_e', 'pssState_e']
+            self.replaceMarkers = ['(%d)', '%d']
+        self.replaceFormat = format.replace('"', '')
+
+    def xlate(self, params):
+        """
+        Evaluate the format string with the enum names inserted
+
+        @param params - Message parameter value tuple
+
+        @return string - String with enum values inserted, None on evaluation error
+        """
+        if (self.mode == nlogEnumFormat.PLAIN):
+            try:
+                return self.format % params
+            except TypeError:
+                OutputLog.nlogFormatError("Eval TypeError", self.format, params)
+                return None
+
+        if (self.mode == nlogEnumFormat.MARKER):
+            if (self.pieces is None): return self.enumTranslate.enumParser(self.format, params)
+            newFormat = []
+            paramList = list(params)
+            for piece in self.pieces:
+                if (isinstance(piece, tuple)):
+                    enumTableName, paramNumber = piece
+                    try:
+                        newFormat.append(self.enumDictionary[enumTableName][params[paramNumber]].replace('"', ''))
+                        del paramList[paramNumber]
+                    except:
+                        # Treat is as an integer
+                        newFormat.append("%d")
+                else:
+                    newFormat.append(piece)
+            try:
+                return "".join(newFormat) % tuple(paramList)
+            except TypeError:
+                OutputLog.nlogFormatError(errorType="Eval TypeError", formatStr=self.format, params=params)
+                return None
+
+        try:
+            if (len(self.replaceTables) == 0):
+                return self.format % params
+            s = self.replaceFormat
+            for enumTableName, marker, param in zip(self.replaceTables, self.replaceMarkers, params):
+                s = s.replace(marker, self.enumDictionary[enumTableName][param])
+            if (self.replaceQuotes): s = s.replace('"', '')
+            return s
+        except Exception:
+            # Let the original translation report the error
+            return self.enumTranslate.enumParser(self.format, params)
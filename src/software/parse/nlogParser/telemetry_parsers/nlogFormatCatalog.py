@@ -0,0 +1,386 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors:Joseph Tarango, Randal Eike, Daniel Garces
+# *****************************************************************************/
+"""
+Brief:
+    nlogFormatCatalog.py - Pre-built binary catalog of the NLog_formats.py format table
+
+Description:
+    NLog_formats.py is compiled once into a catalog file holding a sorted uint32 key array, a fixed size entry
+    record per key and a string table.  The catalog is memory mapped, so it is shared by every process translating
+    nlogs, and an entry is only decoded on its first lookup.  The catalog records the modification time, size and
+    digest of its source and is rebuilt automatically when NLog_formats.py changes.
+
+    Default usage:
+        $ python -m src.software.parse.nlogParser.telemetry_parsers.nlogFormatCatalog --formats NLog_formats.py
+
+Classes:
+    NlogFormatCatalog
+
+Function(s):
+    compileFormatCatalog(formatsFile, catalogFile = None) - Build the catalog file of a formats file
+    loadFormatCatalog(formatsFile, catalogFile = None) - Open the catalog of a formats file, rebuilding it when stale
+"""
+
+#### library includes
+import sys, os, stat, struct, time, mmap, hashlib, optparse, datetime, traceback
+import numpy as np
+
+#### import test utilities
+from src.software.parse.nlogParser.test_util.output_log import OutputLog
+
+CATALOG_MAGIC = b'NLOGFMTC'
+CATALOG_VERSION = 1
+CATALOG_EXTENSION = '.catalog'
+
+# magic, version, source modification time (ns), source size, source digest, entry count, parameter name count
+CATALOG_HEADER = struct.Struct('<8sIqq32sII')
+CATALOG_ENTRY = np.dtype([('format', '<u4'), ('formatLength', '<u4'),
+                          ('file', '<u4'), ('fileLength', '<u4'),
+                          ('line', '<i8'),
+                          ('params', '<u4'), ('paramCount', '<u4')])
+CATALOG_STRING = np.dtype([('offset', '<u4'), ('length', '<u4')])
+CATALOG_ALIGNMENT = 8
+
+
+def _align(offset):
+    return (offset + CATALOG_ALIGNMENT - 1) & ~(CATALOG_ALIGNMENT - 1)
+
+
+def _layout(entryCount, paramNameCount):
+    """
+    Byte offsets of the key array, entry records, parameter name table and string table of a catalog
+    """
+    keysOffset = _align(CATALOG_HEADER.size)
+    entriesOffset = _align(keysOffset + entryCount * np.dtype('<u4').itemsize)
+    paramNamesOffset = entriesOffset + entryCount * CATALOG_ENTRY.itemsize
+    stringsOffset = _align(paramNamesOffset + paramNameCount * CATALOG_STRING.itemsize)
+    return keysOffset, entriesOffset, paramNamesOffset, stringsOffset
+
+
+def _sourceDigest(formatsFile):
+    with open(formatsFile, 'rb') as fileObj:
+        return hashlib.sha256(fileObj.read()).digest()
+
+
+def _privateCatalogFolder():
+    """
+    Per user catalog folder, raad/nlogCatalog in $XDG_CACHE_HOME or ~/.cache, created with access for its owner only
+
+    @return string - Folder name, None when it cannot be created or is owned or writable by another user
+    """
+    cacheFolder = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    catalogFolder = os.path.join(cacheFolder, 'raad', 'nlogCatalog')
+    try:
+        os.makedirs(catalogFolder, mode=0o700, exist_ok=True)
+        info = os.lstat(catalogFolder)
+    except OSError:
+        return None
+    if (not stat.S_ISDIR(info.st_mode)): return None
+    if (hasattr(os, 'getuid') and ((info.st_uid != os.getuid()) or (info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)))):
+        return None
+    return catalogFolder
+
+
+def _defaultCatalogFile(formatsFile):
+    """
+    Catalog file name next to the formats file, or in the private per user catalog folder when that directory is read
+    only.  A shared folder such as the temporary directory is never used since the catalog is trusted as is.
+
+    @return string - Catalog file name, None when there is no safe place for it
+    """
+    catalogFile = os.path.splitext(os.path.abspath(formatsFile))[0] + CATALOG_EXTENSION
+    if (os.access(os.path.dirname(catalogFile), os.W_OK) or os.path.exists(catalogFile)):
+        return catalogFile
+    catalogFolder = _privateCatalogFolder()
+    if (catalogFolder is None): return None
+    pathDigest = hashlib.sha1(os.path.abspath(formatsFile).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(catalogFolder, 'NLog_formats_' + pathDigest + CATALOG_EXTENSION)
+
+
+def _readFormats(formatsFile):
+    """
+    Import (read and execute) the NLog formats file
+
+    @param formatsFile - Path and name of the NLog_formats.py file
+
+    @return dict - Format key: (format string, file name, line number, parameter name list)
+    """
+    # Use exec rather than import here.
+    # Python maintains cached version of the imported files
+    # that don't always get updated when the underlying file changes,
+    # even if re-imported.
+    myLocals = {}
+    with open(formatsFile) as formatsFileObj:
+        exec(formatsFileObj.read(), {}, myLocals)
+    return myLocals["formats"]
+
+
+def compileFormatCatalog(formatsFile, catalogFile = None, formats = None):
+    """
+    Build the catalog file of a formats file.  The file is written to a temporary name and renamed, so processes
+    reading the previous catalog are never handed a partial file.
+
+    @param formatsFile - Path and name of the NLog_formats.py file
+    @param catalogFile - Path and name of the catalog, defaults to the formats file name with a .catalog extension,
+                         in the private per user catalog folder when the formats folder is read only
+    @param formats - Already loaded format dictionary of formatsFile, read from the file when None
+
+    @return string - Catalog file name
+    """
+    if (catalogFile is None): catalogFile = _defaultCatalogFile(formatsFile)
+    if (catalogFile is None): raise OSError("No private folder for the nlog format catalog of %s" % (formatsFile))
+    sourceInfo = os.stat(formatsFile)
+    sourceDigest = _sourceDigest(formatsFile)
+    if (formats is None): formats = _readFormats(formatsFile)
+
+    # String table with the repeated file and parameter names stored once
+    stringOffsets = {}
+    stringData = bytearray()
+
+    def addString(value):
+        if (value not in stringOffsets):
+            encoded = str(value).encode('utf-8', 'surrogatepass')
+            stringOffsets[value] = (len(stringData), len(encoded))
+            stringData.extend(encoded)
+        return stringOffsets[value]
+
+    keys = np.array(sorted(formats), dtype='<u4')
+    entries = np.zeros(len(keys), dtype=CATALOG_ENTRY)
+    paramNames = []
+    for index, key in enumerate(keys.tolist()):
+        formatStr, fileName, lineNumber, params = formats[key]
+        entries[index]['format'], entries[index]['formatLength'] = addString(formatStr)
+        entries[index]['file'], entries[index]['fileLength'] = addString(fileName)
+        entries[index]['line'] = lineNumber
+        entries[index]['params'] = len(paramNames)
+        entries[index]['paramCount'] = len(params)
+        paramNames.extend(addString(paramName) for paramName in params)
+    paramNames = np.array(paramNames, dtype=CATALOG_STRING)
+
+    keysOffset, entriesOffset, paramNamesOffset, stringsOffset = _layout(len(keys), len(paramNames))
+    image = bytearray(stringsOffset + len(stringData))
+    CATALOG_HEADER.pack_into(image, 0, CATALOG_MAGIC, CATALOG_VERSION, sourceInfo.st_mtime_ns, sourceInfo.st_size,
+                             sourceDigest, len(keys), len(paramNames))
+    image[keysOffset:keysOffset + keys.nbytes] = keys.tobytes()
+    image[entriesOffset:entriesOffset + entries.nbytes] = entries.tobytes()
+    image[paramNamesOffset:paramNamesOffset + paramNames.nbytes] = paramNames.tobytes()
+    image[stringsOffset:] = stringData
+
+    temporary = '{0}.{1}.tmp'.format(catalogFile, os.getpid())
+    try:
+        with open(temporary, 'wb') as fileObj:
+            fileObj.write(image)
+        os.replace(temporary, catalogFile)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    OutputLog.DebugPrint(2, format("Compiled %d nlog formats into %s" % (len(keys), catalogFile)))
+    return catalogFile
+
+
+class NlogFormatCatalog(object):
+    """
+    Brief:
+        NlogFormatCatalog() - Read only dictionary view of a memory mapped format catalog
+
+    Description:
+        Lookups binary search the key array of the catalog and decode the entry on first use into the same
+        (format string, file name, line number, parameter name list) tuple the NLog_formats.py dictionary holds.
+
+    Class(es):
+        None
+
+    Method(s):
+        __init__(catalogFile)
+        tuple __getitem__(key)
+        tuple get(key, default = None)
+        list keys(), values(), items()
+        tuple getSource()
+        close()
+
+    Related:
+        EventTupleTranslate - Format string lookups
+
+    Author(s):
+        Randal Eike
+    """
+    def __init__(self, catalogFile):
+        """
+        Constructor
+
+        @param catalogFile - Path and name of the catalog file
+        """
+        self.catalogFile = catalogFile
+        with open(catalogFile, 'rb') as fileObj:
+            self.catalogMap = mmap.mmap(fileObj.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.sourceMtime, self.sourceSize, self.sourceDigest, entryCount, paramNameCount = \
+            CATALOG_HEADER.unpack_from(self.catalogMap, 0)
+        if ((magic != CATALOG_MAGIC) or (version != CATALOG_VERSION)):
+            self.close()
+            raise ValueError("%s is not a version %d nlog format catalog" % (catalogFile, CATALOG_VERSION))
+
+        keysOffset, entriesOffset, paramNamesOffset, self.stringsOffset = _layout(entryCount, paramNameCount)
+        self.catalogKeys = np.frombuffer(self.catalogMap, dtype='<u4', count=entryCount, offset=keysOffset)
+        self.catalogEntries = np.frombuffer(self.catalogMap, dtype=CATALOG_ENTRY, count=entryCount, offset=entriesOffset)
+        self.catalogParamNames = np.frombuffer(self.catalogMap, dtype=CATALOG_STRING, count=paramNameCount, offset=paramNamesOffset)
+        self.entries = {}
+
+    def __string(self, offset, length):
+        start = self.stringsOffset + int(offset)
+        return self.catalogMap[start:start + int(length)].decode('utf-8', 'surrogatepass')
+
+    def __entry(self, index):
+        entry = self.catalogEntries[index]
+        paramNames = self.catalogParamNames[entry['params']:entry['params'] + entry['paramCount']]
+        return (self.__string(entry['format'], entry['formatLength']), self.__string(entry['file'], entry['fileLength']),
+                int(entry['line']), [self.__string(offset, length) for offset, length in paramNames.tolist()])
+
+    def __getitem__(self, key):
+        entry = self.entries.get(key)
+        if (entry is not None): return entry
+
+        try:
+            if ((key < 0) or (key > 0xFFFFFFFF)): raise KeyError(key)
+        except TypeError:
+            raise KeyError(key)
+        index = int(np.searchsorted(self.catalogKeys, key))
+        if ((index >= len(self.catalogKeys)) or (self.catalogKeys[index] != key)): raise KeyError(key)
+
+        entry = self.__entry(index)
+        self.entries[key] = entry
+        return entry
+
+    def get(self, key, default = None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self.catalogKeys)
+
+    def __iter__(self):
+        return iter(self.catalogKeys.tolist())
+
+    def keys(self):
+        return self.catalogKeys.tolist()
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def getSource(self):
+        """
+        @return tuple - Modification time (ns), size and sha256 digest of the formats file the catalog was built from
+        """
+        return self.sourceMtime, self.sourceSize, self.sourceDigest
+
+    def close(self):
+        self.catalogKeys = self.catalogEntries = self.catalogParamNames = None
+        self.catalogMap.close()
+
+
+def loadFormatCatalog(formatsFile, catalogFile = None):
+    """
+    Open the format catalog of a formats file.  A catalog whose recorded modification time and size differ from the
+    formats file is checked against the file digest, and rebuilt when the contents changed.  When the catalog cannot
+    be written, or there is no safe place for it, the formats are returned as the dictionary read from the formats file.
+
+    @param formatsFile - Path and name of the NLog_formats.py file
+    @param catalogFile - Path and name of the catalog, defaults to the formats file name with a .catalog extension,
+                         in the private per user catalog folder when the formats folder is read only
+
+    @return NlogFormatCatalog or dict - Format key: (format string, file name, line number, parameter name list)
+    """
+    if (catalogFile is None): catalogFile = _defaultCatalogFile(formatsFile)
+    if (catalogFile is None): return _readFormats(formatsFile)
+    sourceInfo = os.stat(formatsFile)
+
+    try:
+        catalog = NlogFormatCatalog(catalogFile)
+    except (OSError, ValueError, struct.error):
+        catalog = None
+
+    if (catalog is not None):
+        sourceMtime, sourceSize, sourceDigest = catalog.getSource()
+        if ((sourceMtime == sourceInfo.st_mtime_ns) and (sourceSize == sourceInfo.st_size)):
+            return catalog
+        if ((sourceSize == sourceInfo.st_size) and (sourceDigest == _sourceDigest(formatsFile))):
+            # Touched but unchanged, record the new time so the digest is not computed again
+            try:
+                with open(catalogFile, 'r+b') as fileObj:
+                    fileObj.write(CATALOG_HEADER.pack(CATALOG_MAGIC, CATALOG_VERSION, sourceInfo.st_mtime_ns, sourceSize,
+                                                      sourceDigest, len(catalog), len(catalog.catalogParamNames)))
+            except OSError:
+                pass
+            return catalog
+        catalog.close()
+        OutputLog.DebugPrint(2, format("Nlog format catalog %s is stale" % (catalogFile)))
+
+    formats = _readFormats(formatsFile)
+    try:
+        return NlogFormatCatalog(compileFormatCatalog(formatsFile, catalogFile, formats))
+    except OSError:
+        OutputLog.DebugPrint(1, format("Unable to write the nlog format catalog %s: %s" % (catalogFile, sys.exc_info()[1])))
+        return formats
+
+
+def main():
+    """
+    main function to be called when the script is directly executed from the command line
+    """
+    ##############################################
+    # Main function, Options
+    ##############################################
+    parser = optparse.OptionParser()
+    parser.add_option("--formats",
+                      dest='formats',
+                      default='NLog_formats.py',
+                      help='Path/filename of the NLog_formats.py file to compile')
+    parser.add_option("--catalog",
+                      dest='catalog',
+                      default=None,
+                      help='Path/filename of the catalog, default = <formats>.catalog')
+    parser.add_option("--force",
+                      action='store_true',
+                      dest='force',
+                      default=False,
+                      help='Rebuild the catalog even when it is up to date')
+    (options, args) = parser.parse_args()
+
+    ##############################################
+    # Main
+    ##############################################
+    startTime = time.time()
+    if options.force:
+        compileFormatCatalog(options.formats, options.catalog)
+    catalog = loadFormatCatalog(options.formats, options.catalog)
+    loadTime = time.time() - startTime
+
+    startTime = time.time()
+    _readFormats(options.formats)
+    execTime = time.time() - startTime
+
+    print("Formats: %d, catalog load %.4f s, exec load %.4f s" % (len(catalog), loadTime, execTime))
+    return 0
+
+
+if __name__ == '__main__':
+    """Performs execution delta of the process."""
+    pStart = datetime.datetime.now()
+    try:
+        main()
+    except Exception as errorMain:
+        print("Fail End Process: {0}".format(errorMain))
+        traceback.print_exc()
+    qStop = datetime.datetime.now()
+    print("Execution time: " + str(qStop - pStart))
@@ -7,7 +7,9 @@
 
 #### library includes
 import sys, struct, re, os, time
+import heapq, itertools, multiprocessing
 import ctypes
+import numpy as np
 
 #### import test utilities
 from src.software.parse.nlogParser.test_util.output_log import OutputLog
@@ -17,6 +19,7 @@ from src.software.parse.nlogParser.telemetryutil.telemetry_util import BuildFile
 
 #### import translation helpers
 from src.software.parse.nlogParser.telemetry_parsers.nlogEnum import nlogEnumTranslate
+from src.software.parse.nlogParser.telemetry_parsers.nlogFormatCatalog import loadFormatCatalog
 
 ### import nlog triage helpers
 from src.software.parse.nlogParser.nlog_triage.pssDebugTraceTriage import pssDebugTraceTriage
@@ -86,9 +89,10 @@ nlogNameDictionary = {
     }
 
 def NLogPoolArray(data):
-    count = int(len(data) / struct.calcsize("I"))
-    fmt = "I" * count
-    return list(struct.unpack(fmt,data))
+    """
+    View an nlog buffer as a uint32 array of its dwords, without copying the data.
+    """
+    return np.frombuffer(data, dtype=np.uint32, count=int(len(data) / struct.calcsize("I")))
 
 
 class UnionBase(ctypes.Union):
@@ -544,7 +548,8 @@ class EventHeader_union(ctypes.Union):
         if (self.dword == EventHeader_union.HOST_TIME_SET_TOKEN): return True
         else: return False
 
-    def getDwordCount(self):
+    @staticmethod
+    def getDwordCount():
         return 1
 
 class EventTimeStamp_struct(ctypes.Structure):
@@ -640,6 +645,7 @@ class NlogEventPoolParser(object):
 
     Method(s):
         __init__(nlogName)
+        dict getEventColumns(dwordList)
         tuple list getEventTupleList(dwordList)
 
     Related:
@@ -660,20 +666,6 @@ class NlogEventPoolParser(object):
         self.events = []
         self.localTimeZone = None
 
-    def __getTimeAndZone(self, tsSeconds, tsTicks, time0Mark = False, timeBaseSeconds = None, timeBaseTicks = None):
-        zone = 1
-        msgSeconds = tsSeconds
-        msgTicks = tsTicks
-
-        if (time0Mark == True):
-            if (timeBaseSeconds is None):
-                zone = 0
-            else:
-                msgSeconds = tsSeconds + timeBaseSeconds
-                msgTicks = tsTicks + timeBaseTicks
-
-        return zone, tsSeconds, tsTicks
-
     def setLocalTimeZone(self, timeZone):
         """
         Set the timezone according to the input local timezone specification from the log generator.
@@ -689,6 +681,181 @@ class NlogEventPoolParser(object):
             os.environ['TZ'] = timeZone
             time.tzset()
 
+    def getEventColumns(self, dwordList):
+        """
+        Decode the input nlog dword pool into columnar event arrays.  The pool is viewed as a uint32 array, the
+        event headers are validated with bitfield masks over the whole pool and only the variable length chain
+        of valid events is walked.
+
+        @param dwordList - Dword list or uint32 array of nlog entries, most recent entry first
+
+        @return dict - Arrays of the events from most recent to least recent: 'offset' header dword offset,
+                       'header' event header dword, 'zone' time zone 0 | 1, 'time0Mark', 'seconds', 'ticks',
+                       'paramOffset' and 'paramCount'
+        """
+        myPool = np.asarray(dwordList, dtype=np.uint32)
+        poolLen = len(myPool)
+        headerDwords = EventHeader_union.getDwordCount()
+        paramStart = headerDwords + EventTimeStamp_union.getDwordCount()
+
+        # Header bitfields of every dword, see EventHeader_struct and EventHeader_union.isValid()
+        numParams = (myPool & 0xFF).astype(np.int64)
+        eventNum = (myPool >> 8) & 0xFFF
+        sourceNum = myPool >> 20
+        empty = (myPool == EventHeader_union.EMPTY_TOKEN)
+        valid = ~empty & (numParams <= EventHeader_union.MAX_PARAMETER_COUNT) & (eventNum != 0) & \
+                ((sourceNum != 0) | np.isin(eventNum, EventHeader_union.SOURCE0_EVENT_LIST))
+
+        # Event end of every valid header and the valid header following it, as indices into validOffsets.
+        # validCount stands for the end of the pool.
+        validOffsets = np.flatnonzero(valid)
+        validCount = len(validOffsets)
+        validBefore = np.concatenate(([0], np.cumsum(valid)))
+        validEnds = validOffsets + paramStart + numParams[validOffsets]
+        successor = np.append(validBefore[np.minimum(validEnds, poolLen)], validCount)
+
+        # Follow the variable length chain from the first valid header by pointer doubling: after each pass the
+        # chain holds twice as many events and the jump table skips twice as far.  Empty and invalid dwords
+        # between the events are skipped by the successor table.
+        chain = np.zeros(min(validCount, 1), dtype=np.int64)
+        jump = successor
+        while (len(chain) > 0):
+            found = jump[chain]
+            found = found[found < validCount]
+            if (len(found) == 0): break
+            chain = np.concatenate((chain, found))
+            jump = jump[jump]
+
+        stopOffset = poolLen
+        if ((len(chain) > 0) and (validEnds[chain[-1]] > poolLen)):
+            # Hit the end of the list
+            OutputLog.DebugPrint(2, "nextOffset (%d) > len (%d)" % (validEnds[chain[-1]], poolLen))
+            stopOffset = validOffsets[chain[-1]]
+            chain = chain[:-1]
+
+        offsets = validOffsets[chain]
+        headers = myPool[offsets]
+        timeStamps = myPool[offsets + headerDwords]
+        time0Mark = (timeStamps >> 31).astype(bool)
+        seconds = timeStamps & 0x7FFFFFFF
+        ticks = myPool[offsets + headerDwords + 1]
+        paramCount = numParams[offsets]
+
+        # Time-zero events are zone 0 until a time adjust event is found, the stamps stay relative to time-zero
+        timeAdjusted = np.cumsum(headers == EventHeader_union.TIME_ADJUSTMENT_TOKEN) > 0
+        zone = np.where(time0Mark & ~timeAdjusted, 0, 1)
+
+        self.__reportSkippedHeaders(myPool, empty, valid, offsets, validEnds[chain], stopOffset, zone, seconds, ticks)
+
+        return {'offset': offsets, 'header': headers, 'zone': zone, 'time0Mark': time0Mark, 'seconds': seconds,
+                'ticks': ticks, 'paramOffset': offsets + paramStart, 'paramCount': paramCount}
+
+    def __reportSkippedHeaders(self, myPool, empty, valid, offsets, ends, stopOffset, zone, seconds, ticks):
+        """
+        Debug output for the empty and invalid header dwords skipped between the decoded events
+
+        @param myPool - uint32 array of nlog entries
+        @param empty - Empty dword mask of the pool
+        @param valid - Valid header mask of the pool
+        @param offsets - Header offsets of the decoded events
+        @param ends - Offset following each decoded event
+        @param stopOffset - Offset the decoding stopped at
+        @param zone, seconds, ticks - Time stamp columns of the decoded events
+        """
+        if (OutputLog.debugOutputLevel < 1): return
+
+        # Dwords that are not part of a decoded event
+        covered = np.zeros(len(myPool) + 1, dtype=np.int64)
+        covered[offsets] += 1
+        covered[ends] -= 1
+        skipped = (np.cumsum(covered[:-1]) == 0)
+        skipped[stopOffset:] = False
+
+        emptyCount = int(np.count_nonzero(skipped & empty))
+        if (emptyCount > 0):
+            # Normal if the log hasn't wrapped yet
+            OutputLog.DebugPrint(4, format("Nlog %s, core %s, %d empty eventHeader dwords" % (self.nlogName, self.coreId, emptyCount)))
+
+        invalidOffsets = np.flatnonzero(skipped & ~empty & ~valid)
+        previousEvents = np.searchsorted(offsets, invalidOffsets) - 1
+        for offset, previous in zip(invalidOffsets.tolist(), previousEvents.tolist()):
+            # Invalid entry
+            EventHeader_union(myPool, offset).isValid()
+            if (previous >= 0):
+                OutputLog.DebugPrint(1, "Invalid event header at offset (%d) of (%d), nlog %s, core %s" % (offset-1, len(myPool), self.nlogName, self.coreId))
+                OutputLog.DebugPrint(2, "Previous Entry: zone (%d) ts (0x%X:0x%x)" % (zone[previous], seconds[previous], ticks[previous]))
+                OutputLog.DebugPrint(2, "Previous Entry: header (0x%x), nlog %s, core %s" % (myPool[offsets[previous]], self.nlogName, self.coreId))
+
+    def __hostTimeMarker(self, params):
+        """
+        Generate the host time marker string of a host time set event
+
+        @param params - Host time set event parameter tuple
+
+        @return string - Host time marker text
+        """
+        utcHostTimeParamMs = (int(params[0]) << 32) + int(params[1])
+        utcHostTimeParmSec = (int(params[2]) << 32) + int(params[3])
+        utcHostTimeSec =  int(utcHostTimeParamMs / 1000.0)
+        utcHostTimeMSec = utcHostTimeParamMs % 1000
+        powerOnTimeMs = (int(params[4]) << 32) + int(params[5])
+
+        if (utcHostTimeParmSec != utcHostTimeSec):
+            OutputLog.Warning("FW param host seconds %u != calculated host time seconds %u" % (utcHostTimeParmSec, utcHostTimeSec))
+
+        if (self.localTimeZone is None):
+            tmStruct = time.gmtime(utcHostTimeSec)
+            timeZoneName = "UTC"
+        else:
+            tmStruct = time.localtime(utcHostTimeSec)
+            timeZoneName = time.tzname[tmStruct.tm_isdst]
+
+        hostTimestamp = ("Host time marker %s.%03u %s, Power On time %u ms" % (time.asctime(tmStruct), utcHostTimeMSec, timeZoneName, powerOnTimeMs))
+        OutputLog.DebugPrint(2, hostTimestamp)
+        return hostTimestamp
+
+    def __eventTuples(self, myPool, columns, start, stop):
+        """
+        Generate the event tuples of a range of decoded events in chronological order
+
+        @param myPool - uint32 array of nlog entries
+        @param columns - Event columns returned by getEventColumns()
+        @param start - First chronological event index of the range
+        @param stop - Chronological event index following the range
+
+        @return generator - nlog event tuples, host time marker tuples follow their host time set event
+        """
+        # getEventColumns() lists the events from most recent to least recent
+        eventCount = len(columns['offset'])
+        chronological = slice(eventCount - 1 - start, (eventCount - 1 - stop) if (stop < eventCount) else None, -1)
+
+        # Header objects are shared by the events with the same header dword
+        headerCache = {}
+        specialTokens = (EventHeader_union.TIME_ADJUSTMENT_TOKEN, EventHeader_union.WALL_CLOCK_EPOCH_TOKEN, EventHeader_union.HOST_TIME_SET_TOKEN)
+
+        for header, zone, tsSeconds, tsTicks, paramOffset, paramCount in zip(columns['header'][chronological].tolist(), columns['zone'][chronological].tolist(),
+                                                                              columns['seconds'][chronological].tolist(), columns['ticks'][chronological].tolist(),
+                                                                              columns['paramOffset'][chronological].tolist(), columns['paramCount'][chronological].tolist()):
+            eventHeader = headerCache.get(header)
+            if (eventHeader is None):
+                eventHeader = EventHeader_union([header], 0)
+                headerCache[header] = eventHeader
+
+            # Get the parameters
+            params = tuple(myPool[paramOffset:paramOffset + paramCount].tolist())
+
+            # Add the entry
+            yield (zone, tsSeconds, tsTicks, eventHeader, params, self.nlogName, self.coreId)
+
+            # Check for time markers
+            if (header in specialTokens):
+                if (eventHeader.isTimeAdjustEvent()):
+                    OutputLog.DebugPrint(2, "Time-zero base 0x%08X 0x%08X" % (params[0] & 0x7fffffff, params[1]))
+                if (eventHeader.isWallClockEpochTimeEvent()):
+                    OutputLog.DebugPrint(2, "Wall clock time %s" % (str(time.localtime(params[0]))))
+                if (eventHeader.isHostTimeSetEvent()):
+                    yield (zone, tsSeconds, tsTicks, None, [self.__hostTimeMarker(params)], self.nlogName, self.coreId)
+
     def getEventTupleList(self, dwordList):
         """
         Read and translate the input nlog bin file into an ordered event tuple list.  Modified from nlogpost2.py extractEvents().
@@ -697,94 +864,177 @@ class NlogEventPoolParser(object):
 
         @return list - Chronologically ordered list of nlog events tuples (zone number 0 | 1, time stamp MSW, time stamp LSW, eventHeader ID structure, param tuple, nlog name string)
         """
-        myPool = dwordList
-        hostTimestampList = []
-
-        # Find the events from most recent to least recent
-        del self.events[:]
-        offset = 0
-        timeBaseSeconds, timeBaseTicks = None, None
-        previousEvent = (-1, 0, 0, 0, [], self.nlogName, self.coreId)
-
-        while (offset < len(myPool)):
-            # Get the event haeder data
-            eventHeader = EventHeader_union(myPool, offset)
-            if (eventHeader.isEmpty()):
-                # Normal if the log hasn't wrapped yet
-                OutputLog.DebugPrint(4, format("Nlog %s, core %d, eventHeader[%d] empty" % (self.nlogName, self.coreId, offset)))
-                offset += 1
-                continue
-
-            if (False == eventHeader.isValid()):
-                # Invalid entry
-                previousZone, prevSeconds, prevTicks, previousHeader, prevParams, prevnlogName, prevcoreId = previousEvent
-                if (-1 != previousZone):
-                    OutputLog.DebugPrint(1, "Invalid event header at offset (%d) of (%d), nlog %s, core %d" % (offset-1, len(myPool), self.nlogName, self.coreId))
-                    OutputLog.DebugPrint(2, "Previous Entry: zone (%d) ts (0x%X:0x%x)" % (previousZone, prevSeconds, prevTicks))
-                    OutputLog.DebugPrint(2, "Previous Entry: header (0x%x), nlog %s, core %d" % (previousHeader.getFormatDictionaryKey(), prevnlogName, prevcoreId))
-
-                offset += 1
-                continue
-
-            # Check if this event has been partially overwritten and is no good.
-            numParams = eventHeader.getNumParams()
-            timeStampOffset = offset + eventHeader.getDwordCount()
-            paramOffset = timeStampOffset + EventTimeStamp_union.getDwordCount()
-            nextOffset = paramOffset + numParams
-
-            if (nextOffset > len(myPool)):
-                # Hit the end of the list
-                OutputLog.DebugPrint(2, "nextOffset (%d) > len (%d)" % (nextOffset, len(myPool)))
-                break
-
-            # Get the timestamp
-            timeStamp = EventTimeStamp_union(myPool, timeStampOffset)
-            time0Mark, tsSeconds, tsTicks = timeStamp.getStruct().getTime()
+        myPool = np.asarray(dwordList, dtype=np.uint32)
+        columns = self.getEventColumns(myPool)
+        self.events[:] = self.__eventTuples(myPool, columns, 0, len(columns['offset']))
+        return self.events
 
-            # Get the parameters
-            params = tuple(myPool[paramOffset:nextOffset])
-
-            # Check for 
-            if (eventHeader.isTimeAdjustEvent()):
-                timeBaseSeconds, timeBaseTicks = list(params)[0], list(params)[1]
-                timeBaseSeconds &= 0x7fffffff
-                OutputLog.DebugPrint(2, "Time-zero base 0x%08X 0x%08X" % (timeBaseSeconds, timeBaseTicks))
-
-            if (eventHeader.isWallClockEpochTimeEvent()):
-                wallClockSeconds = list(params)[0]
-                OutputLog.DebugPrint(2, "Wall clock time %s" % (str(time.localtime(wallClockSeconds))))
-
-            if (eventHeader.isHostTimeSetEvent()):
-                utcHostTimeParamMs = (int(list(params)[0]) << 32) + int(list(params)[1])
-                utcHostTimeParmSec = (int(list(params)[2]) << 32) + int(list(params)[3])
-                utcHostTimeSec =  int(utcHostTimeParamMs / 1000.0)
-                utcHostTimeMSec = utcHostTimeParamMs % 1000
-                powerOnTimeMs = (int(list(params)[4]) << 32) + int(list(params)[5])
-
-                if (utcHostTimeParmSec != utcHostTimeSec):
-                    OutputLog.Warning(("FW param host seconds %u != calculated host time seconds %u", (utcHostTimeParmSec, utcHostTimeSec)))
-
-                if (self.localTimeZone is None):
-                    tmStruct = time.gmtime(utcHostTimeSec)
-                    timeZoneName = "UTC"
-                else:
-                    tmStruct = time.localtime(utcHostTimeSec)
-                    timeZoneName = time.tzname[tmStruct.tm_isdst]
+    def getEventStreams(self, dwordList, counterFreq):
+        """
+        Split the events of the nlog pool into runs ordered by timestamp, for a k-way merge with the runs of other
+        pools.  A run ends wherever the timestamp of the pool goes backwards.
 
-                hostTimestamp = ("Host time marker %s.%03u %s, Power On time %u ms" % (time.asctime(tmStruct), utcHostTimeMSec, timeZoneName, powerOnTimeMs))
-                OutputLog.DebugPrint(2, hostTimestamp)
-                zone, msgSeconds, msgTicks = self.__getTimeAndZone(tsSeconds, tsTicks, time0Mark, timeBaseSeconds, timeBaseTicks)
-                self.events.append( (zone, msgSeconds, msgTicks, None, [hostTimestamp], self.nlogName, self.coreId) )
+        @param dwordList - Dword list of nlog entries
+        @param counterFreq - Frequency of the timestamp counter
 
-            # Add the entry
-            zone, msgSeconds, msgTicks = self.__getTimeAndZone(tsSeconds, tsTicks, time0Mark, timeBaseSeconds, timeBaseTicks)
-            self.events.append( (zone, msgSeconds, msgTicks, eventHeader, params, self.nlogName, self.coreId) )
-            previousEvent = (zone, tsSeconds, tsTicks, eventHeader, params, self.nlogName, self.coreId)
-            offset = nextOffset
+        @return list - Generators of (sort key, nlog event tuple), the sort key orders the events as their text timestamp
+        """
+        myPool = np.asarray(dwordList, dtype=np.uint32)
+        columns = self.getEventColumns(myPool)
+        eventTimes = (columns['seconds'] + columns['ticks'] / (counterFreq * 1.0))[::-1]
+        timeZeroFlags = (1 - columns['zone'])[::-1]
+
+        # Time-zero events sort after the regular events with the same time, as their '*' flag does
+        backwards = (eventTimes[1:] < eventTimes[:-1]) | ((eventTimes[1:] == eventTimes[:-1]) & (timeZeroFlags[1:] < timeZeroFlags[:-1]))
+        bounds = [0] + (np.flatnonzero(backwards) + 1).tolist() + [len(eventTimes)]
+        return [self.__keyedEvents(myPool, columns, start, stop, counterFreq) for start, stop in zip(bounds[:-1], bounds[1:]) if (stop > start)]
+
+    def __keyedEvents(self, myPool, columns, start, stop, counterFreq):
+        for event in self.__eventTuples(myPool, columns, start, stop):
+            zone, tsSeconds, tsTicks = event[0], event[1], event[2]
+            yield ((tsSeconds + (tsTicks / (counterFreq * 1.0)), 1 - zone), event)
+
+class NlogEventFormatter(object):
+    """
+    Brief:
+        NlogEventFormatter() - Compiled translation of one nlog format key
+
+    Description:
+        Holds the parameter layout (32/64-bit, signed, character), the Python compatible format string and the
+        enum formatter of one NLog_formats.py entry, so that an event is translated with one parameter conversion
+        and one % evaluation.  The layout is built with the same rules as EventTupleTranslate.__reformat(), which
+        is still used for the formats that consume more parameters than the event holds.
+
+    Class(es):
+        nlogEnumFormat
+
+    Method(s):
+        __init__(formatStr, paramCount, enumTranslate, reformat)
+        string, tuple reformat(params)
+        string addEnums(formatStr, params)
+
+    Related:
+        EventTupleTranslate - Builds and caches one formatter per format key
+
+    Author(s):
+        Randal Eike
+    """
+    PARAM_SPEC = re.compile(r'(%[-\.\d]*?l*[cdfiusxX])')
+    PARAM_SPEC_LONG = re.compile(r'%[-\.\d]*?l[cdfiusxX]')
+    PARAM_SPEC_SIGNED = re.compile(r'%[-\.\d]*?l*[di]')
+    PARAM_SPEC_CHAR = re.compile(r'%[-\.\d]*?l*[cs]')
+
+    PARAM_PLAIN = 0
+    PARAM_SIGNED = 1
+    PARAM_CHAR = 2
+
+    def __init__(self, formatStr, paramCount, enumTranslate, reformat):
+        """
+        Constructor
+
+        @param formatStr - NLog_formats.py format string
+        @param paramCount - Number of event parameters
+        @param enumTranslate - nlogEnumTranslate object
+        @param reformat - Uncompiled reformat function, formatStr, params -> format string, parameter tuple
+        """
+        self.formatStr = formatStr
+        self.paramCount = paramCount
+        self.enumTranslate = enumTranslate
+        self.legacyReformat = reformat
+        self.pyFormat, self.layout = self.__compileLayout(formatStr, paramCount)
+
+        if (self.pyFormat is None):
+            self.enumFormat = None
+            self.directParams = False
+        else:
+            self.enumFormat = enumTranslate.getEnumFormat(self.pyFormat, len(self.layout))
+            self.directParams = (len(self.layout) == paramCount) and \
+                                all((bits == 32) and (kind == NlogEventFormatter.PARAM_PLAIN) for _, bits, kind in self.layout)
+
+    def __compileLayout(self, formatStr, paramCount):
+        """
+        Find the parameter specifications of the format string and convert it to a Python printf string
+
+        @param formatStr - NLog_formats.py format string
+        @param paramCount - Number of event parameters
+
+        @return string - Python format string or None if the parameters run out
+                list - (parameter index, bits, kind) of each format parameter
+        """
+        layout = []
+        oldIdx = 0
+
+        # Hide any "%%" format-specs in the string from the RE searches below.
+        newFmt = re.sub('%%','<<%>><<%>>', formatStr)
+
+        for match in NlogEventFormatter.PARAM_SPEC.finditer(newFmt):
+            paramSpec = match.group(1)
+            if NlogEventFormatter.PARAM_SPEC_LONG.match(paramSpec): bits = 64
+            else: bits = 32
+            if ((oldIdx + int(bits / 32)) > paramCount): return None, None
+
+            if NlogEventFormatter.PARAM_SPEC_SIGNED.match(paramSpec):
+                kind = NlogEventFormatter.PARAM_SIGNED
+            elif NlogEventFormatter.PARAM_SPEC_CHAR.match(paramSpec):
+                # Convert %c to %s in format.
+                kind = NlogEventFormatter.PARAM_CHAR
+                newFmt = re.sub(paramSpec, re.sub('c','s',paramSpec), newFmt)
+            else:
+                kind = NlogEventFormatter.PARAM_PLAIN
+
+            layout.append((oldIdx, bits, kind))
+            oldIdx += int(bits / 32)
+
+        # Un-Hide any "%%" format-specs in the string from the RE searches above.
+        newFmt = re.sub('<<%>><<%>>','%%', newFmt)
+        return newFmt, layout
+
+    def reformat(self, params):
+        """
+        Convert the event parameters to the Python format string parameters
+
+        @param params - Parameter value tuple
+
+        @return string - Python format string
+                tuple - New parameter tuple
+        """
+        if (self.pyFormat is None): return self.legacyReformat(self.formatStr, params)
+        if (self.directParams): return self.pyFormat, tuple(params)
+
+        newParams = []
+        for paramIdx, bits, kind in self.layout:
+            if (bits == 64): myParam = (params[paramIdx] << 32) + params[paramIdx+1]
+            else: myParam = params[paramIdx]
+
+            if (kind == NlogEventFormatter.PARAM_SIGNED):
+                # Handle sign for %d (and %i); Python treats everything as unsigned.
+                if myParam & (1 << (bits - 1)):
+                    myParam -= (1 << bits)
+            elif (kind == NlogEventFormatter.PARAM_CHAR):
+                # Handle multiple characters for %c (and %s) -- NLog-only extension.
+                chrStr = ""
+                for chIdx in range(0, int(bits / 8)):
+                    ch = chr((myParam >> (bits - (chIdx + 1) * 8)) & 0xFF)
+                    if ch != chr(0):
+                        chrStr += ch
+                myParam = chrStr
+
+            newParams.append(myParam)
+
+        return self.pyFormat, tuple(newParams)
+
+    def addEnums(self, formatStr, params):
+        """
+        Evaluate the reformatted string with the enum names inserted
+
+        @param formatStr - Format string returned by reformat()
+        @param params - Parameter tuple returned by reformat()
+
+        @return string - Translated string or None on evaluation error
+        """
+        if (self.enumFormat is None): return self.enumTranslate.enumParser(formatStr, params)
+        return self.enumFormat.xlate(params)
 
-        # Switch Event list to chronological ordering
-        self.events.reverse()
-        return self.events
 
 class EventTupleTranslate(object):
     """
@@ -809,9 +1059,13 @@ class EventTupleTranslate(object):
     Author(s):
         Randal Eike, Methods taken from nlogpost2.py and modified to use telemetry tools structures
     """
+    # Log name of an output string without and with the core number
+    FIRST_ENTRY_NAME = re.compile(r".{27}\((.{4})\)")
+    FIRST_ENTRY_CORE_NAME = re.compile(r".{32}\((.{4})\)")
+
     def __getNLogFormats(self, formatsFile):
         """
-        Import (read and execute) the NLog formats file into this script.  
+        Load the NLog formats file into this script through its pre-built format catalog.
         Stolen from nlogpost2.py getNLogFormats() and modified to work in the class
 
         @param formatsFile - Path and name of the nlog_formats.py file
@@ -824,16 +1078,8 @@ class EventTupleTranslate(object):
 
         # Get Format Strings
         try:
-            # Use exec rather than import here.
-            # Python maintains cached version of the imported files
-            # that don't always get updated when the underlying file changes,
-            # even if re-imported.
-            myLocals = {}
-            formatsFileObj = open(formatsFile)
-            exec(formatsFileObj.read(), {}, myLocals)
-            formats = myLocals["formats"]
-            formatsFileObj.close()
-            return formats
+            # Use the memory mapped catalog of the formats file, rebuilt when the file changes.
+            return loadFormatCatalog(formatsFile)
 
         except:
             OutputLog.Error(format("Couldn't load the formats file (%s): %s" % (formatsFile, sys.exc_info()[0])))
@@ -853,9 +1099,13 @@ class EventTupleTranslate(object):
         self.enumDictionary = nlogEnumTranslate(enumParserFile)
         self.basePath = os.path.abspath("..")
         self.triageObjectList = []  # empty list
+        self.triageDispatch = {}  # format key: (time update, triage objects), built on first use
         self.triageMessageList = []  # empty list
         self.triageHeader = []  # empty list
         self.inlineTriage = inlineTriage
+        self.formatters = {}  # (format key, parameter count): NlogEventFormatter, built on first use
+        self.logNames = {}
+        self.eventCount = 0
 
 
     def __reformat(self, formatStr, params):
@@ -995,6 +1245,22 @@ class EventTupleTranslate(object):
 
         return formatStr
 
+    def __getFormatter(self, lookupKey, paramCount):
+        """
+        Get the compiled formatter of a format key, building it on the first use of the key
+
+        @param lookupKey - Key value for the dictionary lookup
+        @param paramCount - Event parameter count
+
+        @return NlogEventFormatter - Formatter of the key
+        """
+        formatter = self.formatters.get((lookupKey, paramCount))
+        if (formatter is None):
+            formatStr = self.__getFormatString(lookupKey, paramCount)
+            formatter = NlogEventFormatter(formatStr, paramCount, self.enumDictionary, self.__reformat)
+            self.formatters[(lookupKey, paramCount)] = formatter
+        return formatter
+
     def __addEnums(self, formatStr, params):
         """
         Use the enum parser to insert the enum values into the format string
@@ -1018,27 +1284,48 @@ class EventTupleTranslate(object):
 
         return retStr
 
-    def __addTriageNlogEvent(self, formatStr, params, tsSeconds, tsTicks, coreId):
+    def __getTriageDispatch(self, formatStr):
+        """
+        Build the triage dispatch entry of a format string
+
+        @param formatStr - nlog format string
+
+        @return tuple - (True if the event updates the triage time base, triage objects interested in the event)
+        """
+        if ("Recovered power-down time:" in formatStr):
+            return (True, tuple(self.triageObjectList))
+        return (False, tuple(triageObject for triageObject in self.triageObjectList if triageObject.isTriageFormat(formatStr)))
+
+    def __addTriageNlogEvent(self, formatKey, formatStr, params, tsSeconds, tsTicks, coreId):
         """
-        Add the event to the triage event lists
+        Add the event to the triage event lists of the triage objects interested in its format
 
+        @param formatKey - (format dictionary key, parameter count) of the event or None for a host time marker
         @param formatStr - nlog format string
         @param params - nlog associated parameter tuple
         @param tsSeconds - nlog seconds timestamp
         @param tsTicks - nlog ticks timestamp
         @param coreId - core Id number
         """
-        seconds = tsSeconds + (tsTicks / (self.counterFreq * 1.0))
+        # Look up the triage objects of the format, the marker searches are only done on the first event of a format
+        dispatch = self.triageDispatch.get(formatKey)
+        if (dispatch is None):
+            dispatch = self.__getTriageDispatch(formatStr)
+            self.triageDispatch[formatKey] = dispatch
+
+        timeUpdate, triageObjects = dispatch
         retMessageList = []
-        for triageObject in self.triageObjectList:
-            if ("Recovered power-down time:" in formatStr):
-                seconds = params[0] + (params[1] / (self.counterFreq * 1.0))
+        if (timeUpdate):
+            seconds = params[0] + (params[1] / (self.counterFreq * 1.0))
+            for triageObject in triageObjects:
                 triageObject.updateTime(seconds)
-            else:
+        elif (len(triageObjects) > 0):
+            seconds = tsSeconds + (tsTicks / (self.counterFreq * 1.0))
+            for triageObject in triageObjects:
                 hostMessage = triageObject.addNlogEvent(formatStr, params, seconds, coreId)
                 if (hostMessage is not None): retMessageList.append(hostMessage)
 
-        self.triageMessageList.extend(retMessageList)
+            self.triageMessageList.extend(retMessageList)
         return retMessageList
 
     def xlateEvents(self, events):
@@ -1052,25 +1339,46 @@ class EventTupleTranslate(object):
 
         @return - list of strings, list of nlog output strings
         """
-        nlogTextEvents = []
-        del self.triageMessageList[0:]
+        return list(self.xlateEventStream(events))
+
+    def xlateEventStream(self, events):
+        """
+        Translate the given NLog event tuples one at a time, the strings are generated as the events are consumed.
+
+        @param events - Iterable of chronologically ordered nlog event tuples
+
+        @return - generator of nlog output strings
+        """
+        return self.triageEventStream(self.formatEventStream(events))
+
+    def formatEventStream(self, events):
+        """
+        Format the given NLog event tuples without triage, the formatting of an event does not depend on the other
+        events so the tuples may be formatted in any order or process.
+
+        @param events - Iterable of nlog event tuples
 
+        @return - generator of (triage arguments tuple, nlog output string)
+        """
         for zone, tsSeconds, tsTicks, eventHeader, params, logName, coreId, in events:
             # Look up the format string
             if (eventHeader is not None):
-                lookupKey = eventHeader.getFormatDictionaryKey()
-                formatStr = self.__getFormatString(lookupKey, len(params))
+                formatKey = (eventHeader.getFormatDictionaryKey(), len(params))
+                formatter = self.__getFormatter(*formatKey)
 
                 # Base formatted string
-                formatStr, params = self.__reformat(formatStr, params)
+                formatStr, params = formatter.reformat(params)
             else:
+                formatKey = None
+                formatter = None
                 formatStr = "%s"
-            
-            # Test if the message needs to be triaged
-            inlineTriageMsgList = self.__addTriageNlogEvent(formatStr, params, tsSeconds, tsTicks, coreId)
+
+            # The triage objects see the base formatted string
+            triageArgs = (formatKey, formatStr, params, tsSeconds, tsTicks, coreId)
 
             # try to add enum values
-            enumStr = self.__addEnums(formatStr, params)
+            if (formatter is not None): enumStr = formatter.addEnums(formatStr, params)
+            else: enumStr = self.__addEnums(formatStr, params)
             if (enumStr is None):
                 formatStr = "Translation Error:" + formatStr + str(params)
             else:
@@ -1081,18 +1389,34 @@ class EventTupleTranslate(object):
             if formatStr[-2:]=='\\n': formatStr = formatStr[:-2]                       # Remove (last) trailing newline, if any.
 
             # Take out any space in logName in order to make the output more predictable
-            logName = re.sub(' ','',logName.upper())
+            if (logName not in self.logNames): self.logNames[logName] = re.sub(' ','',logName.upper())
+            logName = self.logNames[logName]
             if (coreId is None):
-                nlogTextEvents.append( " %25s (%4s) %s" % (self.__strTimestamp(zone, tsSeconds, tsTicks), logName, formatStr) )
+                yield triageArgs, " %25s (%4s) %s" % (self.__strTimestamp(zone, tsSeconds, tsTicks), logName, formatStr)
             else:
-                nlogTextEvents.append( " %25s %4s (%4s) %s" % (self.__strTimestamp(zone, tsSeconds, tsTicks), str(coreId), logName, formatStr) )
+                yield triageArgs, " %25s %4s (%4s) %s" % (self.__strTimestamp(zone, tsSeconds, tsTicks), str(coreId), logName, formatStr)
+
+    def triageEventStream(self, formattedEvents):
+        """
+        Pass the formatted events to the registered triage objects, the events must be in chronological order.
+
+        @param formattedEvents - Iterable of (triage arguments tuple, nlog output string) from formatEventStream()
+
+        @return - generator of nlog output strings followed by their inline triage messages
+        """
+        del self.triageMessageList[0:]
+        self.eventCount = 0
+
+        for triageArgs, nlogText in formattedEvents:
+            # Test if the message needs to be triaged
+            inlineTriageMsgList = self.__addTriageNlogEvent(*triageArgs)
+            self.eventCount += 1
+            yield nlogText
 
             # Add inline triage messages if enabled
             if (self.inlineTriage == True): 
                 for triageMessage in inlineTriageMsgList: 
-                    nlogTextEvents.append(triageMessage)
-
-        return nlogTextEvents
+                    yield triageMessage
 
     def generateHeader(self, counterFreq, coreId = None):
         # Print frequency
@@ -1111,30 +1435,28 @@ class EventTupleTranslate(object):
     def markFirstEntry(self, nlogTextEvents):
         # Sort the list
         nlogTextEvents.sort()
-        markedList = []
+        return list(self.markFirstEntryStream(nlogTextEvents))
 
-        nlogFirstEntry = []
+    def markFirstEntryStream(self, nlogTextEvents):
+        """
+        Tag the first entry of each log buffer in already ordered nlog strings
+
+        @param nlogTextEvents - Iterable of ordered nlog output strings
+
+        @return - generator of tagged nlog output strings
+        """
+        nlogFirstEntry = set()
         for nlogText in nlogTextEvents:
-            ### search for first entry per log buffer
+            ### search for first entry per log buffer, old format without core number then new format with core number
             firstTag = ' '
-
-            ### old format without core number
-            if re.match(".{27}\((.{4})\)",nlogText):
-                m = re.match(".{27}\((.{4})\)",nlogText)
-                if (m.group(1).upper() not in nlogFirstEntry):
-                    nlogFirstEntry.append(m.group(1).upper())
+            m = EventTupleTranslate.FIRST_ENTRY_NAME.match(nlogText) or EventTupleTranslate.FIRST_ENTRY_CORE_NAME.match(nlogText)
+            if (m is not None):
+                logName = m.group(1).upper()
+                if (logName not in nlogFirstEntry):
+                    nlogFirstEntry.add(logName)
                     firstTag = '1'
 
-            ### new format with core number
-            elif re.match(".{32}\((.{4})\)",nlogText):
-                m = re.match(".{32}\((.{4})\)",nlogText)
-                if (m.group(1).upper() not in nlogFirstEntry):
-                    nlogFirstEntry.append(m.group(1).upper())
-                    firstTag = '1'    
-
-            markedList.append(firstTag + nlogText)
-
-        return markedList
+            yield firstTag + nlogText
 
     def RegisterTriageObject(self, nlogTriageObj):
         """
@@ -1144,6 +1466,7 @@ class EventTupleTranslate(object):
         """
         self.triageObjectList.append(nlogTriageObj)
         self.triageHeader.append(nlogTriageObj.getVersion())
+        self.triageDispatch.clear()
 
     def RegisterTriageList(self, nlogTriageList):
         """
@@ -1152,6 +1475,7 @@ class EventTupleTranslate(object):
         @param nlogTriageList - Nlog triage object to register
         """
         self.triageObjectList.extend(nlogTriageList)
+        self.triageDispatch.clear()
 
     def GetTriageText(self):
         """
@@ -1166,6 +1490,39 @@ class EventTupleTranslate(object):
         return retMessageList
 
 
+# Translator of a worker process, the format catalog and enum file are loaded once per worker
+_workerTranslate = None
+
+def _initXlateWorker(formatsFile, enumFile, debugLevel):
+    """
+    Process pool initializer, load the translation files of the worker
+
+    @param formatsFile - Path/File name of the Nlog_formats.py file
+    @param enumFile    - Path/File name of the nlog enum file or None
+    @param debugLevel  - Debug message level of the parent process
+    """
+    global _workerTranslate
+    OutputLog.setDebugLevel(debugLevel)
+    _workerTranslate = EventTupleTranslate(formatsFile = formatsFile, enumParserFile = enumFile)
+
+def _xlatePoolWorker(poolTask):
+    """
+    Decode and format one nlog pool in a worker process
+
+    @param poolTask - (nlog name, core, pool counter frequency, output counter frequency, uint32 pool array)
+
+    @return list - Timestamp ordered runs of (sort key, triage arguments tuple, nlog output string)
+    """
+    nlogName, coreId, poolFreq, counterFreq, myPool = poolTask
+    _workerTranslate.counterFreq = counterFreq
+
+    formattedRuns = []
+    for eventStream in NlogEventPoolParser(nlogName, coreId).getEventStreams(myPool, poolFreq):
+        keyedEvents = list(eventStream)
+        formattedEvents = _workerTranslate.formatEventStream(event for sortKey, event in keyedEvents)
+        formattedRuns.append([(sortKey, triageArgs, nlogText) for (sortKey, event), (triageArgs, nlogText) in zip(keyedEvents, formattedEvents)])
+    return formattedRuns
+
 class TelemetryV2NlogEventParserL2(object):
     """
     Brief:
@@ -1274,8 +1631,7 @@ class TelemetryV2NlogEventParserL2(object):
             self.nlogBin.seek(self.currentFileOffset)
 
             # Read the nlog buffer and put it into the order we need
-            myPool = NLogPoolArray( self.nlogBin.read(byteSize) )
-            myPool.reverse()
+            myPool = NLogPoolArray( self.nlogBin.read(byteSize) )[::-1]
 
             # Adjust the current offset to the next data section
             self.currentFileOffset = self.__adjustCurrentOffset(byteSize)
@@ -1305,6 +1661,91 @@ class TelemetryV2NlogEventParserL2(object):
         self.__closeBinFile()
         return eventList
 
+    def getEventStreams(self):
+        """
+        Read the pools of the input nlog bin file and split them into timestamp ordered runs of events.
+
+        @return list - Generators of (sort key, nlog event tuple), see NlogEventPoolParser.getEventStreams()
+        """
+        eventStreams = []
+        self.__openBinFile()
+
+        while (self.currentFileOffset < self.fileSize):
+            # Read the current pool
+            myPool = self.__readTelemetryNlogHeaderAndPool()
+
+            # Decode the pool, the event tuples are only built as the runs are consumed
+            eventGenerator = NlogEventPoolParser(self.nlogName, self.core)
+            eventStreams.extend(eventGenerator.getEventStreams(myPool, self.counterFreq))
+
+        self.__closeBinFile()
+        return eventStreams
+
+    def iterEventTuples(self, nlogFileNameList):
+        """
+        Merge the events of all the pools of the nlog bin files in timestamp order.
+
+        @param nlogFileNameList - List of Path/File names of telemetry Nlog objects to parse
+
+        @return generator - Chronologically ordered nlog event tuples
+        """
+        eventStreams = []
+        for nlogFileName in nlogFileNameList:
+            self.nlogFileName = nlogFileName
+            eventStreams.extend(self.getEventStreams())
+
+        for sortKey, event in heapq.merge(*eventStreams, key=lambda keyedEvent: keyedEvent[0]):
+            yield event
+
+    def getPoolList(self):
+        """
+        Read the pools of the input nlog bin file.
+
+        @return list - (nlog name, core, counter frequency, uint32 pool array) of each pool
+        """
+        poolList = []
+        self.__openBinFile()
+
+        while (self.currentFileOffset < self.fileSize):
+            myPool = self.__readTelemetryNlogHeaderAndPool()
+            poolList.append((self.nlogName, self.core, self.counterFreq, myPool))
+
+        self.__closeBinFile()
+        return poolList
+
+    def iterFormattedEvents(self, nlogFileNameList, formatsFile = None, enumFile = None, workers = 0):
+        """
+        Decode and format the pools of the nlog bin files in a process pool, then merge the events in timestamp order.
+
+        @param nlogFileNameList - List of Path/File names of telemetry Nlog objects to parse
+        @param formatsFile - Path/File name of the Nlog_formats.py file to use for format translation
+        @param enumFile    - Path/File name of the nlog enum file or None
+        @param workers     - Number of worker processes, 0 for one per CPU
+
+        @return generator - Chronologically ordered (triage arguments tuple, nlog output string)
+        """
+        poolList = []
+        for nlogFileName in nlogFileNameList:
+            self.nlogFileName = nlogFileName
+            poolList.extend(self.getPoolList())
+
+        # The text timestamps use the frequency of the last pool read, as the serial translation does
+        poolTasks = [(nlogName, core, poolFreq, self.counterFreq, myPool) for nlogName, core, poolFreq, myPool in poolList]
+        del poolList[0:]
+
+        formattedRuns = []
+        if (len(poolTasks) > 0):
+            processPool = multiprocessing.Pool(workers if (workers > 0) else None, _initXlateWorker, (formatsFile, enumFile, OutputLog.debugOutputLevel))
+            try:
+                for poolRuns in processPool.imap(_xlatePoolWorker, poolTasks):
+                    formattedRuns.extend(poolRuns)
+            finally:
+                processPool.close()
+                processPool.join()
+
+        for sortKey, triageArgs, nlogText in heapq.merge(*formattedRuns, key=lambda formattedEvent: formattedEvent[0]):
+            yield triageArgs, nlogText
+
     def xlateToText(self, eventList: list = None, nlogFormats = None, enumFile=None):
         if (len(eventList) > 0):
             xlate = EventTupleTranslate(self.counterFreq, nlogFormats, enumFile)
@@ -1398,38 +1839,61 @@ class TelemetryV2NlogEventParserL2(object):
 
         return status
 
-    def XlateAndOutputMultipleNlog(self, nlogFileNameList = None, formatsFile = None, outputStream = None, triageStream = None):
+    def XlateAndOutputMultipleNlog(self, nlogFileNameList = None, formatsFile = None, outputStream = None, triageStream = None, enumFile = None, workers = 1):
         """
-        Parse the nlog file and output the data
+        Parse the nlog files and output the data.  The events of all the pools are merged by timestamp and translated
+        as they are written, so only the raw pools are held in memory instead of the event and text lists.  With more
+        than one worker the pools are decoded and formatted in a process pool and only the triage runs in order here.
 
         @param nlogFileNameList - List of Path/File names of telemetry Nlog objects to parse and translate
         @param formatsFile  - Path/File name of the Nlog_formats.py file to use for format translation
         @param outputStream - Stream object to output translated text to
         @param triageStream - Stream object to output trage data or None to throw it away
+        @param enumFile     - Path/File name of the nlog enum file or None
+        @param workers      - Number of translation processes, 1 translates in this process, 0 uses one per CPU
 
         @return bool - True = parse and translation worked.  False = error
         """
         if (nlogFileNameList is not None):
-            eventList = []
-            for nlogFileName in nlogFileNameList:
-                # Open the bin file and convert to event list
-                self.nlogFileName = nlogFileName
-                eventList.extend(self.getEventTupleList())
+            startTime = time.time()
+            if (workers == 1):
+                events = self.iterEventTuples(nlogFileNameList)
+            else:
+                events = self.iterFormattedEvents(nlogFileNameList, formatsFile, enumFile, workers)
+            firstEvent = next(events, None)
+
+            # Test if the event generation worked
+            if (firstEvent is not None):
+                xlate = EventTupleTranslate(self.counterFreq, formatsFile, enumFile)
+
+                # Register any triage objects
+                xlate.RegisterTriageList(self.triageObjectList)
+
+                # Generate the nlog strings as they are written
+                headerText = xlate.generateHeader(self.counterFreq, self.core)
+                events = itertools.chain([firstEvent], events)
+                if (workers == 1): events = xlate.formatEventStream(events)
+                nlogTextStream = xlate.markFirstEntryStream(xlate.triageEventStream(events))
+                if (outputStream is not None):
+                    self.WriteNlogStream(outputStream, headerText, nlogTextStream)
+                else:
+                    # The triage objects still need to see every event
+                    for nlogText in nlogTextStream: pass
 
-            # Test if the event list generation worked
-            if (len(eventList) > 0):
-                # Convert the event list to text strings
-                nlogTextList, headerText, triageText = self.xlateToText(eventList=eventList, nlogFormats=formatsFile, enumFile=None)
+                # Get the triage objects to report status text
+                triageText = xlate.GetTriageText()
                 status = True
+
+                elapsedTime = max(time.time() - startTime, 1e-6)
+                OutputLog.Information("Translated %d nlog events in %.2f s (%.0f events/sec, %s workers)" %
+                                      (xlate.eventCount, elapsedTime, xlate.eventCount / elapsedTime, str(workers) if (workers > 0) else "all"))
             else:
-                nlogTextList = None
-                headerText = None
                 triageText = None
                 status = False
+                if (outputStream is not None):
+                    self.WriteNlogStream(outputStream, None, None)
 
             # Output to the stream
-            if (outputStream is not None):
-                self.WriteNlogStream(outputStream, headerText, nlogTextList)
             if (triageStream is not None):
                 self.WriteTriageStream(triageStream, triageText)
 
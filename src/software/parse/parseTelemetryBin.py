@@ -9,7 +9,7 @@ Stores in a single directory.
 """
 from __future__ import absolute_import, division, print_function, unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
 #### Import system libraries
-import re, os, sys, array, ctypes, time, glob, getopt, math
+import re, os, sys, array, ctypes, time, glob, getopt, math, mmap
 from optparse import OptionParser
 
 ##### .exe extension patch for the compiled version of this script
@@ -68,6 +68,7 @@ class ObjectListEntry(object):
         self.humanName = humanName
         self.dataArea = dataArea
         self.binData = None
+        self.binSource = None
 
     def __repr__(self):
         reprString = "\n===objectId= %s, maj= %s, min= %s===\n" % (self.objectId, self.objectMajorVer, self.objectMinorVer)
@@ -115,8 +116,20 @@ class ObjectListEntry(object):
     def setBinData(self, binData):
         self.binData = binData
 
+    # @staticmethod
+    def setBinSource(self, binSource):
+        """
+        Attach the memory mapped telemetry log, getBinData() then slices the object data out of it on demand.
+        """
+        self.binSource = binSource
+
     # @staticmethod
     def getBinData(self):
+        """
+        Object data set with setBinData(), else a zero-copy memoryview of the object in the mapped telemetry log.
+        """
+        if (self.binData is None) and (self.binSource is not None):
+            return self.binSource[self.dataOffset:self.dataOffset + self.dataSize]
         return self.binData
 
     # @staticmethod
@@ -214,6 +227,8 @@ class splitTelemetryFile(object):
         self.currentTocMajor = 0
         self.currentTocMinor = 0
         self.currentDataAreaNumber = 0
+        self.telemetryMappedFile = None
+        self.telemetryView = None
         OutputLog.DebugPrint(4, "Object Map Data")
         OutputLog.DebugPrint(4, self.objectIdList.tostr())
 
@@ -229,6 +244,59 @@ class splitTelemetryFile(object):
         else:
             self.objHeaderSize = nvmeHeaderSize
 
+    def mapTelemetryFile(self, telemetryData):
+        """
+        Memory map the telemetry log once so the TOC, object headers and object data are sliced out of it instead of
+        being read with a seek and a read each.
+
+        Input: telemetryData - Binary input file object
+
+        Output: memoryview of the whole log, or None when the file object cannot be mapped (the parse then falls back
+                to reading the file object)
+        """
+        if (self.telemetryMappedFile is telemetryData) and (self.telemetryView is not None):
+            return self.telemetryView
+        try:
+            mapped = mmap.mmap(telemetryData.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # Not a regular file (e.g. in-memory stream) or an empty file
+            self.telemetryMappedFile = None
+            self.telemetryView = None
+            return None
+        self.telemetryMappedFile = telemetryData
+        self.telemetryView = memoryview(mapped)
+        return self.telemetryView
+
+    def getTelemetrySource(self, telemetryData, dataOffset, dataSize):
+        """
+        Source of a block of the telemetry log for the structure unions and the output writers
+
+        Input: telemetryData - Binary input file object
+               dataOffset - Offset of the block from the start of the log
+               dataSize - Size of the block in bytes
+
+        Output: memoryview slice of the mapped log (zero padded past the end of the log, as a short read would be),
+                or the file object positioned at dataOffset when telemetryData is not mapped
+        """
+        if (self.telemetryView is None) or (telemetryData is not self.telemetryMappedFile):
+            telemetryData.seek(dataOffset)
+            return telemetryData
+        block = self.telemetryView[dataOffset:dataOffset + dataSize]
+        if (len(block) < dataSize):
+            OutputLog.DebugPrint(2, format("read EOF - returning zero data"))
+            return memoryview(bytearray(dataSize))
+        return block
+
+    def getDataAreaViews(self):
+        """
+        Zero-copy views of the data areas found by checkTelemetryFile()
+
+        Output: List of (dataAreaNumber, memoryview), empty when the log is not mapped
+        """
+        if (self.telemetryView is None):
+            return []
+        return [(dataAreaNumber, self.telemetryView[dataAreaOffset:dataAreaOffset + dataAreaSize]) for dataAreaOffset, dataAreaSize, dataAreaNumber in self.dataAreaList]
+
     def writeOutputData(self, inputFile, dataOffset, dataSize, outputFileName):
         """
         Write the data block to the output file as binary (as-is)
@@ -237,11 +305,11 @@ class splitTelemetryFile(object):
                objectDesc - Object descriptor containint the location and size of the object in the input binary
                outputFileName - Name and path of the output file to generate
         """
-        inputFile.seek(dataOffset)
+        source = self.getTelemetrySource(inputFile, dataOffset, dataSize)
         OutputLog.DebugPrint(2, format("Creating file: %s, size %d" % (outputFileName, dataSize)))
         outBin = openWriteFile(outputFileName)
         if (outBin is not None):
-            outputData = inputFile.read(dataSize)
+            outputData = source.read(dataSize) if hasattr(source, 'read') else source
             outBin.write(outputData)
             outBin.close()
             return outputData
@@ -255,11 +323,11 @@ class splitTelemetryFile(object):
                objectDesc - Object descriptor containint the location and size of the object in the input binary
                outputFileName - Name and path of the output file to generate
         """
-        inputFile.seek(dataOffset)
+        source = self.getTelemetrySource(inputFile, dataOffset, dataSize)
         OutputLog.DebugPrint(2, format("Creating file: %s, size %d" % (outputFileName, dataSize)))
         outBin = openWriteFile(outputFileName, True)
         if (outBin is not None):
-            putString = inputFile.read(dataSize)
+            putString = source.read(dataSize) if hasattr(source, 'read') else source.tobytes()
             outBin.write(str(putString))
             outBin.close()
             return putString
@@ -297,8 +365,7 @@ class splitTelemetryFile(object):
         Output: True = Check passed
                 False = Validity object does not match expected data
         """
-        telemetryData.seek(objectOffset)
-        validation = intelTelemetryDataAreaValidation_union(telemetryData)
+        validation = intelTelemetryDataAreaValidation_union(self.getTelemetrySource(telemetryData, objectOffset, 8))
         if (validation.validate() == False):
             OutputLog.Warning(format("Data Area %d TOC Entry %d validation value error, expected 0x%x, read 0x%x\n" % (self.currentDataAreaNumber, tocObjectNumber, validation.getExpectedValue(), validation.getValidationValue())))
             return False
@@ -323,8 +390,8 @@ class splitTelemetryFile(object):
         """
         returnStatus = True
         validationStatus = True
-        telemetryData.seek(objectOffset)
-        objectHeader = intelTelemetryObjectHeader_union(telemetryData, self.objHeaderSize).getStruct(self.currentTocMajor, self.currentTocMinor)
+        objectSource = self.getTelemetrySource(telemetryData, objectOffset, self.objHeaderSize)
+        objectHeader = intelTelemetryObjectHeader_union(objectSource, self.objHeaderSize).getStruct(self.currentTocMajor, self.currentTocMinor)
 
         # Parse the object
         objectByteSize = objectHeader.getObjectByteSize(objectSize)
@@ -485,9 +552,8 @@ class splitTelemetryFile(object):
         Read the data area table of contents and return the parameter
         """
         # Read the TOC data
-        telemetryData.seek(dataAreaStartOffset)
         tocRead = min(self.tocSize, dataAreaSize)
-        intelTelemetryTOC = intelTelemetryTOC_union(telemetryData, tocRead).getStruct()
+        intelTelemetryTOC = intelTelemetryTOC_union(self.getTelemetrySource(telemetryData, dataAreaStartOffset, tocRead), tocRead).getStruct()
         OutputLog.DebugPrint(3, "Table of contents:")
         OutputLog.DebugPrint(3, intelTelemetryTOC.tostr())
         return intelTelemetryTOC
@@ -582,8 +648,8 @@ class splitTelemetryFile(object):
         fileReturnStatus = True
         fileValidationStatus = True
 
-        telemetryData.seek(0)
-        telemetryHeader = TelemetryLogPageHeader_union(telemetryData, self.logBlockSize).getInterfaceTelemetryHeaderStruct()
+        self.mapTelemetryFile(telemetryData)
+        telemetryHeader = TelemetryLogPageHeader_union(self.getTelemetrySource(telemetryData, 0, self.logBlockSize), self.logBlockSize).getInterfaceTelemetryHeaderStruct()
         if (False == telemetryHeader.validate()):
             OutputLog.Error("Invalid interface header. Aborting parse.")
             return False, False
@@ -601,13 +667,14 @@ class splitTelemetryFile(object):
 
         OutputLog.DebugPrint(2, telemetryHeader.tostr())
 
-        outputFileName = outFileBaseName + fileDelimiter + "TelemetryHeader.txt"
-        outTxt = openWriteFile(outputFileName, text=True)
-        if outTxt is not None:
-            outTxt.write(telemetryHeader.tostr())
-            outTxt.close()
-        else:
-            print("Writing TelemetryHeader failed...")
+        if (outFileBaseName is not None):
+            outputFileName = outFileBaseName + fileDelimiter + "TelemetryHeader.txt"
+            outTxt = openWriteFile(outputFileName, text=True)
+            if outTxt is not None:
+                outTxt.write(telemetryHeader.tostr())
+                outTxt.close()
+            else:
+                print("Writing TelemetryHeader failed...")
 
         # Get the last block of the data
         lastBlock, dataAreaList = telemetryHeader.getLastBlock()
@@ -638,9 +705,15 @@ class splitTelemetryFile(object):
 
         return fileReturnStatus, fileValidationStatus
 
-    def splitTelemetryFile(self, telemetryData, outFileBaseName, hilog=True):
+    def splitTelemetryFile(self, telemetryData, outFileBaseName, hilog=True, writeFiles=True):
         """
         A wrapper for checkTelemetryFile(), and print data areas to files
+
+        Input: telemetryData - Binary input file object
+               outFileBaseName - Output file base name, None when writeFiles is False writes nothing at all
+               hilog - Host Initiated Telemetry Data Log
+               writeFiles - When False the log is split in memory only: no bin files are written, the split list holds
+                            (objectData, None) and each object exposes its data through objectData.getBinData()
         """
 
         # clean any old list
@@ -648,7 +721,18 @@ class splitTelemetryFile(object):
 
         # Check file for validity
         returnStatus, validationStatus = self.checkTelemetryFile(telemetryData, hilog, outFileBaseName)
-        if (True == returnStatus):
+
+        # Objects slice their data lazily out of the mapped log
+        if (self.telemetryView is not None):
+            for objectData in self.splitObjectList:
+                objectData.setBinSource(self.telemetryView)
+
+        if (True == returnStatus) and (False == writeFiles):
+            if (self.telemetryView is None):
+                OutputLog.Warning("Telemetry log could not be memory mapped, objects have no data attached")
+            for objectData in self.splitObjectList:
+                self.splitFileList.append((objectData, None))
+        elif (True == returnStatus):
             # Output data area bin files
             for dataArea in self.dataAreaList:
                 dataAreaOffset, dataAreaSize, dataAreaNumber = dataArea
@@ -806,9 +890,9 @@ class telemetryFileParse(object):
     def buildNlogList(self, parseFileList, outFileBaseName):
         return self.telemetrySplit.buildNlogList(parseFileList, outFileBaseName)
 
-    def parseTelemetryDataPhase1(self, outputBaseName, hiLog=True):
+    def parseTelemetryDataPhase1(self, outputBaseName, hiLog=True, writeFiles=True):
         """ parseTelemetryDataPhase1 is a wrapper function for checkTeletryDataPhase1"""
-        return self.telemetrySplit.splitTelemetryFile(self.telemetryBinFile, outputBaseName, hiLog)
+        return self.telemetrySplit.splitTelemetryFile(self.telemetryBinFile, outputBaseName, hiLog, writeFiles)
 
     def parseTelemetryDataPhase2(self, parseFileList, outputBaseName):
         return self.telemetryPhase2Parse.parseFiles(parseFileList, outputBaseName)
@@ -880,10 +964,12 @@ def checkLogListValidity(logFileList, hiLog=True):
     return validityStatus
 
 
-def parseInputBin(telemetryInputBin, hilog, outPath, prefix=None, checkOnly=False):
+def parseInputBin(telemetryInputBin, hilog, outPath, prefix=None, checkOnly=False, writeFiles=True):
     """
     The main interface, creates and runs telemetryFileParse Factory functionality
 
+    writeFiles = When False the log is memory mapped and split without writing any file, the objects of
+                 telemetryParser.telemetrySplit.splitObjectList expose their data through getBinData()
     """
     parseStatus = True
     parseValidity = True
@@ -904,12 +990,12 @@ def parseInputBin(telemetryInputBin, hilog, outPath, prefix=None, checkOnly=Fals
             outFilePrefix = prefix
 
         # Construct the output file base name
-        outFileBaseName = os.path.join(outPath, outFilePrefix)
+        outFileBaseName = os.path.join(outPath, outFilePrefix) if writeFiles else None
 
         # Read and split the telemetry data file into it's component data files
         OutputLog.setWarnIsError(False)
-        parseFileList, parseStatus, parseValidity = telemetryParser.parseTelemetryDataPhase1(outFileBaseName, hilog)
-        if (parseFileList is not None):
+        parseFileList, parseStatus, parseValidity = telemetryParser.parseTelemetryDataPhase1(outFileBaseName, hilog, writeFiles)
+        if (parseFileList is not None) and writeFiles:
             # Phase 2 parse (currently does nothing)
             OutputLog.Information("Phase 2 Parse (does nothing yet)")
             telemetryParser.parseTelemetryDataPhase2(parseFileList, outFileBaseName)
@@ -917,7 +1003,7 @@ def parseInputBin(telemetryInputBin, hilog, outPath, prefix=None, checkOnly=Fals
     return parseStatus, parseValidity, telemetryParser
 
 
-def parseTelemetryBinAPI(inputFile, outpath=None, prefix=None, hilog=True, checkOnly=False, debug=False):
+def parseTelemetryBinAPI(inputFile, outpath=None, prefix=None, hilog=True, checkOnly=False, debug=False, writeFiles=True):
     """
     API to replace standard Command Line Call
 
@@ -926,6 +1012,7 @@ def parseTelemetryBinAPI(inputFile, outpath=None, prefix=None, hilog=True, check
     prefix = Output file prefix
     hiLog = Host Initiated Telemetry Data Log
     checkOnly = When set the parsed data is not output only checked for validity (default = false)
+    writeFiles = When False the log is split in memory (memory mapped), no output file is written and outpath is untouched
     """
 
     # Assign the argument values
@@ -935,7 +1022,7 @@ def parseTelemetryBinAPI(inputFile, outpath=None, prefix=None, hilog=True, check
     OutputLog.Information("infile:  " + inputFile)
 
     # Check output path
-    if (outpath is not None):
+    if (outpath is not None) and writeFiles:
         cleanDir(outpath)
         absOutPath = os.path.abspath(outpath)
         OutputLog.Information("outpath: " + outpath)
@@ -950,7 +1037,7 @@ def parseTelemetryBinAPI(inputFile, outpath=None, prefix=None, hilog=True, check
     OutputLog.Information(format("\nAttempting to parsing file \"%s\"..." % (inputFile)))
     telemetryInputBin = openReadFile(inputFile)
     if (telemetryInputBin is not None):
-        parseStatus, validityCheck, telemetryParser = parseInputBin(telemetryInputBin, hilog, absOutPath, prefix, checkOnly)
+        parseStatus, validityCheck, telemetryParser = parseInputBin(telemetryInputBin, hilog, absOutPath, prefix, checkOnly, writeFiles)
         telemetryInputBin.close()
         if (False is parseStatus):
             OutputLog.Information("Failed!!!!")
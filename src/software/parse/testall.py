@@ -38,6 +38,17 @@ from src.software.parse.testTelemetryPull import pullTest
 from src.software.parse.internal.testCIAER import CIAER_Test
 from src.software.parse.internal.testCIAER import clearOldLogs
 
+#### import buffer modules
+from src.software.parse.bufdict import bufdict
+from src.software.parse.bufdict import buflist
+from src.software.parse.bufdict import extractionPlan
+from src.software.parse.bufdict import bdDEC
+from src.software.parse.bufdict import bdHEX
+from src.software.parse.checksum import fwAdlerChecksum32
+from src.software.parse.checksum import fnvChecksum32
+from src.software.parse.checksum import fwChecksum32
+from src.software.parse.checksum import fwChecksum8
+
 TOOL_VERSION           = 1.0
 
 def makeDirName(dirName):
@@ -49,6 +60,178 @@ def makeFileName(fileName, dirName):
     outName = os.path.join(folder, fileName)
     return outName
 
+#### Offline buffer checks, these need no drive
+BUF_TEST_HEADER_DESCRIPTION = \
+[
+####  name     size signed default style  Tokens  help string
+    'version',  16,     0,      1, bdHEX,  None, "Version of the test list.",
+    'size',     16,     0,      0, bdDEC,  None, "Number of entries in the list.",
+]
+
+BUF_TEST_ENTRY_DESCRIPTION = \
+[
+####  name     size signed default style  Tokens  help string
+    'count',     8,     0,      0, bdDEC,  None, "Byte aligned unsigned field.",
+    'delta',     4,     1,      0, bdDEC,  None, "Signed bit field.",
+    'flags',     4,     0,      0, bdHEX,  None, "Unsigned bit field.",
+    'address',  32,     0,      0, bdHEX,  None, "Byte aligned 32b field.",
+    'total',     0,     0,      0, bdDEC,  None, "Calculated field, not in the buffer.",
+]
+
+# Entries (count, delta, flags, address) of the test list and its buffer image.
+BUF_TEST_ENTRIES = [(0, 0, 0x0, 0), (1, -1, 0x3, 1000), (2, -2, 0x6, 2000), (3, -3, 0x9, 3000)]
+BUF_TEST_LIST_IMAGE = "01000400" "000000000000" "013fe8030000" "026ed0070000" "039db80b0000"
+
+class bufTestHeader(bufdict):
+    "Header of the offline buffer test list"
+    def __init__(self, buf=None, offset=0, filename=None, other=None, majorVersion=None, minorVersion=None):
+        bufdict.__init__(self, description=BUF_TEST_HEADER_DESCRIPTION, name="Buf Test Header", filename=filename, buf=buf, offset=offset, other=other)
+
+class bufTestEntry(bufdict):
+    "Entry of the offline buffer test list"
+    def __init__(self, buf=None, offset=0, filename=None, other=None, majorVersion=None, minorVersion=None):
+        bufdict.__init__(self, description=BUF_TEST_ENTRY_DESCRIPTION, name="Buf Test Entry", filename=filename, buf=buf, offset=offset, other=other)
+
+class bufTestList(buflist):
+    "Offline buffer test list"
+    def __init__(self, filename=None, buf=None, other=None):
+        buflist.__init__(self, bufTestEntry, bufTestHeader, name="Buf Test List", filename=filename, buf=buf, other=other)
+
+def entryValues(entry):
+    return (entry.count, entry.delta, entry.flags, entry.address)
+
+def bufdictTest():
+    # Entry set by attribute and key, written and read back
+    status = True
+    entry = bufTestEntry()
+    entry.count = 5
+    entry['delta'] = -3
+    entry.flags = 0xA
+    entry.address = 0x12345678
+    buf = entry.tobuf()
+    if (bytes(buf) != bytes.fromhex("05ad78563412")):
+        OutputLog.Error(format("bufdict tobuf() image %s\n" % (bytes(buf).hex())))
+        status = False
+    if (entryValues(bufTestEntry(buf=buf)) != (5, -3, 0xA, 0x12345678)):
+        OutputLog.Error("bufdict frombuf() values do not match\n")
+        status = False
+
+    # Entry starting in the middle of a byte, through the entry and through its extraction plan
+    shifted = (int.from_bytes(bytes(buf), 'little') << 4).to_bytes(len(buf) + 1, 'little')
+    if (entryValues(bufTestEntry(buf=shifted, offset=4)) != (5, -3, 0xA, 0x12345678)):
+        OutputLog.Error("bufdict frombuf() at a bit offset values do not match\n")
+        status = False
+    if (extractionPlan(BUF_TEST_ENTRY_DESCRIPTION).decodeRows(shifted, 4, 1) != [[5, -3, 0xA, 0x12345678]]):
+        OutputLog.Error("bdExtractionPlan decodeRows() at a bit offset values do not match\n")
+        status = False
+
+    # List written and read back through the compiled extraction plan
+    testList = bufTestList()
+    for values in BUF_TEST_ENTRIES:
+        entry = bufTestEntry()
+        entry.count, entry.delta, entry.flags, entry.address = values
+        testList.append(entry)
+    buf = testList.tobuf()
+    if (bytes(buf) != bytes.fromhex(BUF_TEST_LIST_IMAGE)):
+        OutputLog.Error(format("buflist tobuf() image %s\n" % (bytes(buf).hex())))
+        status = False
+    testList = bufTestList(buf=bytes.fromhex(BUF_TEST_LIST_IMAGE))
+    if ((len(testList) != len(BUF_TEST_ENTRIES)) or ([entryValues(entry) for entry in testList.buflist] != BUF_TEST_ENTRIES)):
+        OutputLog.Error("buflist frombuf() entries do not match\n")
+        status = False
+    return status
+
+def columnarTest():
+    # List decoded straight into column arrays
+    status = True
+    image = bytes.fromhex(BUF_TEST_LIST_IMAGE)
+    testList = bufTestList()
+    testList.frombuf(image, columnar=True)
+    for index, key in enumerate(['count', 'delta', 'flags', 'address']):
+        if (testList.columns[key].tolist() != [values[index] for values in BUF_TEST_ENTRIES]):
+            OutputLog.Error(format("buflist columnar frombuf() column %s is %s\n" % (key, testList.columns[key].tolist())))
+            status = False
+    if (testList.columns['delta'].dtype.kind != 'i'):
+        OutputLog.Error("buflist columnar frombuf() signed column is unsigned\n")
+        status = False
+    records = testList.to_records()
+    if ((list(records.dtype.names) != ['count', 'delta', 'flags', 'address']) or (records['address'].tolist() != [0, 1000, 2000, 3000])):
+        OutputLog.Error("buflist to_records() does not match\n")
+        status = False
+
+    # Sorting works on the columns, entry access turns them back into bufdict objects
+    testList.sort('delta')
+    if (testList.columns['count'].tolist() != [3, 2, 1, 0]):
+        OutputLog.Error("buflist columnar sort() order does not match\n")
+        status = False
+    if ((entryValues(testList[0]) != BUF_TEST_ENTRIES[3]) or (testList.columns != None)):
+        OutputLog.Error("buflist columnar entry access does not match\n")
+        status = False
+
+    # Appending in columns keeps the earlier entries
+    testList = bufTestList()
+    testList.frombuf(image, columnar=True)
+    testList.frombuf(image, append=True, columnar=True)
+    if ((len(testList) != 2 * len(BUF_TEST_ENTRIES)) or (testList.to_records()['count'].tolist() != [0, 1, 2, 3] * 2)):
+        OutputLog.Error("buflist columnar append does not match\n")
+        status = False
+    return status
+
+# Known good (size, skip, adler, fnv, fw32, fw8) of the ramp buffer (7 * i + 3) & 0xFF, around the 5550 byte fold
+# of fwChecksum32 and the NMAX (5552) boundary of Adler-32. The Adler-32 values match zlib.adler32, the others the
+# original byte loops.
+CHECKSUM_RAMP_VECTORS = \
+[
+    (    0, 0, 0x00000001, 0x00000000, 0x00000001, 0x100),
+    (    1, 0, 0x00040004, 0xFFFFFFFD, 0x00040004, 0xFD),
+    (    3, 0, 0x0031001F, 0xFFEEF5FD, 0x0031001F, 0xE2),
+    (   16, 0, 0x14400379, 0xF7132F4C, 0x14400379, 0x88),
+    (   16, 3, 0x1289035B, 0xF724394F, 0x1289035B, 0xA6),
+    ( 5549, 0, 0xBA52C8F0, 0x02E9D2C4, 0xBA52C8F0, 0xA7),
+    ( 5550, 0, 0x840FC9AE, 0x02E914C4, 0x840FC9AE, 0xE9),
+    ( 5551, 0, 0x4E91CA73, 0x022414C4, 0x4E91CA73, 0x24),
+    ( 5552, 0, 0x19DFCB3F, 0x362414C4, 0x19DFCB3F, 0x58),
+    ( 5553, 0, 0xE5F1CC12, 0x362413F1, 0xE5F1CC12, 0x85),
+    ( 5552, 1, 0xD8BFCB3C, 0x362414C7, 0xD8BFCB3C, 0x5B),
+    ( 5556, 4, 0xBBB9CE7F, 0x655343F4, 0xBBB9CE7F, 0x18),
+    (11104, 0, 0x415F978C, 0xAA8869C8, 0x415F978C, 0xB0),
+    (11104, 3, 0x2BFD976E, 0xAA9973CB, 0x2BFD976E, 0xCE),
+    (20000, 1, 0x3D90E928, 0x761AC95B, 0x3D90E928, 0x13),
+]
+
+# Known good (size, skip, adler, fnv, fw32, fw8) of all 0xFF buffers, the largest sums between two folds.
+CHECKSUM_ONES_VECTORS = \
+[
+    ( 5550, 0, 0xBB67998E, 0xFFFF056C, 0xBB67998E, 0xAE),
+    ( 5551, 0, 0x56039A8D, 0xFF00056C, 0x56039A8D, 0xAF),
+    ( 5552, 0, 0xF18F9B8C, 0x0000056C, 0xF18F9B8C, 0xB0),
+    ( 5553, 2, 0x56039A8D, 0x0001046C, 0x56039A8D, 0xAF),
+    (20000, 0, 0x9F51D664, 0x00001388, 0x9F51D664, 0x20),
+]
+
+def checksumTest():
+    status = True
+    vectors = [(bytearray((7 * i + 3) & 0xFF for i in range(vector[0])), vector) for vector in CHECKSUM_RAMP_VECTORS]
+    vectors += [(bytearray(b'\xff' * vector[0]), vector) for vector in CHECKSUM_ONES_VECTORS]
+    for data, (size, skip, adler, fnv, fw32, fw8) in vectors:
+        # buflist.checksum() passes the skip as a float
+        for skipArg in (skip, float(skip)):
+            actual = (fwAdlerChecksum32(data, size, skipArg), fnvChecksum32(data, size, skipArg),
+                      fwChecksum32(data, size, skipArg), fwChecksum8(data, size, skipArg))
+            if (actual != (adler, fnv, fw32, fw8)):
+                OutputLog.Error(format("Checksums of %d bytes skipping %s are (0x%X, 0x%X, 0x%X, 0x%X)\n" % ((size, skipArg) + actual)))
+                status = False
+    return status
+
+UNIT_TESTS = [bufdictTest, columnarTest, checksumTest]
+
+def unitTests():
+    exitStatus = True
+    for test in UNIT_TESTS:
+        OutputLog.Print(format("Offline %s..." % (test.__name__)))
+        if (False == test()): exitStatus = False
+    return exitStatus
+
 
 def main():
     drvIndex = None
@@ -60,6 +243,7 @@ def main():
     parser.add_option('-d',type='int', dest='drvnum', metavar='<DRVNUM>', default=None, help='Drive number to analyze')
     parser.add_option('-q',action='callback', callback=ScanDrives, help='Query system for the drive list')
     parser.add_option('--ulink',metavar='on|off|pc', default='', help='ULINK Control: ON, OFF, or Power Cycle (OFF+ON)')
+    parser.add_option('--unit',action='store_true', dest='unit', default=False, help='Run only the offline buffer and checksum checks, no drive needed')
     (options, args) = parser.parse_args()
 
     if (len(args) >= 1):
@@ -74,6 +258,13 @@ def main():
         OutputLog.enableQuiet()
     OutputLog.setWarnIsError(True)
 
+    # Offline checks only
+    if (options.unit):
+        exitStatus = unitTests()
+        if(True == exitStatus): OutputLog.Print ("All offline tests passed!!!!")
+        else: OutputLog.Print ("Offline test suite FAILED!!!")
+        return exitStatus
+
     # check for ulink power cycle
     if (options.ulink):
         if(False == SetUlink(options.ulink)):
@@ -208,6 +399,11 @@ def main():
             exitStatus = CIAER_Test(dut, "telemetryCIAER",  makeDirName(ciaerPullDir))
             clearOldLogs(dut)
 
+        elif (9 == testNumber):
+            # Offline buffer and checksum checks
+            OutputLog.Print("Offline Buffer and Checksum Checks...")
+            exitStatus = unitTests()
+
         else:
             runTest = False
 
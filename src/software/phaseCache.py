@@ -0,0 +1,373 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# *****************************************************************************/
+# * Authors: Joseph Tarango
+# *****************************************************************************/
+"""
+Persistent content addressed cache of the autoModuleAPI phase results. An entry is keyed by a hash of the phase name,
+its parameters, the bytes of its input files and the cache version, and holds the pickled phase result together with
+copies of the files the phase wrote into the output folder. A rerun on the same telemetry skips every phase whose key
+is unchanged, the files are copied back into the output folder and the result is returned as if the phase ran. The
+directory is capped in size by evicting the least recently used entries.
+
+Loading an entry unpickles it, so the cache lives in a per user directory only its owner can write to, and a directory
+owned by another user or writable by others is never read from or written to.
+"""
+from __future__ import absolute_import, division, print_function, \
+    unicode_literals  # , nested_scopes, generators, generator_stop, with_statement, annotations
+
+import hashlib
+import os
+import pickle
+import shutil
+import stat
+
+# Bump when a phase changes its outputs so stale results are never served.
+CACHE_VERSION = 1
+
+_RESULT_FILE = 'result.pickle'
+_FILES_FOLDER = 'files'
+_READ_SIZE = 1 << 20
+
+_defaultCache = None
+
+
+def defaultDirectory():
+    """
+    Returns the default cache directory, raad/phaseCache in the per user cache folder ($XDG_CACHE_HOME or ~/.cache).
+    """
+    cacheFolder = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cacheFolder, 'raad', 'phaseCache')
+
+
+def folderSnapshot(folder):
+    """
+    Returns the dictionary of relative path to (size, modification time) of the files below folder.
+
+    Parameters
+    ----------
+    folder: Folder to walk, a missing folder is empty.
+    """
+    snapshot = {}
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            snapshot[os.path.relpath(path, folder)] = (info.st_size, info.st_mtime_ns)
+    return snapshot
+
+
+def changedFiles(folder, before):
+    """
+    Returns the absolute paths of the files below folder created or modified since the snapshot before.
+
+    Parameters
+    ----------
+    folder: Folder to walk.
+    before: Snapshot returned by folderSnapshot().
+    """
+    return [os.path.join(folder, path) for path, stamp in sorted(folderSnapshot(folder).items())
+            if before.get(path) != stamp]
+
+
+def resultFiles(result):
+    """
+    Returns the absolute paths of the existing files named by the strings of a phase result, searching nested lists,
+    tuples and dictionary values.
+
+    Parameters
+    ----------
+    result: Phase result.
+    """
+    paths = []
+    pending = [result]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, str):
+            if os.path.isfile(item):
+                paths.append(os.path.abspath(item))
+        elif isinstance(item, (list, tuple, set)):
+            pending.extend(item)
+        elif isinstance(item, dict):
+            pending.extend(item.values())
+    return sorted(set(paths))
+
+
+class PhaseCache(object):
+    """
+    On disk phase result cache. Each entry is a <key> directory holding result.pickle and the phase output files under
+    files/ with their path relative to the output folder, the access time of an entry is the modification time of its
+    result file.
+    """
+
+    def __init__(self, directory=None, maxBytes=1 << 30, version=CACHE_VERSION):
+        """
+        Creates the cache, the directory is created on first use with access for its owner only.
+
+        Parameters
+        ----------
+        directory: Directory of the cache entries, defaults to defaultDirectory().
+        maxBytes: Size cap of the directory, the least recently used entries are evicted beyond it. None disables it.
+        version: Version mixed into every key.
+        """
+        if directory is None:
+            directory = defaultDirectory()
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.version = version
+
+    def key(self, phase, inputPaths=None, toolPaths=None, **parameters):
+        """
+        Returns the hexadecimal key of a phase result.
+
+        Parameters
+        ----------
+        phase: Name of the phase.
+        inputPaths: Files or folders whose contents the phase reads, e.g. the telemetry binaries or the time series INI.
+        toolPaths: Folders of decoders or scripts the phase runs, stamped by relative path, size and modification time
+                   instead of hashing their contents.
+        parameters: Any other argument changing the result, compared through repr().
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((self.version, phase, sorted(parameters.items()))).encode('utf-8'))
+        for path in (inputPaths or []):
+            digest.update(repr(('input', path)).encode('utf-8'))
+            if os.path.isdir(path):
+                for relativePath in sorted(folderSnapshot(path)):
+                    digest.update(relativePath.encode('utf-8'))
+                    self._hashFile(digest, os.path.join(path, relativePath))
+            elif os.path.isfile(path):
+                self._hashFile(digest, path)
+        for path in (toolPaths or []):
+            digest.update(repr(('tool', path, sorted(folderSnapshot(path).items()) if os.path.isdir(path) else
+                                None)).encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hashFile(digest, path):
+        """
+        Adds the bytes of a file to digest.
+        """
+        with open(path, 'rb') as fileObj:
+            for block in iter(lambda: fileObj.read(_READ_SIZE), b''):
+                digest.update(block)
+
+    def _isPrivate(self, create=False):
+        """
+        Returns True when the directory is a real directory owned by the current user that no other user can write to.
+
+        Parameters
+        ----------
+        create: Flag to create a missing directory, with access for its owner only.
+        """
+        if create:
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            except OSError:
+                return False
+        try:
+            info = os.lstat(self.directory)
+        except OSError:
+            return False
+        if not stat.S_ISDIR(info.st_mode):
+            return False
+        if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+            return False
+        return True
+
+    def _path(self, key):
+        """
+        Returns the directory of an entry.
+        """
+        return os.path.join(self.directory, key)
+
+    def load(self, key, outputFolder):
+        """
+        Returns (True, result) of key after copying its files back into outputFolder, or (False, None) on a miss, and
+        marks the entry as recently used. An entry naming files outside outputFolder that no longer exist is a miss, and
+        so is every entry of a directory failing _isPrivate().
+
+        Parameters
+        ----------
+        key: Key returned by key().
+        outputFolder: Folder the phase writes to.
+        """
+        if not self._isPrivate():
+            return (False, None)
+        entryPath = self._path(key)
+        resultPath = os.path.join(entryPath, _RESULT_FILE)
+        try:
+            with open(resultPath, 'rb') as fileObj:
+                entry = pickle.load(fileObj)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return (False, None)
+        if not all(os.path.isfile(path) for path in entry['externalFiles']):
+            return (False, None)
+        filesPath = os.path.join(entryPath, _FILES_FOLDER)
+        try:
+            for relativePath in entry['files']:
+                target = os.path.join(outputFolder, relativePath)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(filesPath, relativePath), target)
+        except OSError:
+            return (False, None)
+        try:
+            os.utime(resultPath, None)
+        except OSError:
+            pass
+        result = entry['result']
+        if entry['isTuple']:
+            result = tuple(pickle.loads(item) if item is not None else None for item in result)
+        return (True, result)
+
+    def store(self, key, result, outputFolder, outputFiles):
+        """
+        Writes result and the output files under key, then evicts the least recently used entries beyond the size cap.
+        The entry is written to a temporary directory and renamed, so concurrent readers never see a partial entry.
+        A tuple result is stored element by element, elements that cannot be pickled (open handles, drive objects) are
+        restored as None. Any other result that cannot be pickled is not stored, and nothing is stored in a directory
+        failing _isPrivate().
+
+        Parameters
+        ----------
+        key: Key returned by key().
+        result: Phase result.
+        outputFolder: Folder the phase writes to.
+        outputFiles: Absolute paths of the files the phase wrote, the ones outside outputFolder are only checked for
+                     existence on load.
+        """
+        outputFolder = os.path.abspath(outputFolder)
+        files = []
+        externalFiles = []
+        for path in outputFiles:
+            path = os.path.abspath(path)
+            if os.path.commonpath([path, outputFolder]) == outputFolder:
+                files.append(os.path.relpath(path, outputFolder))
+            else:
+                externalFiles.append(path)
+
+        if isinstance(result, tuple):
+            items = []
+            for item in result:
+                try:
+                    items.append(pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL))
+                except Exception:
+                    items.append(None)
+            entry = {'result': items, 'isTuple': True, 'files': files, 'externalFiles': externalFiles}
+        else:
+            entry = {'result': result, 'isTuple': False, 'files': files, 'externalFiles': externalFiles}
+        try:
+            entryBytes = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+
+        if not self._isPrivate(create=True):
+            return
+        entryPath = self._path(key)
+        temporary = '{0}.{1}.tmp'.format(entryPath, os.getpid())
+        try:
+            shutil.rmtree(temporary, ignore_errors=True)
+            filesPath = os.path.join(temporary, _FILES_FOLDER)
+            for relativePath in files:
+                target = os.path.join(filesPath, relativePath)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(outputFolder, relativePath), target)
+            os.makedirs(temporary, exist_ok=True)
+            # The result goes last since an entry is only complete once its result file exists.
+            with open(os.path.join(temporary, _RESULT_FILE), 'wb') as fileObj:
+                fileObj.write(entryBytes)
+            shutil.rmtree(entryPath, ignore_errors=True)
+            os.replace(temporary, entryPath)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+            return
+        self._evict()
+
+    def phase(self, phase, outputFolder, compute, inputPaths=None, toolPaths=None, outputFiles=None, **parameters):
+        """
+        Returns the result of a phase from the cache, computing and storing it on a miss.
+
+        Parameters
+        ----------
+        phase: Name of the phase.
+        outputFolder: Folder the phase writes to.
+        compute: Callable without arguments running the phase.
+        inputPaths: Files or folders whose contents the phase reads.
+        toolPaths: Folders of decoders or scripts the phase runs.
+        outputFiles: Callable receiving the result and returning the files the phase wrote, defaults to the files below
+                     outputFolder created or modified while the phase ran. Use resultFiles when phases run concurrently.
+        parameters: Any other argument changing the result.
+        """
+        key = self.key(phase, inputPaths=inputPaths, toolPaths=toolPaths, **parameters)
+        hit, result = self.load(key, outputFolder)
+        if hit:
+            return result
+        before = folderSnapshot(outputFolder) if outputFiles is None else None
+        result = compute()
+        files = changedFiles(outputFolder, before) if outputFiles is None else outputFiles(result)
+        self.store(key, result, outputFolder, files)
+        return result
+
+    def _entries(self):
+        """
+        Returns the list of (access time, bytes, key) of the complete entries.
+        """
+        try:
+            folders = [entry for entry in os.scandir(self.directory) if entry.is_dir() and
+                       not entry.name.endswith('.tmp')]
+        except OSError:
+            return []
+        entries = []
+        for folder in folders:
+            try:
+                accessed = os.stat(os.path.join(folder.path, _RESULT_FILE)).st_mtime
+            except OSError:
+                continue
+            size = sum(stamp[0] for stamp in folderSnapshot(folder.path).values())
+            entries.append((accessed, size, folder.name))
+        return entries
+
+    def size(self):
+        """
+        Returns the number of bytes used by the cache entries.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache fits within maxBytes.
+        """
+        if self.maxBytes is None:
+            return
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.maxBytes:
+                break
+            self.invalidate(key)
+            total -= size
+
+    def invalidate(self, key=None):
+        """
+        Removes one entry, or every entry when key is None.
+
+        Parameters
+        ----------
+        key: Key returned by key().
+        """
+        keys = [key] if key is not None else [entry for _, _, entry in self._entries()]
+        for entry in keys:
+            shutil.rmtree(self._path(entry), ignore_errors=True)
+
+
+def defaultCache():
+    """
+    Returns the process wide cache in the default directory, created on first use.
+    """
+    global _defaultCache
+    if _defaultCache is None:
+        _defaultCache = PhaseCache()
+    return _defaultCache
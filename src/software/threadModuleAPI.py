@@ -4,7 +4,7 @@
 # * Authors: Joseph Tarango
 # *****************************************************************************/
 # @package threadModuleAPI
-import optparse, datetime, traceback, pprint, os, threading, subprocess, re, psutil, sys, concurrent.futures, itertools, time, typing
+import optparse, datetime, traceback, pprint, os, threading, subprocess, re, psutil, sys, concurrent.futures, itertools, time, typing, multiprocessing
 
 from src.software.debug import whoami
 
@@ -307,6 +307,253 @@ class MassiveParallelismanyFunctionManyParameters():
         return
 
 
+def _executePhase(functionName, fParameters):
+    """Calls a phase function with its keyword parameters, module level so the pair can be sent to a worker process.
+    Args:
+        functionName: phase function
+        fParameters: dictionary of keyword parameters
+    Returns: phase function result
+    """
+    return functionName(**fParameters)
+
+
+class PhaseScheduler():
+    # Dependency aware scheduler in which each phase declares the data it reads and writes. Phases whose inputs are all
+    # available run concurrently on one shared process pool, the rest wait for the phases producing their inputs.
+
+    def __init__(self,
+                 debug: bool = False,
+                 workers: int = None,
+                 timeOut: int = (60 * 60 * 24),  # Default time is 60 seconds * 60 minutes * 24 hours = 1 day in seconds per phase, from its start
+                 runSequential: bool = False):
+        self.debug = debug
+        self.workers = workers  # Pool of workers
+        self.timeOut = timeOut
+        self.runSequential = runSequential
+        self.phaseDict = dict()  # Phase name to (function, parameters, inputs, outputs) in order of addition
+        self.resultsDict = dict()
+        self.encounteredExceptions = 0
+        self.exceptionFoundList = list()
+        self.skippedList = list()
+        self.failedSet = set()
+        self.alreadyExecuted = False
+        self.areResultsReady = False
+        self.startTime = None
+        self.endTime = None
+        self.totalTime = None
+        return
+
+    def addPhase(self, name, functionName, fParameters: dict = None, inputs: typing.List[str] = None, outputs: typing.List[str] = None):
+        """Adds a phase to the graph.
+        Args:
+            name: unique phase name
+            functionName: function to execute, module level so it can be run in a worker process
+            fParameters: dictionary of keyword parameters for the function
+            inputs: names of the data the phase reads, produced by other phases or given as available to execute()
+            outputs: names of the data the phase writes
+
+        Returns: None
+
+        Example
+        scheduler.addPhase('timeSeries', generateTimeSeriesGraphs, kwargs_TS, inputs=['timeSeriesINI'], outputs=['timeSeriesPDF'])
+        """
+        if name in self.phaseDict:
+            raise ValueError(f"Phase {name} already added")
+        self.phaseDict[name] = (functionName,
+                                dict() if fParameters is None else fParameters,
+                                list() if inputs is None else list(inputs),
+                                list() if outputs is None else list(outputs))
+        return
+
+    def getExceptionInfo(self):
+        return self.encounteredExceptions, self.exceptionFoundList
+
+    def getExecutionTime(self):
+        return self.startTime, self.endTime, self.totalTime
+
+    def getResults(self):
+        return self.resultsDict
+
+    def _dependencies(self, available):
+        """Resolves the phases each phase waits on from the declared inputs and outputs.
+        Args:
+            available: names of the data available before any phase runs
+
+        Returns: dictionary of phase name to the set of phase names it depends on
+        """
+        producers = dict()
+        for name, (_, _, _, outputs) in self.phaseDict.items():
+            for output in outputs:
+                if output in producers:
+                    raise ValueError(f"Data {output} produced by phases {producers[output]} and {name}")
+                producers[output] = name
+
+        dependencies = dict()
+        for name, (_, _, inputs, _) in self.phaseDict.items():
+            dependencies[name] = set()
+            for inputName in inputs:
+                if inputName in producers:
+                    dependencies[name].add(producers[inputName])
+                elif inputName not in available:
+                    raise ValueError(f"Phase {name} input {inputName} is neither available nor produced by a phase")
+
+        # Reject cycles before anything runs
+        resolved = set()
+        while len(resolved) < len(dependencies):
+            ready = [name for name in dependencies if name not in resolved and dependencies[name] <= resolved]
+            if not ready:
+                raise ValueError(f"Cyclic phase dependencies among {sorted(set(dependencies) - resolved)}")
+            resolved.update(ready)
+        return dependencies
+
+    def _recordException(self, name, errorObj):
+        self.encounteredExceptions += 1
+        exceptionContext = f" {whoami()} phase {name} with {errorObj}! Timeout={self.timeOut}"
+        self.exceptionFoundList.append(exceptionContext)
+        if self.debug:
+            print(exceptionContext)
+        return
+
+    def _readyPhases(self, dependencies, finished, started):
+        """Phases not started yet whose dependencies all finished, phases depending on a failed phase are skipped.
+        Returns: list of phase names in order of addition
+        """
+        readyList = list()
+        for name in self.phaseDict:
+            if name in started or not dependencies[name] <= finished:
+                continue
+            if any(dependency in self.skippedList or dependency in self.failedSet for dependency in dependencies[name]):
+                self.skippedList.append(name)
+                self.resultsDict[name] = None
+                started.add(name)
+                finished.add(name)
+                if self.debug:
+                    print(f" Skipping phase {name}, a phase it depends on failed")
+                continue
+            readyList.append(name)
+        return readyList
+
+    def _sequentialRun(self, dependencies):
+        """Function that executes the phases one at a time in dependency order, ties in order of addition.
+            Returns: dictionary of phase name to result.
+        """
+        finished = set()
+        started = set()
+        readyList = self._readyPhases(dependencies, finished, started)
+        while readyList:
+            for name in readyList:
+                functionName, fParameters, _, _ = self.phaseDict[name]
+                started.add(name)
+                try:
+                    self.resultsDict[name] = functionName(**fParameters)
+                except BaseException as errorObj:
+                    self.resultsDict[name] = None
+                    self.failedSet.add(name)
+                    self._recordException(name, errorObj)
+                finished.add(name)
+            readyList = self._readyPhases(dependencies, finished, started)
+        return self.resultsDict
+
+    def _concurrentRun(self, dependencies):
+        """Function that utilises one concurrent.futures.ProcessPoolExecutor for all phases, submitting each phase as soon
+        as the phases it depends on complete. Phases draw through the pyplot current figure and are CPU bound, so each one
+        runs in its own process: threads would save and close each other's figures and hold the GIL. The workers are
+        spawned rather than forked, so they do not inherit the TensorFlow and matplotlib state of this process. A phase is
+        only submitted when a worker is free, so its timeOut counts from its start. A phase past its timeOut is recorded
+        as failed and its dependents are skipped, the other phases go on. The executor cannot stop a running phase, so the
+        late phase keeps its worker until it returns.
+            Returns: dictionary of phase name to result.
+        """
+        finished = set()
+        started = set()
+        futureDict = dict()  # Running future to phase name
+        deadlineDict = dict()  # Running future to the time its phase times out
+        lateList = list()  # Futures of timed out phases, possibly still running
+        workers = self.workers if self.workers else (os.cpu_count() or 1)
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            while True:
+                busy = len(futureDict) + sum(1 for future in lateList if not future.done())
+                for name in self._readyPhases(dependencies, finished, started):
+                    if busy >= workers:
+                        break
+                    functionName, fParameters, _, _ = self.phaseDict[name]
+                    started.add(name)
+                    future = executor.submit(_executePhase, functionName, fParameters)
+                    futureDict[future] = name
+                    deadlineDict[future] = time.time() + self.timeOut
+                    busy += 1
+                    if self.debug:
+                        print(f" Submitted phase {name}")
+                if not futureDict:
+                    if len(started) < len(self.phaseDict) and lateList:
+                        # Ready phases wait for a worker held by a timed out phase
+                        concurrent.futures.wait(lateList, return_when=concurrent.futures.FIRST_COMPLETED)
+                        lateList = [future for future in lateList if not future.done()]
+                        continue
+                    break
+                timeLeft = max(0, min(deadlineDict.values()) - time.time())
+                done, _ = concurrent.futures.wait(futureDict, timeout=timeLeft, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = futureDict.pop(future)
+                    del deadlineDict[future]
+                    try:
+                        self.resultsDict[name] = future.result()
+                    except BaseException as errorObj:
+                        self.resultsDict[name] = None
+                        self.failedSet.add(name)
+                        self._recordException(name, errorObj)
+                    finished.add(name)
+                now = time.time()
+                for future in [future for future, deadline in deadlineDict.items() if deadline <= now]:
+                    name = futureDict.pop(future)
+                    del deadlineDict[future]
+                    self.resultsDict[name] = None
+                    self.failedSet.add(name)
+                    self._recordException(name, concurrent.futures.TimeoutError())
+                    finished.add(name)
+                    lateList.append(future)
+        finally:
+            # cancel_futures of shutdown() needs Python 3.9
+            for future in futureDict:
+                future.cancel()
+            executor.shutdown(wait=not any(not future.done() for future in lateList))
+        return self.resultsDict
+
+    def execute(self, available: typing.List[str] = None):
+        """Runs every phase once.
+        Args:
+            available: names of the data already available, e.g. files written before the scheduler runs
+
+        Returns: dictionary of phase name to result, None for failed and skipped phases
+        """
+        if self.alreadyExecuted is False:
+            self.alreadyExecuted = True
+            dependencies = self._dependencies(set() if available is None else set(available))
+            self.startTime = time.time()
+            if self.debug:
+                print(f"Phases, start time token {self.startTime}")
+
+            if self.runSequential is True or self.workers == 1:
+                if self.debug:
+                    print(" Processing phases sequentially in dependency order...")
+                self._sequentialRun(dependencies)
+            else:
+                if self.debug:
+                    print(" Processing independent phases concurrently...")
+                self._concurrentRun(dependencies)
+            self.resultsDict = {name: self.resultsDict[name] for name in self.phaseDict}
+
+            self.areResultsReady = True
+            self.endTime = time.time()
+            if self.debug:
+                print(f"End time token {self.endTime}")
+            self.totalTime = self.endTime - self.startTime
+            if self.debug:
+                print("Phases executed {0} at {1:.4f} seconds with {2} workers".format(len(self.resultsDict), self.totalTime, self.workers))
+        return self.resultsDict
+
+
 def API(options=None):
     """ API for the default application in the graphical interface.
     Args: